@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""Balance âgée (recouvrement, C3) calculée depuis le grand livre factures / encaissements.
+Le fichier est lu par blocs ; chaque ligne contribue indépendamment à toutes les fins de mois (numpy) :
+une facture ajoute son montant à la tranche d'âge de chaque fin de mois postérieure à sa date,
+un encaissement le retranche à partir de sa date, dans la tranche d'âge de la facture qu'il solde.
+Mémoire bornée par la taille de bloc ; résultat : séries KPI (forme gen_data) à verser dans les données.
+
+Grand livre CSV (en-tête) : type (F = facture, E = encaissement), facture, date_facture, date, montant."""
+import csv, itertools
+import numpy as np
+import build_cosmos as B
+from periods import BASE_YEAR
+
+BUCKETS=(30,60,90)   # bornes des tranches 0-30 / 30-60 / 60-90 / 90+ (jours depuis la facture)
+KEYS=("kpi.rec.aged_0_30","kpi.rec.aged_30_60","kpi.rec.aged_60_90","kpi.rec.aged_90p")
+DSO_MONTHS=3   # DSO : encours / facturé des 3 derniers mois × nombre de jours de ces mois
+CHUNK=250000
+
+def month_ends(n=B.N_MONTHS):
+    start=np.datetime64("%d-01"%BASE_YEAR,"M")
+    return (start+np.arange(1,n+1)).astype("datetime64[D]")-1
+
+class Ageing:
+    """Accumulateurs : encours par (fin de mois, tranche), facturé et encaissé par mois."""
+    def __init__(self,n=B.N_MONTHS):
+        self.me=month_ends(n); self.n=n
+        self.open=np.zeros((n,len(BUCKETS)+1)); self.billed=np.zeros(n); self.collected=np.zeros(n)
+        self.month0=np.datetime64("%d-01"%BASE_YEAR,"M")
+
+    def add(self,inv,d0,d,amt):
+        """Un bloc : inv (bool, facture), d0 date facture, d date de la ligne, amt montant (datetime64[D] / float)."""
+        sign=np.where(inv,1.0,-1.0)*amt
+        age=(self.me[None,:]-d0[:,None]).astype(np.int64)        # (lignes, fins de mois)
+        live=self.me[None,:]>=d[:,None]                          # contribution à partir de la date de la ligne
+        b=np.searchsorted(np.array(BUCKETS),age,side="left")     # 0..len(BUCKETS)
+        idx=np.arange(self.n)[None,:]*(len(BUCKETS)+1)+b
+        self.open+=np.bincount(idx[live],np.broadcast_to(sign[:,None],live.shape)[live],
+                               minlength=self.open.size).reshape(self.open.shape)
+        m=(d.astype("datetime64[M]")-self.month0).astype(np.int64); ok=(m>=0)&(m<self.n)
+        self.billed+=np.bincount(m[ok&inv],amt[ok&inv],minlength=self.n)
+        self.collected+=np.bincount(m[ok&~inv],amt[ok&~inv],minlength=self.n)
+
+    def kpis(self):
+        """Séries KPI : encours par tranche, AR, facturé, encaissé, DSO, taux de recouvrement."""
+        out={k:[int(round(v)) for v in self.open[:,j]] for j,k in enumerate(KEYS)}
+        ar=self.open.sum(1); out["kpi.rec.ar"]=[int(round(v)) for v in ar]
+        out["kpi.rec.billed"]=[int(round(v)) for v in self.billed]
+        out["kpi.rec.collected"]=[int(round(v)) for v in self.collected]
+        days=(self.me-self.me.astype("datetime64[M]").astype("datetime64[D]")).astype(np.int64)+1
+        cb=np.convolve(self.billed,np.ones(DSO_MONTHS))[:self.n]; cd=np.convolve(days,np.ones(DSO_MONTHS))[:self.n]
+        with np.errstate(invalid="ignore",divide="ignore"):
+            dso=np.where(cb>0,ar/cb*cd,np.nan); rec=np.where(self.billed>0,self.collected/self.billed,np.nan)
+        out["kpi.rec.dso"]=[None if np.isnan(v) else round(float(v),2) for v in dso]
+        out["kpi.rec.recovery"]=[None if np.isnan(v) else round(float(v),4) for v in rec]
+        return out
+
+def chunks(fn,size=CHUNK):
+    """Grand livre CSV -> blocs (facture?, date_facture, date, montant) en tableaux numpy."""
+    with open(fn,newline="",encoding="utf-8") as f:
+        rd=csv.reader(f); head=[h.strip().lower() for h in next(rd)]
+        ix=[head.index(c) for c in ("type","date_facture","date","montant")]
+        while True:
+            rows=list(itertools.islice(rd,size))
+            if not rows: return
+            t,d0,d,a=([r[i] for r in rows] for i in ix)
+            yield (np.char.upper(np.array(t))=="F",np.array(d0,dtype="datetime64[D]"),
+                   np.array(d,dtype="datetime64[D]"),np.array(a,dtype=float))
+
+def age(fn,size=CHUNK):
+    A=Ageing()
+    for blk in chunks(fn,size): A.add(*blk)
+    return A.kpis()
+
+def demo_ledger(fn,n_invoices=100000,seed=1):
+    """Grand livre de démo : factures sur 36 mois, encaissements partiels 0-150 jours plus tard."""
+    rng=np.random.default_rng(seed); start=np.datetime64("%d-01-01"%BASE_YEAR)
+    d0=start+rng.integers(0,int((month_ends()[-1]-start).astype(int)),n_invoices)
+    amt=np.round(rng.lognormal(14,1,n_invoices))
+    paid=rng.random(n_invoices)<0.9; dp=d0+rng.integers(0,150,n_invoices); pa=np.round(amt*rng.uniform(0.5,1.0,n_invoices))
+    with open(fn,"w",newline="",encoding="utf-8") as f:
+        w=csv.writer(f); w.writerow(("type","facture","date_facture","date","montant"))
+        for i in range(n_invoices):
+            w.writerow(("F","FA%07d"%i,d0[i],d0[i],int(amt[i])))
+            if paid[i]: w.writerow(("E","FA%07d"%i,d0[i],dp[i],int(pa[i])))
+
+if __name__=="__main__":
+    import argparse, time
+    ap=argparse.ArgumentParser(description="Balance âgée (C3) depuis le grand livre factures / encaissements")
+    ap.add_argument("ledger",help="grand livre CSV")
+    ap.add_argument("--demo",type=int,metavar="N",help="écrit d'abord un grand livre de démo de N factures")
+    ap.add_argument("--chunk",type=int,default=CHUNK,help="lignes par bloc")
+    a=ap.parse_args()
+    if a.demo: demo_ledger(a.ledger,a.demo)
+    t=time.perf_counter(); k=age(a.ledger,a.chunk)
+    for key in ("kpi.rec.ar",)+KEYS+("kpi.rec.billed","kpi.rec.collected","kpi.rec.dso","kpi.rec.recovery"):
+        print("  %-22s"%key," ".join(str(v) for v in k[key][-6:]))
+    print("AGEING: %.2fs"%(time.perf_counter()-t))
@@ -3,7 +3,7 @@
 Zéro VBA. Bilingue FR/EN. Multi-granularité M/Q/Y. Rapport mono-onglet multipage.
 Formules compatibles Excel 365 + moteur de recalcul LibreOffice (INDEX/MATCH, SUMIFS,
 AVERAGEIFS, EDATE, SUMPRODUCT, IF imbriqués — aucune LAMBDA/SWITCH/XLOOKUP en cellule)."""
-import random
+import copy, random
 from openpyxl import Workbook
 from openpyxl.styles import Font, PatternFill, Alignment, Border, Side, Protection
 from openpyxl.utils import get_column_letter
@@ -20,8 +20,10 @@ from openpyxl.chart.text import Text
 from openpyxl.chart.data_source import StrRef
 from openpyxl.chart.layout import Layout, ManualLayout
 from openpyxl.drawing.image import Image as XLImage
+from cfplan import CFPlan
+import fragments, layout
+Font,PatternFill,Alignment,Border,Side=map(layout.shared,(Font,PatternFill,Alignment,Border,Side))   # styles partagés
 import os
-random.seed(42)
 
 # ---------------------------------------------------------------- palette (Cosmos design tokens)
 PRIMARY="0A352E"; PRIMARY_L="14564A"; PRIMARY_XL="3C7A6B"; NEUTRAL="8C8A8A"
@@ -52,7 +54,6 @@ def gen_logo():
     d.text((190,52),"COSMOS",font=F(64),fill=white)
     d.text((192,128),"EMERGENCE PLAZA · YOPOUGON",font=F(24,False),fill=light)
     img.save(LOGO_PATH)
-gen_logo()
 
 ICON_DIR=os.path.join(os.path.dirname(os.path.abspath(__file__)),"_icons")
 def gen_icons():
@@ -93,7 +94,10 @@ def gen_icons():
         im,d=cv(); fn(d,white); im.save(os.path.join(ICON_DIR,"dep_"+n+".png"))
     for n,fn in catmap.items():
         im,d=cv(); fn(d,primary); im.save(os.path.join(ICON_DIR,"cat_"+n+".png"))
-gen_icons()
+_IMAGES=[]
+def gen_images():
+    """Logo et icônes du rapport : générés au premier assemblage du processus (PIL requis pour le seul rendu)."""
+    if not _IMAGES: gen_logo(); gen_icons(); _IMAGES.append(True)
 UCAT={"%":"chart","FCFA":"money","FCFA/m²":"ruler","nb":"hash","visites":"steps","ETP":"person","j":"clock","mois":"clock","score":"star"}
 def place_icon(s,fname,cell,px=18):
     p=os.path.join(ICON_DIR,fname+".png")
@@ -111,6 +115,12 @@ F_NUM1='#,##0.0;[Red](#,##0.0);"-"'
 def fill(h): return PatternFill("solid", fgColor=h)
 def side(h,style="thin"): return Side(style=style,color=h)
 def box(c): return Border(left=side(c),right=side(c),top=side(c),bottom=side(c))
+def paint_bg(s,color,c1,c2):
+    """Fond des colonnes c1..c2 par style de colonne (aucune cellule vide créée). Un style de cellule remplaçant
+    celui de la colonne, les cellules existantes sans remplissage propre reçoivent le même fond : à appeler en fin de builder."""
+    f=fill(color); layout.column_bg(s,f,c1,c2)
+    for (r,c),cl in s._cells.items():
+        if c1<=c<=c2 and (not cl.has_style or cl._style.fillId==0): cl.fill=f
 
 # ---------------------------------------------------------------- depts & H2 sub-modules
 DEPTS=[
@@ -262,6 +272,9 @@ KMETA={k[0]:k for k in KPIS}
 def kdept(k): return k.split(".")[1]
 def kmetric(k): return k.split(".")[2]
 def is_pct(u): return u=="%"
+def decimals(u,agg):
+    """Décimales de saisie d'un KPI : % à 4, unités fines et ratios à 2, le reste entier."""
+    return 4 if is_pct(u) else (2 if u in ("h","ans","TF","TG","min","kWh/m²","v/m²","score","mois") or agg=="RATIO" else 0)
 
 # lower-is-better metrics (RAG sens = DOWN)
 DOWN={"fte_gap","ocr","vac_age","gla_vacant","dso","provision","cpa","spend_pct","discount",
@@ -288,6 +301,7 @@ I18N=[
  ("col.current","Courant","Current"),("col.prev","Période préc.","Prior period"),
  ("col.py","N-1","PY"),("col.delta_prev","Δ% préc.","Δ% prior"),("col.delta_py","Δ% N-1","Δ% PY"),
  ("col.budget","Budget","Budget"),("col.var","Écart%","Var%"),("col.rag","Statut","Status"),
+ ("col.landing","Atterrissage","Landing"),("col.var_fy","Écart% budget annuel","Var% FY budget"),
  ("col.trend","Tendance","Trend"),("col.comment","Commentaire","Comment"),
  ("rag.green","Conforme","On track"),("rag.amber","Vigilance","Watch"),("rag.red","Alerte","Alert"),
  ("rag.global","RAG global","Global RAG"),
@@ -299,7 +313,7 @@ I18N=[
  ("msg.help","1 chiffre par KPI / mois — le rapport se remplit seul.","One figure per KPI / month — the report fills itself."),
  ("msg.updated","Mis à jour","Updated"),("msg.confidential","Confidentiel — diffusion restreinte","Confidential — restricted"),
  ("msg.version","Version 3.0","Version 3.0"),("msg.headline","Chiffre phare","Headline"),
- ("msg.heatmap","Heatmap RAG — départements × KPI clé","RAG heatmap — departments × key KPI"),
+ ("msg.movers","Movers — meilleurs et pires Δ% par département et au global","Movers — best and worst Δ% by department and overall"),
  ("msg.highlights","Faits marquants","Highlights"),("msg.tracking","Suivi de saisie","Input tracking"),
  ("msg.hero","Indicateurs groupe","Group indicators"),
  ("narr.up","{kpi} en hausse de {delta} vs période précédente.","{kpi} up {delta} vs prior period."),
@@ -319,11 +333,41 @@ SH={"M0":"M0 · Pilotage","M1":"M1 · Paramètres","M2":"M2 · i18n","M3":"M3 ·
  "RPT":"Rapport Cosmos","M5":"M5 · Données graphiques"}
 def q(code): return "'%s'" % SH[code]
 N_MONTHS=36; BASE_FIRST_COL=4
+GRAIN0,ANNEE0,MOIS0="M",2026,6   # sélecteurs M0 à l'ouverture (pupitre, panneaux département) = période validée par build()
+LAND_COL=BASE_FIRST_COL+N_MONTHS+1   # M3 : bloc atterrissage (KPI × mois d'observation), à droite de la base mensuelle
 def m3_col(i): return get_column_letter(BASE_FIRST_COL+i)
 
-wb=Workbook(); wb.remove(wb.active)
-ws={code:wb.create_sheet(title=name) for code,name in SH.items()}
-CALC=ws["M5"]; CALC.sheet_view.showGridLines=False  # feuille de calcul dédiée (masquée) pour les séries de graphiques
+# ---------------------------------------------------------------- demo data (KPI × mois) — chargée une fois par build
+def gen_data(seed=42):
+    """Données de démo ; seed (version des données) -> tirage reproductible (42 : jeu de démo par défaut)."""
+    rng=random.Random(seed); data={}
+    for dep in DEPT_COLLECTE:
+        for key in DEPT_KEYS[dep]:
+            _,fr,en,u,agg,d,h2,b,base=KMETA[key]; vals=[]
+            for i in range(N_MONTHS):
+                val=base*(1.0+rng.uniform(-0.05,0.15)*(i/(N_MONTHS-1))+rng.uniform(-0.02,0.02))
+                nd=decimals(u,agg)
+                val=round(max(0,min(1.3,val)),4) if is_pct(u) else (round(val,nd) if nd else int(round(val)))
+                vals.append(val)
+            data[key]=vals
+    return data
+
+class Build:
+    """État d'une génération (un classeur), passé à tous les builders : aucun état mutable au niveau module,
+    plusieurs classeurs peuvent donc être générés en parallèle dans un même processus (threads, exécuteurs asyncio)."""
+    def __init__(self,cache=None,sheets=None):
+        self.wb=Workbook(); self.wb.remove(self.wb.active)
+        self.ws={code:self.wb.create_sheet(title=SH[code]) for code in (sheets or SH)}   # sheets : sous-ensemble (classeur département)
+        self.calc=self.ws.get("M5")   # feuille de calcul dédiée (masquée) pour les séries de graphiques
+        if self.calc is not None: self.calc.sheet_view.showGridLines=False
+        self.cf=CFPlan()   # MFC différées : fusionnées en règles multi-plages au flush
+        self.gh=1; self.ch=CH0   # curseurs des lignes d'aide M5 : jauges (col GAUGE_COL), combos (zone HELP_COL)
+        self.cache=cache; self.misses=[]   # cache disque des fragments (None = rendu direct) ; fragments recalculés
+        self.details={}   # n° de section -> lignes de détail issues d'une source (remplacent celles de SECTIONS)
+        self.comments={}   # {clé: {'AAAA-MM': texte}} : commentaires repris dans la grille des collectes (kpistore)
+
+M3_ROW={k[0]:r for r,k in enumerate(KPIS,4)}   # ligne M3 de chaque KPI (build_m3 : KPIS dans l'ordre dès la ligne 4)
+BUD=(8,5,4+len(KPIS),{k[0]:r for r,k in enumerate(KPIS,5) if k[7]})   # M1 budget : 1re colonne, 1re/dernière ligne, lignes budgétées
 
 def T(key):
     return ('=IFERROR(IF(LANG="EN",INDEX(I18N_EN,MATCH("%s",I18N_KEY,0)),'
@@ -331,15 +375,15 @@ def T(key):
 def Tx(key): return T(key)[1:]   # without leading '='
 
 # ================================================================ M2
-def build_m2():
-    s=ws["M2"]; s.sheet_properties.tabColor=AMBER; s.sheet_view.showGridLines=False
-    for r in range(1,260):
-        for c in range(1,13): s.cell(r,c).fill=fill(DARK_BG)
+def build_m2(ctx,keys=None):
+    """keys : ne garder que ces libellés (classeur département) ; None = table complète."""
+    s=ctx.ws["M2"]; s.sheet_properties.tabColor=AMBER; s.sheet_view.showGridLines=False
     s["B1"]="M2 · i18n (FR/EN) + MOIS"; s["B1"].font=Font(name=UI,bold=True,size=14,color=AMBER)
     for j,h in enumerate(["KEY","FR","EN"]):
         c=s.cell(3,2+j,h); c.font=Font(name=UI,bold=True,color=DARK_BG); c.fill=fill(AMBER); c.alignment=Alignment(horizontal="center")
     r=4
     for key,fr,en in I18N:
+        if keys is not None and key not in keys: continue
         s.cell(r,2,key).font=Font(name=MONO,size=9,color=TXT_SEC_D)
         s.cell(r,3,fr).font=Font(name=UI,color=TXT_LIGHT)
         s.cell(r,4,en).font=Font(name=UI,color=TXT_LIGHT); r+=1
@@ -354,18 +398,17 @@ def build_m2():
         s.cell(4+i,10,fr).font=Font(name=UI,color=TXT_LIGHT)
         s.cell(4+i,11,en).font=Font(name=UI,color=TXT_LIGHT)
     s.column_dimensions["B"].width=28; s.column_dimensions["C"].width=34; s.column_dimensions["D"].width=34
-    wb.defined_names.add(DefinedName("I18N_KEY",attr_text=f"{q('M2')}!$B$4:$B${last}"))
-    wb.defined_names.add(DefinedName("I18N_FR", attr_text=f"{q('M2')}!$C$4:$C${last}"))
-    wb.defined_names.add(DefinedName("I18N_EN", attr_text=f"{q('M2')}!$D$4:$D${last}"))
-    wb.defined_names.add(DefinedName("MOIS_FR", attr_text=f"{q('M2')}!$J$4:$J$15"))
-    wb.defined_names.add(DefinedName("MOIS_EN", attr_text=f"{q('M2')}!$K$4:$K$15"))
-    s.conditional_formatting.add(f"C4:D{last}", FormulaRule(formula=['C4=""'], fill=fill("7f1d1d")))
+    ctx.wb.defined_names.add(DefinedName("I18N_KEY",attr_text=f"{q('M2')}!$B$4:$B${last}"))
+    ctx.wb.defined_names.add(DefinedName("I18N_FR", attr_text=f"{q('M2')}!$C$4:$C${last}"))
+    ctx.wb.defined_names.add(DefinedName("I18N_EN", attr_text=f"{q('M2')}!$D$4:$D${last}"))
+    ctx.wb.defined_names.add(DefinedName("MOIS_FR", attr_text=f"{q('M2')}!$J$4:$J$15"))
+    ctx.wb.defined_names.add(DefinedName("MOIS_EN", attr_text=f"{q('M2')}!$K$4:$K$15"))
+    ctx.cf.add(s,f"C4:D{last}", FormulaRule(formula=['C4=""'], fill=fill("7f1d1d")))
+    paint_bg(s,DARK_BG,1,12)
 
 # ================================================================ M0
-def build_m0():
-    s=ws["M0"]; s.sheet_properties.tabColor=AMBER; s.sheet_view.showGridLines=False
-    for r in range(1,60):
-        for c in range(1,14): s.cell(r,c).fill=fill(DARK_BG)
+def build_m0(ctx):
+    s=ctx.ws["M0"]; s.sheet_properties.tabColor=AMBER; s.sheet_view.showGridLines=False
     s["B1"]="M0 · PUPITRE DE PILOTAGE"; s["B1"].font=Font(name=UI,bold=True,size=16,color=AMBER)
     s["B2"]="Sélecteurs globaux — pilotent tout le classeur"; s["B2"].font=Font(name=UI,size=10,color=TXT_SEC_D)
     def sel(row,label,value,nf=None):
@@ -374,8 +417,8 @@ def build_m0():
         c.alignment=Alignment(horizontal="center"); c.border=box(AMBER)
         if nf: c.number_format=nf
         return c
-    sel(4,"🌐 Langue (LANG)","FR"); sel(5,"Granularité (GRAIN)","M")
-    sel(6,"Année (ANNEE)",2026); sel(7,"Mois (MOIS)",6)
+    sel(4,"🌐 Langue (LANG)","FR"); sel(5,"Granularité (GRAIN)",GRAIN0)
+    sel(6,"Année (ANNEE)",ANNEE0); sel(7,"Mois (MOIS)",MOIS0)
     s.cell(8,2,"Période (PERIODE)").font=Font(name=UI,bold=True,color=TXT_LIGHT)
     pc=s.cell(8,4); pc.value="=DATE(ANNEE,MOIS,1)"; pc.number_format='yyyy-mm'
     pc.font=Font(name=MONO,bold=True,color=AMBER); pc.alignment=Alignment(horizontal="center")
@@ -396,7 +439,7 @@ def build_m0():
     for row,name,f in bounds:
         s.cell(row,2,name).font=Font(name=MONO,color=TXT_SEC_D)
         c=s.cell(row,4); c.value=f; c.number_format='yyyy-mm-dd'; c.font=Font(name=MONO,color=TXT_LIGHT)
-        wb.defined_names.add(DefinedName(name,attr_text=f"{q('M0')}!$D${row}"))
+        ctx.wb.defined_names.add(DefinedName(name,attr_text=f"{q('M0')}!$D${row}"))
     s.cell(20,2,"SUIVI DE SAISIE (mois courant)").font=Font(name=UI,bold=True,color=AMBER)
     for j,h in enumerate(["Département","Complétude %","État"]):
         c=s.cell(21,2+j,h); c.font=Font(name=UI,bold=True,color=DARK_BG); c.fill=fill(AMBER)
@@ -412,55 +455,96 @@ def build_m0():
     s.column_dimensions["B"].width=22; s.column_dimensions["C"].width=16; s.column_dimensions["D"].width=10
     s.column_dimensions["F"].width=14; s.column_dimensions["G"].width=22
     for n,cellref in (("LANG","$D$4"),("GRAIN","$D$5"),("ANNEE","$D$6"),("MOIS","$D$7"),("PERIODE","$D$8")):
-        wb.defined_names.add(DefinedName(n,attr_text=f"{q('M0')}!{cellref}"))
+        ctx.wb.defined_names.add(DefinedName(n,attr_text=f"{q('M0')}!{cellref}"))
+    paint_bg(s,DARK_BG,1,13)
+
+def build_panel(ctx,dep):
+    """Classeur département : sélecteurs M0 (mêmes cellules et noms) + contrôles de la collecte."""
+    s=ctx.ws["M0"]; s.sheet_properties.tabColor=AMBER; s.sheet_view.showGridLines=False
+    code=DEPT_COLLECTE[dep]; keys=DEPT_KEYS[dep]; last=collecte_last(dep)
+    s["B1"].value='="▌ "&'+Tx("msg.tracking")+'&" · "&'+Tx("dept."+dep); s["B1"].font=Font(name=UI,bold=True,size=14,color=AMBER)
+    for row,label,value in ((4,"🌐 Langue (LANG)","FR"),(6,"Année (ANNEE)",ANNEE0),(7,"Mois (MOIS)",MOIS0)):
+        s.cell(row,2,label).font=Font(name=UI,bold=True,color=TXT_LIGHT)
+        c=s.cell(row,4,value); c.fill=fill(DARK_INPUT); c.font=Font(name=MONO,bold=True,size=12,color=AMBER)
+        c.alignment=Alignment(horizontal="center"); c.border=box(AMBER)
+    s.cell(8,2,"Période (PERIODE)").font=Font(name=UI,bold=True,color=TXT_LIGHT)
+    pc=s.cell(8,4); pc.value="=DATE(ANNEE,MOIS,1)"; pc.number_format='yyyy-mm'
+    pc.font=Font(name=MONO,bold=True,color=AMBER); pc.alignment=Alignment(horizontal="center")
+    dv=DataValidation(type="list",formula1='"FR,EN"',allow_blank=False); s.add_data_validation(dv); dv.add("D4")
+    dvy=DataValidation(type="whole",operator="between",formula1=2024,formula2=2026); s.add_data_validation(dvy); dvy.add("D6")
+    dvm=DataValidation(type="whole",operator="between",formula1=1,formula2=12); s.add_data_validation(dvm); dvm.add("D7")
+    for n,cellref in (("LANG","$D$4"),("ANNEE","$D$6"),("MOIS","$D$7"),("PERIODE","$D$8")):
+        ctx.wb.defined_names.add(DefinedName(n,attr_text=f"{q('M0')}!{cellref}"))
+    g=f"{q(code)}!$D$8:$AM${last}"; col=f"INDEX({g},0,MATCH(PERIODE,{q(code)}!$D$6:$AM$6,0))"
+    for j,k in enumerate(keys):   # drapeaux par ligne de collecte (colonnes masquées J:K) : % / montant-volume additif
+        _,fr,en,u,agg,*_r=KMETA[k]
+        s.cell(8+j,10,int(is_pct(u))); s.cell(8+j,11,int(u in ("FCFA","nb","visites","ETP","m²","unité") and agg in ("SUM","LAST")))
+    s.column_dimensions["J"].hidden=True; s.column_dimensions["K"].hidden=True
+    pct=f"$J$8:$J${last}"; add=f"$K$8:$K${last}"
+    checks=[("Complétude (mois courant)",f"=IFERROR(COUNT({col})/ROWS({g}),0)",'0%',"C{r}>=1"),
+            ("Cellules à saisir (mois courant)",f"=IFERROR(ROWS({g})-COUNT({col}),ROWS({g}))",'0',"C{r}=0"),
+            ("Saisies non numériques",f"=SUMPRODUCT(--ISTEXT({g}))",'0',"C{r}=0"),
+            ("% saisis en points (> 1000 %)",f"=SUMPRODUCT(ISNUMBER({g})*(({g}>10)+({g}<-10))*{pct})",'0',"C{r}=0"),   # même seuil que harvest
+            ("Montants / volumes négatifs",f"=SUMPRODUCT(ISNUMBER({g})*({g}<0)*{add})",'0',"C{r}=0")]
+    s.cell(11,2,"CONTRÔLES DE SAISIE").font=Font(name=UI,bold=True,color=AMBER)
+    for r,(label,f,nf,ok) in enumerate(checks,12):
+        s.cell(r,2,label).font=Font(name=UI,color=TXT_LIGHT)
+        v=s.cell(r,3,f); v.number_format=nf; v.font=Font(name=MONO,color=TXT_LIGHT); v.alignment=Alignment(horizontal="center")
+        st=s.cell(r,4); st.value=f'=IF({ok.format(r=r)},"✓","✗")'
+        st.font=Font(name=UI,bold=True,color=TXT_LIGHT); st.alignment=Alignment(horizontal="center")
+    s.column_dimensions["B"].width=30; s.column_dimensions["C"].width=14; s.column_dimensions["D"].width=10
+    paint_bg(s,DARK_BG,1,8)
 
 # ================================================================ M1
-def build_m1():
-    s=ws["M1"]; s.sheet_properties.tabColor=AMBER; s.sheet_view.showGridLines=False
-    for r in range(1,len(KPIS)+40):
-        for c in range(1,24): s.cell(r,c).fill=fill(DARK_BG)
+def build_m1(ctx):
+    s=ctx.ws["M1"]; s.sheet_properties.tabColor=AMBER; s.sheet_view.showGridLines=False
     s["B1"]="M1 · PARAMÈTRES (RAG · budget · listes)"; s["B1"].font=Font(name=UI,bold=True,size=14,color=AMBER)
     s.cell(3,2,"tbl_param_rag — seuils paramétrables").font=Font(name=UI,bold=True,color=AMBER)
     for j,h in enumerate(["KEY","SENS","SEUIL_VERT","SEUIL_AMBRE"]):
         c=s.cell(4,2+j,h); c.font=Font(name=UI,bold=True,color=DARK_BG); c.fill=fill(AMBER)
     r=5; rag_first=r
     for key,fr,en,u,agg,dep,h2,b,base in KPIS:
-        sens="DOWN" if kmetric(key) in DOWN else "UP"
-        sv,sa=(1.0,0.95) if sens=="UP" else (1.0,1.05)
+        sens,sv,sa=rag_params(key)
         s.cell(r,2,key).font=Font(name=MONO,size=9,color=TXT_SEC_D)
         s.cell(r,3,sens).font=Font(name=MONO,color=TXT_LIGHT)
         s.cell(r,4,sv).number_format='0.00'; s.cell(r,4).font=Font(name=MONO,color=TXT_LIGHT)
         s.cell(r,5,sa).number_format='0.00'; s.cell(r,5).font=Font(name=MONO,color=TXT_LIGHT); r+=1
     rag_last=r-1
-    wb.defined_names.add(DefinedName("RAG_KEY",attr_text=f"{q('M1')}!$B${rag_first}:$B${rag_last}"))
-    wb.defined_names.add(DefinedName("RAG_SENS",attr_text=f"{q('M1')}!$C${rag_first}:$C${rag_last}"))
-    wb.defined_names.add(DefinedName("RAG_SV",attr_text=f"{q('M1')}!$D${rag_first}:$D${rag_last}"))
-    wb.defined_names.add(DefinedName("RAG_SA",attr_text=f"{q('M1')}!$E${rag_first}:$E${rag_last}"))
-    bc0=8
+    ctx.wb.defined_names.add(DefinedName("RAG_KEY",attr_text=f"{q('M1')}!$B${rag_first}:$B${rag_last}"))
+    ctx.wb.defined_names.add(DefinedName("RAG_SENS",attr_text=f"{q('M1')}!$C${rag_first}:$C${rag_last}"))
+    ctx.wb.defined_names.add(DefinedName("RAG_SV",attr_text=f"{q('M1')}!$D${rag_first}:$D${rag_last}"))
+    ctx.wb.defined_names.add(DefinedName("RAG_SA",attr_text=f"{q('M1')}!$E${rag_first}:$E${rag_last}"))
+    bc0=BUD[0]
     s.cell(3,bc0,"tbl_param_budget — budget mensuel (KPI × 12 mois)").font=Font(name=UI,bold=True,color=AMBER)
     s.cell(4,bc0-1,"KEY").font=Font(name=UI,bold=True,color=DARK_BG); s.cell(4,bc0-1).fill=fill(AMBER)
     for m in range(12):
         c=s.cell(4,bc0+m,m+1); c.font=Font(name=UI,bold=True,color=DARK_BG); c.fill=fill(AMBER); c.alignment=Alignment(horizontal="center")
-    r=5; bud_first=r; bud_rows={}
+    r=BUD[1]
     for key,fr,en,u,agg,dep,h2,b,base in KPIS:
         s.cell(r,bc0-1,key).font=Font(name=MONO,size=9,color=TXT_SEC_D)
-        if b:
-            for m in range(12):
-                tgt=base*(1.0+0.01*m if agg=="SUM" else 1.0)
-                val=round(tgt,4) if is_pct(u) else int(round(tgt))
-                cc=s.cell(r,bc0+m,val); cc.font=Font(name=MONO,size=9,color=TXT_LIGHT)
-                cc.number_format=F_PCT if is_pct(u) else '#,##0'
-            bud_rows[key]=r
+        for m,val in enumerate(budget_plan(key) or ()):
+            cc=s.cell(r,bc0+m,val); cc.font=Font(name=MONO,size=9,color=TXT_LIGHT)
+            cc.number_format=F_PCT if is_pct(u) else '#,##0'
         r+=1
-    bud_last=r-1
-    wb.defined_names.add(DefinedName("BUD_MONTHS",attr_text=f"{q('M1')}!${get_column_letter(bc0)}$4:${get_column_letter(bc0+11)}$4"))
-    build_m1.bud=(bc0,bud_first,bud_last,bud_rows)
+    ctx.wb.defined_names.add(DefinedName("BUD_MONTHS",attr_text=f"{q('M1')}!${get_column_letter(bc0)}$4:${get_column_letter(bc0+11)}$4"))
     s.cell(len(KPIS)+8,2,"tbl_param_locataires (extrait)").font=Font(name=UI,bold=True,color=AMBER)
     s.column_dimensions["B"].width=22
+    paint_bg(s,DARK_BG,1,23)
+
+def rag_params(key):
+    """(sens, seuil vert, seuil ambre) d'un KPI, tels qu'écrits dans tbl_param_rag (M1) ; seuils sur réalisé / référence."""
+    sens="DOWN" if kmetric(key) in DOWN else "UP"
+    return (sens,1.0,0.95) if sens=="UP" else (sens,1.0,1.05)
+
+def budget_plan(key):
+    """Budget mensuel (12 mois) d'un KPI budgété, tel qu'écrit dans tbl_param_budget (M1) ; None sinon."""
+    _,fr,en,u,agg,dep,h2,b,base=KMETA[key]
+    if not b: return None
+    return [round(t,4) if is_pct(u) else int(round(t)) for t in (base*(1.0+0.01*m if agg=="SUM" else 1.0) for m in range(12))]
 
 # ================================================================ M3
-def build_m3():
-    s=ws["M3"]; s.sheet_properties.tabColor=AMBER; s.sheet_view.showGridLines=False
+def build_m3(ctx,data):
+    s=ctx.ws["M3"]; s.sheet_properties.tabColor=AMBER; s.sheet_view.showGridLines=False
     s["B1"]="M3 · BASE MENSUELLE — consolidation (réf. collectes : saisie unique)"
     s["B1"].font=Font(name=UI,bold=True,size=12,color=AMBER)
     s.cell(3,2,"Clé KPI").font=Font(name=UI,bold=True,color=DARK_BG); s.cell(3,2).fill=fill(AMBER)
@@ -469,10 +553,10 @@ def build_m3():
         y=2024+i//12; m=i%12+1
         c=s.cell(3,BASE_FIRST_COL+i); c.value=f"=DATE({y},{m},1)"; c.number_format='yyyy-mm'
         c.font=Font(name=MONO,size=8,color=DARK_BG); c.fill=fill(AMBER); c.alignment=Alignment(horizontal="center")
-    rowmap={}; r=4
+    r=4
     for key,fr,en,u,agg,dep,h2,b,base in KPIS:
         s.cell(r,2,key).font=Font(name=MONO,size=8,color=TXT_SEC_D)
-        s.cell(r,3,agg).font=Font(name=MONO,size=8,color=TXT_SEC_D); rowmap[key]=r
+        s.cell(r,3,agg).font=Font(name=MONO,size=8,color=TXT_SEC_D)
         for i in range(N_MONTHS):
             cell=s.cell(r,BASE_FIRST_COL+i)
             cell.number_format=F_PCT if is_pct(u) else '#,##0'; cell.font=Font(name=MONO,size=8,color=TXT_LIGHT)
@@ -480,13 +564,27 @@ def build_m3():
         r+=1
     s.column_dimensions["B"].width=24
     a=get_column_letter(BASE_FIRST_COL); z=get_column_letter(BASE_FIRST_COL+N_MONTHS-1)
-    wb.defined_names.add(DefinedName("HDR",attr_text=f"{q('M3')}!${a}$3:${z}$3"))
-    build_m3.rowmap=rowmap
+    ctx.wb.defined_names.add(DefinedName("HDR",attr_text=f"{q('M3')}!${a}$3:${z}$3"))
+    import forecast   # atterrissage fin d'année au mois de chaque colonne : valeurs précalculées, lues par landing_f
+    s.cell(2,LAND_COL,"Atterrissage fin d'année (au mois de la colonne) — forecast.py").font=Font(name=UI,bold=True,size=9,color=AMBER)
+    for i in range(N_MONTHS):
+        c=s.cell(3,LAND_COL+i); c.value=f"=DATE({2024+i//12},{i%12+1},1)"; c.number_format='yyyy-mm'
+        c.font=Font(name=MONO,size=8,color=DARK_BG); c.fill=fill(AMBER); c.alignment=Alignment(horizontal="center")
+    for key,vals in forecast.landing(data).items():
+        for i,v in enumerate(vals):
+            c=s.cell(M3_ROW[key],LAND_COL+i,v); c.number_format=F_PCT if is_pct(KMETA[key][3]) else '#,##0'
+            c.font=Font(name=MONO,size=8,color=TXT_LIGHT)
 
 def m3_row_range(key):
-    r=build_m3.rowmap[key]; a=get_column_letter(BASE_FIRST_COL); z=get_column_letter(BASE_FIRST_COL+N_MONTHS-1)
+    r=M3_ROW[key]; a=get_column_letter(BASE_FIRST_COL); z=get_column_letter(BASE_FIRST_COL+N_MONTHS-1)
     return f"{q('M3')}!${a}${r}:${z}${r}"
 
+def landing_f(key,sc=""):
+    """Atterrissage fin d'année vu de P_END : lecture du bloc précalculé de M3 (aucun TREND / FORECAST par cellule)."""
+    r=M3_ROW[key]; a=get_column_letter(LAND_COL); z=get_column_letter(LAND_COL+N_MONTHS-1)
+    x=f"INDEX({q('M3')}!${a}${r}:${z}${r},MATCH(P_END,HDR,0))"
+    return f'=IFERROR(IF(ISNUMBER({x}),{x}{sc},""),"")'
+
 # ================================================================ temporal formulas
 def pval(rng,d1,d2,agg):
     if agg=="SUM": return f'SUMIFS({rng},HDR,">="&{d1},HDR,"<="&{d2})'
@@ -497,19 +595,21 @@ def prev_f(key,agg,sc=""): return f'=IFERROR(({pval(m3_row_range(key),"PP_START"
 def py_f(key,agg,sc=""): return f'=IFERROR(({pval(m3_row_range(key),"PY_START","PY_END",agg)}){sc},"")'
 def scfor(u): return "/1000000" if u=="FCFA" else ""
 def budget_f(key,agg,sc=""):
-    bc0,bf,bl,brows=build_m1.bud
+    bc0,bf,bl,brows=BUD
     if key not in brows: return None
     br=brows[key]; a=get_column_letter(bc0); z=get_column_letter(bc0+11)
     rng=f"{q('M1')}!${a}${br}:${z}${br}"; mask='(BUD_MONTHS>=MONTH(P_START))*(BUD_MONTHS<=MONTH(P_END))'
     if agg=="SUM": return f'=IFERROR((SUMPRODUCT({mask}*{rng})){sc},"")'
     return f'=IFERROR((SUMPRODUCT({mask}*{rng})/SUMPRODUCT({mask}*1)){sc},"")'
+def budget_fy(key,agg):
+    """Budget de l'année entière (expression, sans échelle) : total ou moyenne des 12 mois de M1, comme budget_f en grain Y."""
+    bc0,bf,bl,brows=BUD; br=brows[key]
+    return f"SUM({q('M1')}!${get_column_letter(bc0)}${br}:${get_column_letter(bc0+11)}${br})"+("" if agg=="SUM" else "/12")
 
 # ================================================================ collecte (generic, all depts)
-def build_collecte(code,dept):
-    s=ws[code]; s.sheet_properties.tabColor="334155"; s.sheet_view.showGridLines=False
+def build_collecte(ctx,code,dept,data):
+    s=ctx.ws[code]; s.sheet_properties.tabColor="334155"; s.sheet_view.showGridLines=False
     keys=DEPT_KEYS[dept]; ncols=BASE_FIRST_COL+N_MONTHS
-    for r in range(1,8+2*len(keys)+6):
-        for c in range(2,ncols+1): s.cell(r,c).fill=fill(DARK_BG)
     s.cell(1,3).value='="▌ "&'+Tx("msg.collect")+'&" · "&'+Tx("dept."+dept)
     s.cell(1,3).font=Font(name=UI,bold=True,size=14,color=AMBER)
     s.cell(2,3).value='='+Tx("msg.help"); s.cell(2,3).font=Font(name=UI,size=9,italic=True,color=TXT_SEC_D)
@@ -522,11 +622,7 @@ def build_collecte(code,dept):
     for key in keys:
         _,fr,en,u,agg,dep,h2,b,base=KMETA[key]
         s.cell(r,3).value=T(key); s.cell(r,3).font=Font(name=UI,color=TXT_LIGHT,size=9)
-        for i in range(N_MONTHS):
-            val=base*(1.0+random.uniform(-0.05,0.15)*(i/(N_MONTHS-1))+random.uniform(-0.02,0.02))
-            if is_pct(u): val=round(max(0,min(1.3,val)),4)
-            elif u in("h","ans","TF","TG","min","kWh/m²","v/m²","score","mois") or agg=="RATIO": val=round(val,2)
-            else: val=int(round(val))
+        for i,val in enumerate(data[key]):
             cell=s.cell(r,BASE_FIRST_COL+i,val); cell.fill=fill(DARK_INPUT)
             cell.font=Font(name=MONO,size=8,color=AMBER); cell.number_format=F_PCT if is_pct(u) else '#,##0'
             cell.protection=Protection(locked=False)
@@ -536,26 +632,24 @@ def build_collecte(code,dept):
     cr=last+3
     for key in keys:
         s.cell(cr,3).value=T(key); s.cell(cr,3).font=Font(name=UI,size=8,color=TXT_SEC_D)
+        com=ctx.comments.get(key,{})
         for i in range(N_MONTHS):
-            cc=s.cell(cr,BASE_FIRST_COL+i); cc.fill=fill(DARK_PANEL)
+            cc=s.cell(cr,BASE_FIRST_COL+i,com.get("%d-%02d"%(2024+i//12,i%12+1))); cc.fill=fill(DARK_PANEL)
             cc.protection=Protection(locked=False); cc.font=Font(name=UI,size=8,color=TXT_LIGHT)
         cr+=1
     s.column_dimensions["C"].width=26
     for i in range(N_MONTHS): s.column_dimensions[get_column_letter(BASE_FIRST_COL+i)].width=9
     s.freeze_panes="D8"
     a=get_column_letter(BASE_FIRST_COL); z=get_column_letter(BASE_FIRST_COL+N_MONTHS-1)
-    s.conditional_formatting.add(f"{a}6:{z}6", FormulaRule(formula=[f'{a}$6=PERIODE'], fill=fill(AMBER)))
-    s.conditional_formatting.add(f"{a}8:{z}{last}", FormulaRule(formula=[f'AND({a}$6=PERIODE,ISBLANK({a}8))'], fill=fill("7f1d1d")))
+    ctx.cf.add(s,f"{a}6:{z}6", FormulaRule(formula=[f'{a}$6=PERIODE'], fill=fill(AMBER)))
+    ctx.cf.add(s,f"{a}8:{z}{last}", FormulaRule(formula=[f'AND({a}$6=PERIODE,ISBLANK({a}8))'], fill=fill("7f1d1d")))
     s.protection.sheet=True; s.protection.password="cosmos"; s.protection.formatCells=False
+    paint_bg(s,DARK_BG,2,ncols)
 
 # ================================================================ SINGLE-SHEET REPORT
-ANCHORS={}; TOC_LINKS=[]; PANELS=[]; HELP_COL=19  # helper chart data in cols S..AD (off print)
+HELP_COL=19  # helper chart data in cols S..AD (off print)
 def panelize_white(s,r0,r1):
-    tint="FF"+PAGE_TINT; bc=CARD_BORDER
-    for r in range(r0,r1+1):
-        for c in range(3,15):
-            cl=s.cell(r,c)
-            if cl.fill.fgColor.rgb in (tint,None,"00000000"): cl.fill=fill(WHITE)
+    bc=CARD_BORDER
     for c in range(3,15):
         t=s.cell(r0,c); t.border=Border(top=side(bc),left=(side(bc) if c==3 else t.border.left),right=(side(bc) if c==14 else t.border.right),bottom=t.border.bottom)
         b=s.cell(r1,c); b.border=Border(bottom=side(bc),left=(side(bc) if c==3 else None),right=(side(bc) if c==14 else None))
@@ -590,9 +684,10 @@ def write_kpi_row(s,rr,key):
     rag=s.cell(rr,12)
     rag.value=f'=IF(O{rr}="","",IF(O{rr}="green",{Tx("rag.green")},IF(O{rr}="amber",{Tx("rag.amber")},{Tx("rag.red")})))'
     rag.alignment=Alignment(horizontal="center"); rag.font=Font(name=UI,bold=True,size=9)
-    for cc in (cur,prv,py,bud,var,dpv,dpy): cc.font=Font(name=MONO,size=9,color=TXT_PRIM)
+    land=s.cell(rr,13); land.value=landing_f(key,sc); land.number_format=nf
+    for cc in (cur,prv,py,bud,var,dpv,dpy,land): cc.font=Font(name=MONO,size=9,color=TXT_PRIM)
 
-def render_cards(s,row,keys):
+def render_cards(ctx,s,row,keys):
     keys=keys[:4]; slots=[3,9]   # two hero cards per row, each spanning 6 cols (C:H, I:N)
     for j,key in enumerate(keys):
         _,fr,en,u,agg,dep,h2,b,base=KMETA[key]
@@ -607,8 +702,8 @@ def render_cards(s,row,keys):
         d=s.cell(base_r+3,col); d.value='=IFERROR(('+cur_f(key,agg)[1:]+')/('+prev_f(key,agg)[1:]+')-1,"")'
         d.number_format=F_DELTA; d.font=Font(name=UI,bold=True,size=10,color=TXT_SEC); d.fill=fill(CARD); d.alignment=Alignment(horizontal="left")
         cl=get_column_letter(col)
-        s.conditional_formatting.add(f"{cl}{base_r+3}", FormulaRule(formula=[f'{cl}{base_r+3}>0'], fill=fill(G_BG), font=Font(name=UI,bold=True,size=10,color=G_TXT)))
-        s.conditional_formatting.add(f"{cl}{base_r+3}", FormulaRule(formula=[f'{cl}{base_r+3}<0'], fill=fill(R_BG), font=Font(name=UI,bold=True,size=10,color=R_TXT)))
+        ctx.cf.add(s,f"{cl}{base_r+3}", FormulaRule(formula=[f'{cl}{base_r+3}>0'], fill=fill(G_BG), font=Font(name=UI,bold=True,size=10,color=G_TXT)))
+        ctx.cf.add(s,f"{cl}{base_r+3}", FormulaRule(formula=[f'{cl}{base_r+3}<0'], fill=fill(R_BG), font=Font(name=UI,bold=True,size=10,color=R_TXT)))
         for rr in (base_r+1,base_r+2,base_r+3):
             s.merge_cells(start_row=rr,start_column=col,end_row=rr,end_column=cend)
         for rr in range(base_r,base_r+4):
@@ -619,17 +714,17 @@ def render_cards(s,row,keys):
         s.row_dimensions[base_r+1].height=18; s.row_dimensions[base_r+2].height=42; s.row_dimensions[base_r+3].height=20
     return row+((len(keys)+1)//2)*5+1
 
-def add_chart(s,key,anchor_row,helper_row):
+def add_chart(ctx,s,key,anchor_row,helper_row):
     u=KMETA[key][3]; rng=m3_row_range(key); HS=HELP_COL
     lbl=helper_row; v1=helper_row+1
     for k in range(12):
         col=HS+k; idx=f'(MATCH(P_END,HDR,0)-11+{k})'
-        CALC.cell(lbl,col).value=f'=IFERROR(IF({idx}<1,"",TEXT(INDEX(HDR,{idx}),"mmm yy")),"")'
-        c1=CALC.cell(v1,col); c1.value=f'=IFERROR(IF({idx}<1,NA(),INDEX({rng},{idx})),NA())'
+        ctx.calc.cell(lbl,col).value=f'=IFERROR(IF({idx}<1,"",TEXT(INDEX(HDR,{idx}),"mmm yy")),"")'
+        c1=ctx.calc.cell(v1,col); c1.value=f'=IFERROR(IF({idx}<1,NA(),INDEX({rng},{idx})),NA())'
         c1.number_format=F_PCT if u=="%" else '#,##0'
-    cats=Reference(CALC,min_col=HS,max_col=HS+11,min_row=lbl,max_row=lbl)
+    cats=Reference(ctx.calc,min_col=HS,max_col=HS+11,min_row=lbl,max_row=lbl)
     ch=LineChart(); ch.height=5.4; ch.width=24; ch.legend=None; ch.style=2
-    ch.add_data(Reference(CALC,min_col=HS,max_col=HS+11,min_row=v1,max_row=v1),from_rows=True); ch.set_categories(cats)
+    ch.add_data(Reference(ctx.calc,min_col=HS,max_col=HS+11,min_row=v1,max_row=v1),from_rows=True); ch.set_categories(cats)
     try:
         ser=ch.series[0]; ser.graphicalProperties.line.solidFill=SUCCESS
         ser.graphicalProperties.line.width=26000; ser.smooth=True
@@ -679,15 +774,14 @@ def _comment_box(s,row,body_formula,editable=False):
         s.cell(row+2,cc).border=Border(left=side(CARD_BORDER),right=side(CARD_BORDER),bottom=side(CARD_BORDER))
     return row+4
 
-_GH=[1]   # gauge helper-row cursor (col GAUGE_COL, off print)
 GAUGE_COL=33
-def add_gauge(s,key,anchor_col,anchor_row):
-    agg=KMETA[key][4]; hr=_GH[0]; _GH[0]+=3; HG=GAUGE_COL
+def add_gauge(ctx,s,key,anchor_col,anchor_row):
+    agg=KMETA[key][4]; hr=ctx.gh; ctx.gh+=3; HG=GAUGE_COL
     gvref=f"{q('M5')}!{get_column_letter(HG)}{hr}"
-    CALC.cell(hr,HG).value=cur_f(key,agg)
-    CALC.cell(hr+1,HG).value=f'=MAX(0,1-{gvref})'
+    ctx.calc.cell(hr,HG).value=cur_f(key,agg)
+    ctx.calc.cell(hr+1,HG).value=f'=MAX(0,1-{gvref})'
     ch=DoughnutChart(); ch.holeSize=72; ch.height=4.0; ch.width=4.4; ch.legend=None
-    ch.add_data(Reference(CALC,min_col=HG,max_col=HG,min_row=hr,max_row=hr+1),titles_from_data=False)
+    ch.add_data(Reference(ctx.calc,min_col=HG,max_col=HG,min_row=hr,max_row=hr+1),titles_from_data=False)
     ch.series[0].data_points=[DataPoint(idx=0,spPr=GraphicalProperties(solidFill=SUCCESS)),
                               DataPoint(idx=1,spPr=GraphicalProperties(solidFill="E0E9E5"))]
     lab=s.cell(anchor_row,anchor_col); lab.value=T(key); lab.font=Font(name=UI,size=9,bold=True,color=TXT_SEC)
@@ -696,40 +790,106 @@ def add_gauge(s,key,anchor_col,anchor_row):
     cap.font=Font(name=MONO,bold=True,size=14,color=PRIMARY); cap.alignment=Alignment(horizontal="center")
     s.merge_cells(start_row=anchor_row+8,start_column=anchor_col,end_row=anchor_row+8,end_column=anchor_col+2)
 
-_CH=[300]   # combo helper-row cursor (HELP_COL region, off print)
-def add_combo(s,key,anchor_row):
+CH0=300   # 1re ligne d'aide des combos (zone HELP_COL, hors impression) ; curseur : Build.ch
+def add_combo(ctx,s,key,anchor_row):
     agg=KMETA[key][4]; mrow=m3_row_range(key)
-    bc0,bf,bl,brows=build_m1.bud; br=brows.get(key)
+    bc0,bf,bl,brows=BUD; br=brows.get(key)
     a=get_column_letter(bc0); z=get_column_letter(bc0+11)
     budrng=f"{q('M1')}!${a}${br}:${z}${br}" if br else None
-    HS=HELP_COL; _CH[0]+=4; lbl=_CH[0]; act=lbl+1; bud=lbl+2
+    HS=HELP_COL; ctx.ch+=4; lbl=ctx.ch; act=lbl+1; bud=lbl+2
     for k in range(12):
         col=HS+k; idx=f'(MATCH(P_END,HDR,0)-11+{k})'
-        CALC.cell(lbl,col).value=f'=IFERROR(IF({idx}<1,"",TEXT(INDEX(HDR,{idx}),"mmm yy")),"")'
-        CALC.cell(act,col).value=f'=IFERROR(IF({idx}<1,NA(),INDEX({mrow},{idx})),NA())'
-        CALC.cell(bud,col).value=(f'=IFERROR(IF({idx}<1,NA(),INDEX({budrng},MONTH(INDEX(HDR,{idx})))),NA())' if budrng else "=NA()")
-    cats=Reference(CALC,min_col=HS,max_col=HS+11,min_row=lbl,max_row=lbl)
+        ctx.calc.cell(lbl,col).value=f'=IFERROR(IF({idx}<1,"",TEXT(INDEX(HDR,{idx}),"mmm yy")),"")'
+        ctx.calc.cell(act,col).value=f'=IFERROR(IF({idx}<1,NA(),INDEX({mrow},{idx})),NA())'
+        ctx.calc.cell(bud,col).value=(f'=IFERROR(IF({idx}<1,NA(),INDEX({budrng},MONTH(INDEX(HDR,{idx})))),NA())' if budrng else "=NA()")
+    cats=Reference(ctx.calc,min_col=HS,max_col=HS+11,min_row=lbl,max_row=lbl)
     bar=BarChart(); bar.type="col"; bar.height=5.6; bar.width=24; bar.legend=None
-    bar.add_data(Reference(CALC,min_col=HS,max_col=HS+11,min_row=act,max_row=act),from_rows=True); bar.set_categories(cats)
+    bar.add_data(Reference(ctx.calc,min_col=HS,max_col=HS+11,min_row=act,max_row=act),from_rows=True); bar.set_categories(cats)
     try: bar.series[0].graphicalProperties.solidFill=PRIMARY_XL
     except Exception: pass
-    ln=LineChart(); ln.add_data(Reference(CALC,min_col=HS,max_col=HS+11,min_row=bud,max_row=bud),from_rows=True)
+    ln=LineChart(); ln.add_data(Reference(ctx.calc,min_col=HS,max_col=HS+11,min_row=bud,max_row=bud),from_rows=True)
     try:
         ln.series[0].graphicalProperties.line.solidFill=WARNING; ln.series[0].graphicalProperties.line.width=28000; ln.series[0].smooth=True
     except Exception: pass
     bar += ln
     chart_white(bar); s.add_chart(bar,f"C{anchor_row}")
 
-def render_budget(s,row,num,fr,en,dept):
+# ---------------------------------------------------------------- movers (M5) : Δ de tous les KPI en un bloc
+MOV_COL=36; MOV_ROW=3   # bloc movers en M5 (AJ.., hors zones graphiques) ; 1re ligne KPI
+MOV_TOP=5   # meilleurs / pires Δ% préc. de la synthèse
+MV=dict(key=0,cur=1,prev=2,py=3,bud=4,dprev=5,dpy=6,dbud=7,score=8,dept=9,
+        sbv=10,sbk=11,swv=12,swk=13,dbv=14,dbk=15,dwv=16,dwk=17)   # décalages de colonnes ; s* section, d* département
+
+def movers_layout():
+    """Lignes du bloc : par département, ses sections KPI dans l'ordre du rapport puis ses KPI hors section.
+    Renvoie ([(dép., n° section ou None, clé, 1re occurrence ?)], {n° section: dernière ligne}, {dép.: dernière ligne})."""
+    rows=[]; sec={}; dep={}; seen=set()   # un KPI peut figurer dans plusieurs sections (et départements) : un seul score
+    for d,title,subs in DEPTS:
+        for num,fr,en,typ,payload in SECTIONS.get(d,[]):
+            if typ!="kpi": continue
+            for k in payload: rows.append((d,num,k,k not in seen)); seen.add(k)
+            sec[num]=MOV_ROW+len(rows)-1
+        rows+=[(d,None,k,True) for k in DEPT_KEYS[d] if k not in seen]; seen.update(DEPT_KEYS[d])
+        dep[d]=MOV_ROW+len(rows)-1
+    return rows,sec,dep
+
+def mref(row,col,sheet=True):
+    """Adresse d'une cellule du bloc movers (colonne par nom, cf. MV)."""
+    a=f"${get_column_letter(MOV_COL+MV[col])}${row}"
+    return f"{q('M5')}!{a}" if sheet else a
+
+def Tr(ref):
+    """Libellé i18n d'une clé lue dans une cellule (T() pour une clé littérale)."""
+    return (f'IFERROR(IF(LANG="EN",INDEX(I18N_EN,MATCH({ref},I18N_KEY,0)),INDEX(I18N_FR,MATCH({ref},I18N_KEY,0))),{ref})')
+
+def build_movers(ctx):
+    """Bloc movers en M5 : courant / préc. / N-1 / budget et Δ de chaque KPI, puis meilleur et pire Δ% préc. par section
+    et par département en balayage cumulatif (chaque ligne ne lit que la précédente : aucune recherche MAX/MATCH par section).
+    Le top / flop global (MOV_TOP) est rangé une fois par LARGE / SMALL sur une colonne de scores sans ex aequo."""
+    s=ctx.calc; rows,sec,dep=movers_layout()
+    for name,o in MV.items(): s.cell(MOV_ROW-1,MOV_COL+o,name).font=Font(name=MONO,size=8,bold=True)
+    a=lambda col,r:mref(r,col,False)
+    def scan(r,first,v,k,op):   # meilleur (op ">") ou pire ("<") cumulé du groupe
+        x=a("dprev",r); key=a("key",r)
+        if first:
+            s.cell(r,MOV_COL+MV[v]).value=f'=IF(ISNUMBER({x}),{x},"")'; s.cell(r,MOV_COL+MV[k]).value=f'=IF(ISNUMBER({x}),{key},"")'; return
+        pv,pk=a(v,r-1),a(k,r-1)
+        s.cell(r,MOV_COL+MV[v]).value=f'=IF(ISNUMBER({x}),IF(ISNUMBER({pv}),IF({x}{op}{pv},{x},{pv}),{x}),{pv})'
+        s.cell(r,MOV_COL+MV[k]).value=f'=IF(ISNUMBER({x}),IF(ISNUMBER({pv}),IF({x}{op}{pv},{key},{pk}),{key}),{pk})'
+    prev=(None,None)
+    for i,(d,num,key,first) in enumerate(rows):
+        r=MOV_ROW+i; agg=KMETA[key][4]; c=lambda col:s.cell(r,MOV_COL+MV[col])
+        c("key").value=key; c("dept").value="dept."+KMETA[key][5]
+        c("cur").value=cur_f(key,agg); c("prev").value=prev_f(key,agg); c("py").value=py_f(key,agg); c("bud").value=budget_f(key,agg)
+        for col,ref in (("dprev","prev"),("dpy","py"),("dbud","bud")):
+            c(col).value=f'=IFERROR(({a("cur",r)})/({a(ref,r)})-1,"")'
+        if first: c("score").value=f'=IF(ISNUMBER({a("dprev",r)}),{a("dprev",r)}+ROW()/1000000000000,"")'   # ex aequo départagés
+        if num is not None:
+            for v,k,op in (("sbv","sbk",">"),("swv","swk","<")): scan(r,prev[1]!=(d,num),v,k,op)
+        for v,k,op in (("dbv","dbk",">"),("dwv","dwk","<")): scan(r,prev[0]!=d,v,k,op)
+        prev=(d,(d,num))
+    last=MOV_ROW+len(rows)-1; sc=f"{a('score',MOV_ROW)}:{a('score',last)}"
+    for j in range(MOV_TOP):   # ligne (index dans le bloc) du j-ème meilleur / pire
+        for o,fn in ((0,"LARGE"),(1,"SMALL")):
+            s.cell(last+2+j,MOV_COL+o).value=f'=IFERROR(MATCH({fn}({sc},{j+1}),{sc},0),"")'
+    return rows,sec,dep
+
+def mover_pick(last,j,o,col):
+    """Cellule col du j-ème meilleur (o=0) / pire (o=1) KPI du top global."""
+    ix=f"{q('M5')}!${get_column_letter(MOV_COL+o)}${last+2+j}"
+    c=get_column_letter(MOV_COL+MV[col])
+    return f"INDEX({q('M5')}!${c}${MOV_ROW}:${c}${last},{ix})"
+
+def render_budget(ctx,s,row,num,fr,en,dept):
     row=_banner(s,row,num,fr,en,icon="🎯")
     bkeys=[k for k in DEPT_KEYS[dept] if KMETA[k][7]]
     lead=bkeys[0] if bkeys else DEPT_KEYS[dept][0]
     s.cell(row,3).value='="▌ "&IF(LANG="EN","Actual vs Budget — 12 months","Réalisé vs Budget — 12 mois")'
     s.cell(row,3).font=Font(name=UI,bold=True,size=10,color=PRIMARY); row+=1
-    add_combo(s,lead,row); row+=12
+    add_combo(ctx,s,lead,row); row+=12
     if not bkeys: return _comment_box(s,row,'=IF(LANG="EN","No budget data.","Pas de budget.")',editable=True)
     hr=row
-    for j,h in enumerate(["col.kpi","col.unit","col.current","col.budget","col.var","col.rag"]):
+    for j,h in enumerate(["col.kpi","col.unit","col.current","col.budget","col.var","col.rag","col.landing","col.var_fy"]):
         c=s.cell(hr,3+j); c.value=T(h); c.font=Font(name=UI,bold=True,size=9,color=WHITE); c.fill=fill(PRIMARY); c.alignment=Alignment(horizontal="center",wrap_text=True)
     rr=hr+1
     for key in bkeys:
@@ -745,36 +905,39 @@ def render_budget(s,row,num,fr,en,dept):
         tok=s.cell(rr,16); tok.value=(f'=IFERROR(IF(F{rr}=0,"",IF({sens}="UP",IF({rx}>={sv},"green",IF({rx}>={sa},"amber","red")),'
                    f'IF({rx}<={sv},"green",IF({rx}<={sa},"amber","red")))),"")'); tok.font=Font(color=WHITE,size=8)
         rag=s.cell(rr,8); rag.value=f'=IF(P{rr}="","",IF(P{rr}="green",{Tx("rag.green")},IF(P{rr}="amber",{Tx("rag.amber")},{Tx("rag.red")})))'
-        rag.alignment=Alignment(horizontal="center"); rag.font=Font(name=UI,bold=True,size=9); rr+=1
+        rag.alignment=Alignment(horizontal="center"); rag.font=Font(name=UI,bold=True,size=9)
+        land=s.cell(rr,9); land.value=landing_f(key,sc); land.number_format=nf; land.font=Font(name=MONO,size=9,color=TXT_PRIM)
+        fy=s.cell(rr,10); fy.value=f'=IFERROR((I{rr})/({budget_fy(key,agg)}{sc})-1,"")'; fy.number_format=F_DELTA; fy.font=Font(name=MONO,size=9); rr+=1
     bot=rr-1
-    s.conditional_formatting.add(f"C{hr+1}:H{bot}", FormulaRule(formula=['MOD(ROW(),2)=0'], fill=fill(BAND)))
+    ctx.cf.add(s,f"C{hr+1}:J{bot}", FormulaRule(formula=['MOD(ROW(),2)=0'], fill=fill(BAND)))
     for st,bg,tx in (("green",G_BG,G_TXT),("amber",A_BG,A_TXT),("red",R_BG,R_TXT)):
-        s.conditional_formatting.add(f"H{hr+1}:H{bot}", FormulaRule(formula=[f'$P{hr+1}="{st}"'], fill=fill(bg), font=Font(color=tx,bold=True)))
+        ctx.cf.add(s,f"H{hr+1}:H{bot}", FormulaRule(formula=[f'$P{hr+1}="{st}"'], fill=fill(bg), font=Font(color=tx,bold=True)))
     return _comment_box(s,bot+1,'=IF(LANG="EN","Budget variance commentary.","Commentaire écart budgétaire.")',editable=True)
 
-def render_kpi_section(s,row,num,fr,en,keys):
+def render_kpi_section(ctx,s,row,num,fr,en,keys):
     row=_banner(s,row,num,fr,en); hr=row
-    for j,h in enumerate(["col.kpi","col.unit","col.current","col.prev","col.delta_prev","col.py","col.delta_py","col.budget","col.var","col.rag"]):
+    for j,h in enumerate(["col.kpi","col.unit","col.current","col.prev","col.delta_prev","col.py","col.delta_py","col.budget","col.var","col.rag","col.landing"]):
         c=s.cell(hr,3+j); c.value=T(h); c.font=Font(name=UI,bold=True,size=9,color=WHITE)
         c.fill=fill(PRIMARY); c.alignment=Alignment(horizontal="center",wrap_text=True)
     rr=hr+1
     for key in keys: write_kpi_row(s,rr,key); rr+=1
     bot=rr-1
-    s.conditional_formatting.add(f"C{hr+1}:L{bot}", FormulaRule(formula=['MOD(ROW(),2)=0'], fill=fill(BAND)))
+    ctx.cf.add(s,f"C{hr+1}:M{bot}", FormulaRule(formula=['MOD(ROW(),2)=0'], fill=fill(BAND)))
     for st,bg,tx in (("green",G_BG,G_TXT),("amber",A_BG,A_TXT),("red",R_BG,R_TXT)):
-        s.conditional_formatting.add(f"L{hr+1}:L{bot}", FormulaRule(formula=[f'$O{hr+1}="{st}"'], fill=fill(bg), font=Font(color=tx,bold=True)))
+        ctx.cf.add(s,f"L{hr+1}:L{bot}", FormulaRule(formula=[f'$O{hr+1}="{st}"'], fill=fill(bg), font=Font(color=tx,bold=True)))
     row=bot+1; a=hr+1
     fm=s.cell(row,3); fm.value='="◆ "&'+Tx("msg.highlights"); fm.font=Font(name=UI,bold=True,size=9,color=AMBER); row+=1
-    s.cell(row,3).value=f'=IFERROR("▲ "&INDEX(C{a}:C{bot},MATCH(MAX(G{a}:G{bot}),G{a}:G{bot},0))&"   "&TEXT(MAX(G{a}:G{bot}),"+0.0%;-0.0%"),"")'
-    s.cell(row,3).font=Font(name=UI,size=9,color=G_TXT)
-    s.cell(row,9).value=f'=IFERROR("▼ "&INDEX(C{a}:C{bot},MATCH(MIN(G{a}:G{bot}),G{a}:G{bot},0))&"   "&TEXT(MIN(G{a}:G{bot}),"+0.0%;-0.0%"),"")'
-    s.cell(row,9).font=Font(name=UI,size=9,color=R_TXT); row+=1
+    mr=movers_layout()[1][num]   # meilleur / pire Δ% préc. de la section : dernière ligne de son balayage (M5)
+    for col,sym,v,k,color in ((3,"▲","sbv","sbk",G_TXT),(9,"▼","swv","swk",R_TXT)):
+        s.cell(row,col).value=f'=IFERROR(IF(ISNUMBER({mref(mr,v)}),"{sym} "&{Tr(mref(mr,k))}&"   "&TEXT({mref(mr,v)},"+0.0%;-0.0%"),""),"")'
+        s.cell(row,col).font=Font(name=UI,size=9,color=color)
+    row+=1
     fk=keys[0]; dep0=kdept(fk); idx=DEPT_KEYS[dep0].index(fk)
     comref=q(DEPT_COLLECTE[dep0])+"!$D$"+str(collecte_last(dep0)+3+idx)
     narr='SUBSTITUTE(SUBSTITUTE(IF(G'+str(a)+'>=0,'+Tx("narr.up")+','+Tx("narr.down")+'),"{kpi}",'+Tx(fk)+'),"{delta}",TEXT(ABS(G'+str(a)+'),"0.0%"))'
     return _comment_box(s,row,'=IF('+comref+'<>"",'+comref+',IFERROR('+narr+',""))')
 
-def render_detail(s,row,num,fr,en,cols,rows):
+def render_detail(ctx,s,row,num,fr,en,cols,rows):
     row=_banner(s,row,num,fr,en); hr=row; ncol=len(cols)
     for j,(htxt,kind) in enumerate(cols):
         c=s.cell(hr,3+j,htxt); c.font=Font(name=UI,bold=True,size=9,color=WHITE); c.fill=fill(PRIMARY)
@@ -790,7 +953,7 @@ def render_detail(s,row,num,fr,en,cols,rows):
         rr+=1
     bot=rr-1
     last_col=get_column_letter(2+ncol)
-    s.conditional_formatting.add(f"C{hr+1}:{last_col}{bot}", FormulaRule(formula=['MOD(ROW(),2)=0'], fill=fill(BAND)))
+    ctx.cf.add(s,f"C{hr+1}:{last_col}{bot}", FormulaRule(formula=['MOD(ROW(),2)=0'], fill=fill(BAND)))
     # data bars on percent / fcfa magnitude columns (premium gauge feel)
     for j,(htxt,kind) in enumerate(cols):
         col=get_column_letter(3+j)
@@ -799,7 +962,7 @@ def render_detail(s,row,num,fr,en,cols,rows):
         if kind in ("p","f","n") and bot>hr:
             try:
                 from openpyxl.formatting.rule import DataBarRule
-                s.conditional_formatting.add(f"{col}{hr+1}:{col}{bot}",
+                ctx.cf.add(s,f"{col}{hr+1}:{col}{bot}",
                     DataBarRule(start_type="min",end_type="max",color=(SUCCESS if kind=="p" else PRIMARY_XL),showValue=True))
             except Exception: pass
     row=add_detail_chart(s,cols,hr,bot,bot+2)
@@ -817,8 +980,8 @@ def render_note(s,row,num,fr,en):
     row=_banner(s,row,num,fr,en)
     return _comment_box(s,row,'=IF(LANG="EN","Commentary.","Commentaire.")',editable=True)
 
-def render_dept(s,dept,dnum,row,helper):
-    keys=DEPT_KEYS[dept]; ANCHORS[dept]=row
+def render_dept(ctx,s,dept,dnum,row,helper):
+    keys=DEPT_KEYS[dept]; s.anchors[dept]=row
     for c in range(3,16): s.cell(row,c).fill=fill(PRIMARY)
     s.row_dimensions[row].height=28
     place_icon(s,"dep_"+dept,f"C{row}",26)
@@ -828,31 +991,31 @@ def render_dept(s,dept,dnum,row,helper):
     bl.fill=fill(PRIMARY); bl.hyperlink="#"+q("RPT")+"!C1"; bl.alignment=Alignment(horizontal="right",vertical="center"); row+=1
     sub=s.cell(row,3); sub.value='=""&'+Tx("nav.grain")+'&": "&IF(GRAIN="M",'+Tx("grain.month")+',IF(GRAIN="Q",'+Tx("grain.quarter")+','+Tx("grain.year")+'))'
     sub.font=Font(name=UI,size=9,italic=True,color=TXT_SEC); row+=2
-    row=render_cards(s,row,keys[:4])
+    row=render_cards(ctx,s,row,keys[:4])
     lead=keys[0]
     s.cell(row,3).value='="▌ "&'+Tx(lead)+'&" — 12 mois / 12M"'
     s.cell(row,3).font=Font(name=UI,bold=True,size=10,color=PRIMARY)
-    add_chart(s,lead,row+1,helper); helper+=3; row+=12
+    add_chart(ctx,s,lead,row+1,helper); helper+=3; row+=12
     gk=[k for k in keys if KMETA[k][3]=="%"][:3]
     if gk:
         s.cell(row,3).value='="▌ "&IF(LANG="EN","Key gauges","Jauges clés")'
         s.cell(row,3).font=Font(name=UI,bold=True,size=10,color=PRIMARY); row+=1
-        for gi,gkey in enumerate(gk): add_gauge(s,gkey,3+gi*4,row)
+        for gi,gkey in enumerate(gk): add_gauge(ctx,s,gkey,3+gi*4,row)
         row+=12
-    for num,fr,en,typ,payload in SECTIONS.get(dept,[]):
+    for num,fr,en,typ,payload in sections(ctx,dept):
         sstart=row
-        if typ=="kpi": row=render_kpi_section(s,row,num,fr,en,payload)
-        elif typ=="detail": row=render_detail(s,row,num,fr,en,payload[0],payload[1])
-        elif typ=="budget": row=render_budget(s,row,num,fr,en,payload)
+        if typ=="kpi": row=render_kpi_section(ctx,s,row,num,fr,en,payload)
+        elif typ=="detail": row=render_detail(ctx,s,row,num,fr,en,payload[0],payload[1])
+        elif typ=="budget": row=render_budget(ctx,s,row,num,fr,en,payload)
         elif typ=="org": row=render_org(s,row,num,fr,en,payload)
         else: row=render_note(s,row,num,fr,en)
-        PANELS.append((sstart,row-1)); row+=1
+        s.panels.append((sstart,row-1)); row+=1
     for cc in range(3,16): s.cell(row,cc).fill=fill(BAND)
     s.row_breaks.append(Break(id=row)); row+=2
     return row,helper
 
 def render_front_cover(s,row):
-    ANCHORS['cover']=row
+    s.anchors['cover']=row
     for rr in range(row,row+45):
         for c in range(3,15): s.cell(rr,c).fill=fill(PRIMARY)
     try:
@@ -871,7 +1034,7 @@ def render_front_cover(s,row):
     s.row_breaks.append(Break(id=row+45)); return row+46
 
 def render_toc(s,row):
-    ANCHORS['toc']=row
+    s.anchors['toc']=row
     for c in range(3,16): s.cell(row,c).fill=fill(PRIMARY)
     s.row_dimensions[row].height=26
     try:
@@ -879,13 +1042,13 @@ def render_toc(s,row):
     except Exception: pass
     h=s.cell(row,3); h.value='="            "&'+Tx("nav.summary"); h.font=Font(name=UI,bold=True,size=15,color=WHITE); h.alignment=Alignment(vertical="center"); row+=2
     sy=s.cell(row,3); sy.value='="◈    "&'+Tx("nav.synthesis"); sy.font=Font(name=UI,size=12,bold=True,color=PRIMARY,underline="single")
-    TOC_LINKS.append((sy,'synth')); s.row_dimensions[row].height=22; row+=1
+    s.links.append((sy,'synth')); s.row_dimensions[row].height=22; row+=1
     headline={"rh":"kpi.rh.headcount","lease":"kpi.lease.occ_gla","rec":"kpi.rec.ar","foot":"kpi.foot.total",
               "mkt":"kpi.mkt.nps","com":"kpi.com.total_sales","hsse":"kpi.hsse.days_no_lti","fac":"kpi.fac.sla"}
     for di,(dep,title,subs) in enumerate(DEPTS):
         key=headline[dep]; u=KMETA[key][3]; agg=KMETA[key][4]
         lk=s.cell(row,3); lk.value=('="%d.    "&'%(di+2))+Tx("dept."+dep); lk.font=Font(name=UI,size=12,color=PRIMARY,underline="single")
-        TOC_LINKS.append((lk,dep))
+        s.links.append((lk,dep))
         v=s.cell(row,9); v.value=cur_f(key,agg,scfor(u)); v.number_format=F_PCT if u=="%" else (FCM if u=="FCFA" else F_INT)
         v.font=Font(name=MONO,size=11,color=TXT_SEC); s.row_dimensions[row].height=20; row+=1
     me=s.cell(row,3); me.value='="ⓘ    "&'+Tx("nav.methodo"); me.font=Font(name=UI,size=12,color=PRIMARY,underline="single"); me.hyperlink="#"+q("M4")+"!A1"; row+=2
@@ -906,8 +1069,8 @@ def render_back_cover(s,row):
     foot.font=Font(name=UI,size=10,color="CFE0D9")
     return row+45
 
-def render_synthese(s,row):
-    ANCHORS['synth']=row
+def render_synthese(ctx,s,row):
+    s.anchors['synth']=row
     for c in range(3,16): s.cell(row,c).fill=fill(PRIMARY)
     s.row_dimensions[row].height=26
     place_icon(s,"dep_synth",f"C{row}",24)
@@ -930,46 +1093,105 @@ def render_synthese(s,row):
                 s.cell(rr,c).border=Border(left=side(CARD_BORDER) if c==col else None,right=side(CARD_BORDER) if c==col+1 else None,bottom=side(CARD_BORDER) if rr==row+2 else None)
         col+=2
     row+=4
-    s.cell(row,3).value='="▌ "&'+Tx("msg.heatmap"); s.cell(row,3).font=Font(name=UI,bold=True,size=12,color=PRIMARY); row+=1
-    hr=row
-    for j,h in enumerate(["Dépt / Dept","KPI","Achievement"]):
-        c=s.cell(hr,3+j); c.value=h; c.font=Font(name=UI,bold=True,size=9); c.fill=fill(HDR_TBL); c.border=Border(bottom=side(AMBER,"medium"))
-    rr=hr+1
-    rep={"rh":"kpi.rh.payroll_var","lease":"kpi.lease.occ_gla","rec":"kpi.rec.recovery","foot":"kpi.foot.vs_budget",
-         "mkt":"kpi.mkt.event_roi","com":"kpi.com.lfl","hsse":"kpi.hsse.action_close","fac":"kpi.fac.sla"}
-    for dep,title,subs in DEPTS:
-        key=rep[dep]; agg=KMETA[key][4]
+    s.cell(row,3).value='="▌ "&'+Tx("msg.movers"); s.cell(row,3).font=Font(name=UI,bold=True,size=12,color=PRIMARY); row+=1
+    mrows,msec,mdep=movers_layout(); last=MOV_ROW+len(mrows)-1
+    delta=lambda:ColorScaleRule(start_type="num",start_value=-0.1,start_color=R_BG,mid_type="num",mid_value=0,mid_color=A_BG,
+                                  end_type="num",end_value=0.1,end_color=G_BG)
+    def head(hr,labels):
+        for j,h in enumerate(labels):
+            c=s.cell(hr,3+j); c.value=h; c.font=Font(name=UI,bold=True,size=9); c.fill=fill(HDR_TBL); c.border=Border(bottom=side(AMBER,"medium"))
+    def pct(c,f): c.value=f'=IFERROR({f},"")'; c.number_format=F_DELTA; c.font=Font(name=MONO,size=9)
+    hr=row; head(hr,["Dépt / Dept","▲ KPI","Δ% préc. / prior","▼ KPI","Δ% préc. / prior"]); rr=hr+1
+    for dep,title,subs in DEPTS:   # meilleur / pire du département : dernière ligne de son balayage
+        r=mdep[dep]
         s.cell(rr,3).value=T("dept."+dep); s.cell(rr,3).font=Font(name=UI,size=9)
-        s.cell(rr,4).value=T(key); s.cell(rr,4).font=Font(name=UI,size=9,color=TXT_SEC)
-        v=s.cell(rr,5); v.value=cur_f(key,agg); v.number_format='0.00'; v.font=Font(name=MONO,size=9); rr+=1
-    s.conditional_formatting.add(f"E{hr+1}:E{rr-1}",
-        ColorScaleRule(start_type="num",start_value=0.7,start_color=R_BG,mid_type="num",mid_value=0.95,mid_color=A_BG,end_type="num",end_value=1.1,end_color=G_BG))
-    PANELS.append((hr,rr-1))
+        for col,k,v in ((4,"dbk","dbv"),(6,"dwk","dwv")):
+            s.cell(rr,col).value="="+Tr(mref(r,k)); s.cell(rr,col).font=Font(name=UI,size=9,color=TXT_SEC)
+            pct(s.cell(rr,col+1),f'IF(ISNUMBER({mref(r,v)}),{mref(r,v)},"")')
+        rr+=1
+    for col in "EG": ctx.cf.add(s,f"{col}{hr+1}:{col}{rr-1}",delta())
+    s.panels.append((hr,rr-1)); row=rr+1
+    hr=row; head(hr,["#","KPI","Dépt / Dept","Δ% préc. / prior","Δ% N-1 / PY","Δ% budget"]); rr=hr+1
+    for o,sym in ((0,"▲"),(1,"▼")):   # top / flop global
+        for j in range(MOV_TOP):
+            s.cell(rr,3).value=f"{sym} {j+1}"; s.cell(rr,3).font=Font(name=UI,size=9,color=G_TXT if o==0 else R_TXT)
+            s.cell(rr,4).value=f'=IFERROR({Tr(mover_pick(last,j,o,"key"))},"")'; s.cell(rr,4).font=Font(name=UI,size=9)
+            s.cell(rr,5).value=f'=IFERROR({Tr(mover_pick(last,j,o,"dept"))},"")'; s.cell(rr,5).font=Font(name=UI,size=9,color=TXT_SEC)
+            for col,name in ((6,"dprev"),(7,"dpy"),(8,"dbud")): pct(s.cell(rr,col),mover_pick(last,j,o,name))
+            rr+=1
+    ctx.cf.add(s,f"F{hr+1}:H{rr-1}",delta())
+    s.panels.append((hr,rr-1))
     row=rr+1
     s.row_breaks.append(Break(id=row)); return row+1
 
-def build_report_single():
-    s=ws["RPT"]; s.sheet_view.showGridLines=False; s.sheet_properties.tabColor=PRIMARY
+# ---------------------------------------------------------------- cache de fragments (un par département)
+_FRAG_CODE=[]
+def frag_code():
+    """Sources du rendu des fragments (ce module, layout, cfplan, fragments), hachées une fois par processus."""
+    if not _FRAG_CODE:
+        import sys, cfplan; _FRAG_CODE.append(fragments.code(sys.modules[__name__],layout,cfplan,fragments))
+    return _FRAG_CODE[0]
+
+def sections(ctx,dept):
+    """SECTIONS du département, lignes de détail remplacées par celles du contexte (ctx.details)."""
+    return [(num,fr,en,typ,(payload[0],ctx.details[num]) if typ=="detail" and num in ctx.details else payload)
+            for num,fr,en,typ,payload in SECTIONS.get(dept,[])]
+
+def building(item):
+    """Valeur d'une ligne de la synthèse de l'immeuble (section 3.1), ex. building("GLA totale")."""
+    rows=next(p[1] for num,fr,en,typ,p in SECTIONS["lease"] if num=="3.1")
+    return next(v for label,v,u in rows if label.startswith(item))
+
+def dept_fingerprint(ctx,dept,dnum):
+    """Entrées du fragment : code de rendu, KPI, spec SECTIONS (lignes de détail incluses) et adresses référencées."""
+    keys=DEPT_KEYS[dept]; bc0,bf,bl,brows=BUD
+    return fragments.fingerprint(frag_code(),
+        (PRIMARY,PRIMARY_XL,SUCCESS,WARNING,AMBER,CARD,CARD_BORDER,TXT_PRIM,TXT_SEC,BAND,HDR_TBL,G_BG,G_TXT,A_BG,A_TXT,R_BG,R_TXT,
+         F_PCT,FCM,F_DELTA,F_NUM1,UI,MONO),
+        SH,dept,dnum,[d for d in DEPTS if d[0]==dept],[KMETA[k] for k in keys],sections(ctx,dept),
+        [M3_ROW[k] for k in keys],bc0,[brows.get(k) for k in keys],collecte_last(dept),HELP_COL,GAUGE_COL,CH0,
+        MOV_COL,MV,LAND_COL,[v for k,v in movers_layout()[1].items() if k in {s[0] for s in SECTIONS.get(dept,[])}])
+
+def capture_dept(ctx,dept,dnum):
+    """render_dept à l'origine locale (ligne 1, curseurs d'aide M5 à zéro) : plan détaché + M5 brouillon."""
+    fs=layout.Plan(title=SH["RPT"]); fx=copy.copy(ctx)
+    fx.calc=Workbook().active; fx.calc.title=SH["M5"]; fx.cf=fragments.CFLog(); fx.gh=1; fx.ch=CH0
+    row,helper=render_dept(fx,fs,dept,dnum,1,1)
+    frag=fragments.capture((fx.calc,),fx.cf,plans=(fs,))
+    frag.update(rows=row-1,helper=helper-1,gauge=fx.gh-1,combo=fx.ch-CH0)
+    return frag
+
+def render_dept_cached(ctx,s,dept,dnum,row,helper):
+    """Comme render_dept, via le cache disque : fragment réutilisé si l'empreinte est inchangée, recollé à row/helper."""
+    if ctx.cache is None: return render_dept(ctx,s,dept,dnum,row,helper)
+    key=dept_fingerprint(ctx,dept,dnum); frag=fragments.load(ctx.cache,key)
+    if frag is None:
+        frag=capture_dept(ctx,dept,dnum); fragments.store(ctx.cache,key,frag); ctx.misses.append(dept)
+    dr,dh,dg,dc=row-1,helper-1,ctx.gh-1,ctx.ch-CH0
+    def m5(r,c): return dg if c==GAUGE_COL else (dc if r>CH0 else dh)
+    fragments.splice(frag,{SH["RPT"]:(s,lambda r,c:dr),SH["M5"]:(ctx.calc,m5)},ctx.cf)
+    ctx.gh+=frag["gauge"]; ctx.ch+=frag["combo"]
+    return row+frag["rows"],helper+frag["helper"]
+
+def build_report_single(ctx):
+    s=ctx.ws["RPT"]; s.sheet_view.showGridLines=False; s.sheet_properties.tabColor=PRIMARY
     s.column_dimensions["A"].width=2.2; s.column_dimensions["B"].width=2.2
     s.column_dimensions["C"].width=26; s.column_dimensions["D"].width=7
     for col in "EFGHIJKLMN": s.column_dimensions[col].width=8.6
     s.column_dimensions["O"].hidden=True; s.column_dimensions["P"].hidden=True
+    pl=layout.Plan(s)   # 1) plan : blocs, fusions, ancres, panneaux ; 2) emit : chaque cellule créée une fois
     row=1; helper=1
-    row=render_front_cover(s,row)
-    row=render_toc(s,row)
-    row=render_synthese(s,row)
+    row=render_front_cover(pl,row)
+    row=render_toc(pl,row)
+    row=render_synthese(ctx,pl,row)
     for i,(dep,title,subs) in enumerate(DEPTS):
-        row,helper=render_dept(s,dep,i+2,row,helper)
-    row=render_back_cover(s,row)
-    for cell,key in TOC_LINKS:
-        cell.hyperlink="#"+q("RPT")+"!C"+str(ANCHORS.get(key,1))
+        row,helper=render_dept_cached(ctx,pl,dep,i+2,row,helper)
+    row=render_back_cover(pl,row)
+    for cell,key in pl.links:
+        cell.hyperlink="#"+q("RPT")+"!C"+str(pl.anchors.get(key,1))
     maxrow=row
-    # tinted page background on untouched content cells (cards float in white)
-    for r in range(1,maxrow+1):
-        for c in range(3,15):
-            cl=s.cell(r,c)
-            if cl.fill.fgColor.rgb in (None,"00000000"): cl.fill=fill(PAGE_TINT)
-    for p in PANELS: panelize_white(s,p[0],p[1])
+    for p in pl.panels: panelize_white(pl,p[0],p[1])
+    pl.emit(bg=fill(PAGE_TINT),bg_cols=(3,14))   # tinted page background (column styles); cards float in white
     s.print_area=f"C1:N{maxrow}"
     s.page_setup.orientation="portrait"; s.page_setup.paperSize=9
     s.page_setup.fitToWidth=1; s.page_setup.fitToHeight=0
@@ -982,8 +1204,8 @@ def build_report_single():
     s.evenFooter.left.text=s.oddFooter.left.text; s.evenFooter.center.text=s.oddFooter.center.text; s.evenFooter.right.text=s.oddFooter.right.text
 
 # ================================================================ M4 dictionary + methodo
-def build_m4():
-    s=ws["M4"]; s.sheet_properties.tabColor="94A3B8"; s.sheet_view.showGridLines=False
+def build_m4(ctx):
+    s=ctx.ws["M4"]; s.sheet_properties.tabColor="94A3B8"; s.sheet_view.showGridLines=False
     bl=s.cell(1,3); bl.value='="↩ "&'+Tx("nav.title"); bl.font=Font(name=UI,size=9,color=LINKC,underline="single")
     bl.hyperlink="#"+q("RPT")+"!C1"
     s.cell(2,3,"M4 · Dictionnaire KPI & Méthodologie").font=Font(name=UI,bold=True,size=16,color=TXT_PRIM)
@@ -1275,14 +1497,143 @@ for _dep in SECTIONS:
     SECTIONS[_dep].append((_BNUM[_dep],"Budget vs Réalisé","Budget vs Actual","budget",_dep))
 
 # ================================================================ build
-build_m2(); build_m0(); build_m1(); build_m3()
-for dep,code in DEPT_COLLECTE.items(): build_collecte(code,dep)
-build_report_single()
-build_m4()
-
-ws["M1"].sheet_state="hidden"; ws["M2"].sheet_state="hidden"; ws["M3"].sheet_state="hidden"; ws["M5"].sheet_state="hidden"
-order=["RPT","M0","C1","C2","C3","C4","C5","C6","C7","C8","M4","M1","M2","M3","M5"]
-wb._sheets.sort(key=lambda sh:order.index([k for k,v in SH.items() if v==sh.title][0]))
-wb.active=0
-wb.save("Cosmos-Report-Builder-v3.0.xlsx")
-print("SAVED. sheets:",len(wb.sheetnames),"| KPIs:",len(KPIS))
+def build_sweep(ctx,fn,grain,data,annee=None,jobs=None):
+    """Balayage : toutes les périodes d'une année depuis un seul build et un seul chargement des données.
+    Agrégats courant/préc./N-1 en une passe numpy (periods.cube) ; seules les cellules dépendant des
+    sélecteurs sont réévaluées, et les feuilles indépendantes de la période sont sérialisées une fois."""
+    import numpy as np, xlcalc, xlsave, periods
+    annee=int(annee or ctx.ws["M0"]["D6"].value); mois=periods.months_of(grain)
+    b=periods.bounds(annee,grain,mois)
+    X=np.array([[np.nan if v is None else v for v in data[k]] for k in KMETA],dtype=float)
+    cb=periods.cube(X,b)
+    rows=[M3_ROW[k] for k in KMETA]; aggs=[KMETA[k][4] for k in KMETA]
+    def at(n): return selector(ctx,n)
+    calc=xlcalc.Calc(ctx.wb,volatile=("GRAIN","ANNEE","MOIS","PERIODE")+tuple(b))
+    stem,ext=os.path.splitext(fn); frozen=None; outs=[]
+    for p,mo in enumerate(mois):
+        sel={"GRAIN":grain,"ANNEE":annee,"MOIS":mo}
+        for n,v in sel.items(): sh,r,c=at(n); ctx.wb[sh].cell(r,c).value=v
+        ov={at(n):(v if isinstance(v,str) else float(v)) for n,v in sel.items()}
+        ov[at("PERIODE")]=periods.serial([(annee-periods.BASE_YEAR)*12+mo-1])[0]   # =DATE(ANNEE,MOIS,1)
+        for n in b: ov[at(n)]=periods.serial([b[n][p]])[0]
+        calc.reseed(ov,periods.pvals(cb,rows,aggs,SH["M3"],p))
+        vals=calc.evaluate_all()
+        if frozen is None:
+            dirty={k[0] for k in calc.tainted}|{SH["M0"]}
+            frozen={t:None for t in ctx.wb.sheetnames if t not in dirty}
+        out=f"{stem}-{periods.label(annee,grain,mo)}{ext}"
+        xlsave.save(ctx.wb,out,vals,frozen=frozen,jobs=jobs); outs.append(out)
+    return outs
+
+def assemble(ctx,data):
+    """Tous les onglets dans le contexte, ordonnés, MFC appliquées. Renvoie le nombre de règles MFC."""
+    gen_images()
+    build_m2(ctx); build_m0(ctx); build_m1(ctx); build_m3(ctx,data)
+    for dep,code in DEPT_COLLECTE.items(): build_collecte(ctx,code,dep,data)
+    build_movers(ctx)
+    build_report_single(ctx)
+    build_m4(ctx)
+
+    ctx.ws["M1"].sheet_state="hidden"; ctx.ws["M2"].sheet_state="hidden"; ctx.ws["M3"].sheet_state="hidden"; ctx.ws["M5"].sheet_state="hidden"
+    order=["RPT","M0","C1","C2","C3","C4","C5","C6","C7","C8","M4","M1","M2","M3","M5"]
+    ctx.wb._sheets.sort(key=lambda sh:order.index([k for k,v in SH.items() if v==sh.title][0]))
+    ctx.wb.active=0
+    return ctx.cf.flush()
+
+def selector(ctx,name):
+    """Nom défini d'un sélecteur/borne M0 -> (feuille, ligne, colonne)."""
+    import xlcalc
+    sh,r,c,_,_=xlcalc.split_ref(ctx.wb.defined_names[name].attr_text); return (sh,r,c)
+
+def select(ctx,**sel):
+    """Fixe les sélecteurs M0 (LANG, GRAIN, ANNEE, MOIS) avant évaluation / sauvegarde."""
+    for n,v in sel.items():
+        sh,r,c=selector(ctx,n); ctx.wb[sh].cell(r,c).value=v
+
+def build(fn="Cosmos-Report-Builder-v3.0.xlsx",cached=False,sweep=None,annee=None,cache=None,jobs=None,check=True,data=None,details=None,
+          comments=None):
+    """Génère un classeur ; renvoie son contexte (Build). Réentrant : aucun état partagé entre deux appels.
+    check : validation de la matrice KPI × mois avant tout rendu, puis lint des formules émises.
+    data : séries KPI × mois (forme gen_data ; défaut : données de démo) ; details : {n° section: lignes de détail} ;
+    comments : {clé: {'AAAA-MM': texte}} repris dans les collectes."""
+    data=data or gen_data()
+    if check:
+        import validate, periods
+        warn=validate.ensure(data,annee or ANNEE0,sweep or GRAIN0,periods.months_of(sweep) if sweep else MOIS0)
+        if warn: print("VALIDATION:",len(warn),"alerte(s) —",validate.fmt(warn[0]))
+    ctx=Build(cache); ctx.details.update(details or {}); ctx.comments.update(comments or {})
+    nrules=assemble(ctx,data)
+    if check:   # formules : noms, feuilles, plages, fonctions, clés i18n/RAG (lint.FormulaError si erreurs)
+        import lint
+        warn=lint.ensure(ctx.wb)
+        if warn: print("LINT:",len(warn),"alerte(s) —",warn[0][2],warn[0][4])
+    if sweep:
+        outs=build_sweep(ctx,fn,sweep,data,annee,jobs)
+        print("SWEEP",sweep,"·",len(outs),"sorties:",", ".join(os.path.basename(o) for o in outs)); return ctx
+    import xlsave
+    if cached:   # valeurs calculées en Python pour l'état par défaut des sélecteurs M0 (LANG/GRAIN/ANNEE/MOIS)
+        import xlcalc
+        xlsave.save(ctx.wb,fn,xlcalc.evaluate(ctx.wb),jobs=jobs)
+    else: xlsave.save(ctx.wb,fn,jobs=jobs)
+    print("SAVED. sheets:",len(ctx.wb.sheetnames),"| KPIs:",len(KPIS),"| CF rules:",nrules,"(demandes:",str(ctx.cf.requested)+")","| cached:",cached)
+    if cache: print("FRAGMENTS recalculés:",", ".join(ctx.misses) or "aucun")
+    return ctx
+
+def split(fn,data=None,deps=None,comments=None):
+    """Un classeur de saisie léger par département : sa collecte (mêmes lignes/colonnes que le maître, relue
+    telle quelle par harvest), ses seuls libellés i18n et un panneau de contrôle. Renvoie les chemins écrits."""
+    import lint, xlsave
+    data=data or gen_data(); stem,ext=os.path.splitext(fn); outs=[]
+    for dep in deps or DEPT_COLLECTE:
+        code=DEPT_COLLECTE[dep]; ctx=Build(sheets=(code,"M0","M2")); ctx.comments.update(comments or {})
+        build_m2(ctx,{"msg.collect","msg.help","msg.tracking","dept."+dep,*DEPT_KEYS[dep]})
+        build_collecte(ctx,code,dep,data); build_panel(ctx,dep)
+        ctx.ws["M2"].sheet_state="hidden"; ctx.wb.active=0; ctx.cf.flush(); lint.ensure(ctx.wb)
+        out=f"{stem}-{code}{ext}"; xlsave.save(ctx.wb,out,jobs=1); outs.append(out)
+    print("SPLIT ·",len(outs),"classeurs département:",", ".join(os.path.basename(o) for o in outs))
+    return outs
+
+if __name__=="__main__":
+    import argparse
+    ap=argparse.ArgumentParser(description="Cosmos Report Builder v3.0")
+    ap.add_argument("out",nargs="?",default="Cosmos-Report-Builder-v3.0.xlsx")
+    ap.add_argument("--cached",action="store_true",help="écrit les résultats des formules en cache (ouverture sans recalcul)")
+    ap.add_argument("--sweep",choices=["M","Q","Y"],help="une sortie par période de l'année (12 mois, 4 trimestres ou 1 an)")
+    ap.add_argument("--annee",type=int,help="année balayée (défaut : ANNEE de M0)")
+    ap.add_argument("--cache",default=os.path.join(os.path.dirname(os.path.abspath(__file__)),".cache"),
+                    help="cache disque des fragments départements du rapport")
+    ap.add_argument("--no-cache",dest="cache",action="store_const",const=None,help="rendu complet sans cache")
+    ap.add_argument("--jobs",type=int,help="processus de sérialisation des feuilles à la sauvegarde (défaut : nb de cœurs)")
+    ap.add_argument("--no-check",dest="check",action="store_false",help="sans validation préalable des données")
+    ap.add_argument("--split",action="store_true",help="un classeur de saisie léger par département (collecte + contrôles)")
+    ap.add_argument("--ledger",help="grand livre factures / encaissements CSV : balance âgée C3 calculée (ageing)")
+    ap.add_argument("--counters",help="dossier des fichiers compteurs 15 min par entrée : KPI C4 + répartition par zone (footfall)")
+    ap.add_argument("--workorders",help="dossier des journaux d'OT (export GMAO) : KPI maintenance C8, passe incrémentale (cmms)")
+    ap.add_argument("--meters",help="magasin des relevés horaires des sous-compteurs : KPI énergie C8 + section 9.2.1 (energy)")
+    ap.add_argument("--hr",nargs="+",metavar="LOG",help="journaux RH (entrées, sorties, absences, postes) : KPI capital humain C1 (workforce)")
+    ap.add_argument("--tenants",help="table de faits locataires × mois : OCR, loyers, ventes + sections 3.3 / 3.4 / 3.5 (tenants)")
+    ap.add_argument("--store",help="magasin KPI persistant : données relues (mappées) au départ, sources fusionnées réécrites (kpistore)")
+    ap.add_argument("--site",default="cosmos",help="site du magasin KPI")
+    a=ap.parse_args()
+    store=None
+    if a.store:
+        import kpistore; store=kpistore.Store(a.store,a.site)
+    data=store.data() if store and store.meta["months"] else gen_data(); details={}
+    if a.ledger:
+        import ageing; data.update(ageing.age(a.ledger))
+    if a.counters:
+        import footfall; kp,details["5.1"]=footfall.refresh(a.counters); data.update(kp)
+    if a.workorders:
+        import cmms; data.update(cmms.refresh(a.workorders))
+    if a.meters:
+        import energy; kp,details["9.2.1"]=energy.refresh(a.meters); data.update(kp)
+    if a.hr:
+        import workforce; data.update(workforce.kpis(a.hr))
+    if a.tenants:
+        import tenants; kp,det=tenants.load(a.tenants); data.update(kp); details.update(det)
+    comments={}
+    if store:   # mois vides d'une source partielle : la valeur stockée est gardée, le classeur part du magasin fusionné
+        store.write(data); data=store.data(); comments=store.comments()
+    if a.split: split(a.out,data,comments=comments)
+    else: build(a.out,cached=a.cached,sweep=a.sweep,annee=a.annee,cache=a.cache,jobs=a.jobs,check=a.check,data=data,details=details,
+                comments=comments)
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""Planificateur de mises en forme conditionnelles (MFC).
+Les renderers déposent leurs demandes (plage, règle) pendant le rendu ; flush() fusionne les règles
+de formule identique (à l'ancrage près) en une seule règle multi-plages par feuille.
+Le nombre de règles émises reste ~constant quand on ajoute départements et sections."""
+import re
+from openpyxl.utils import column_index_from_string, get_column_letter
+from openpyxl.worksheet.cell_range import CellRange
+
+_REF=re.compile(r'(?<![\w\.\$])(\$?)([A-Z]{1,3})(\$?)(\d+)(?![\w\.(!])')
+_SLOT=re.compile(r'\x00(\$?)(-?\d+),(\$?)(-?\d+)\x00')
+_STR=re.compile(r'("(?:[^"]|"")*"|\'(?:[^\']|\'\')*\')')   # littéraux texte et noms de feuille entre quotes
+
+def canon(formula,r0,c0):
+    """Formule A1 ancrée en (r0,c0) -> (forme relative canonique, contient des réfs relatives ?)."""
+    rel=False
+    def sub(m):
+        nonlocal rel
+        ca,cl,ra,rw=m.groups(); c=column_index_from_string(cl); r=int(rw)
+        if not (ca and ra): rel=True
+        return "\x00%s%d,%s%d\x00"%(ca,c if ca else c-c0,ra,r if ra else r-r0)
+    parts=_STR.split(formula)
+    return "".join(p if i%2 else _REF.sub(sub,p) for i,p in enumerate(parts)),rel
+
+def render(cf,r0,c0):
+    """Inverse de canon() pour un nouvel ancrage."""
+    def sub(m):
+        ca,c,ra,r=m.groups(); c,r=int(c),int(r)
+        return "%s%s%s%d"%(ca,get_column_letter(c if ca else c0+c),ra,r if ra else r0+r)
+    return _SLOT.sub(sub,cf)
+
+class CFPlan:
+    def __init__(self):
+        self.groups={}; self.requested=0; self.emitted=0
+
+    def add(self,ws,rng,rule):
+        """Équivalent de ws.conditional_formatting.add(rng, rule), différé et mutualisé."""
+        self.requested+=1
+        cr=CellRange(rng.split()[0]); forms=None
+        if rule.type=="expression":
+            cs=[canon(f,cr.min_row,cr.min_col) for f in rule.formula]
+            forms=tuple(c for c,_ in cs); rel=any(r for _,r in cs)
+            # réfs relatives : même colonne de départ => 1re plage = coin haut-gauche englobant (Excel & LibreOffice)
+            key=(ws.title,rule.type,forms,rule.dxf,rule.stopIfTrue,cr.min_col if rel else None)
+        elif rule.type=="colorScale":
+            key=(ws.title,rule.type,rule.colorScale)
+        else:   # dataBar & co : échelle min/max propre à chaque tableau, pas de fusion
+            key=(ws.title,id(rule))
+        g=self.groups.get(key)
+        if g is None: self.groups[key]=g=(ws,rule,forms,[])
+        g[3].extend(rng.split())
+
+    def flush(self):
+        """Émet les règles fusionnées (ordre de première demande = priorités d'origine). Renvoie le nombre de règles."""
+        n=0
+        for ws,rule,forms,rngs in self.groups.values():
+            crs=sorted((CellRange(r) for r in rngs),key=lambda c:(c.min_col,c.min_row,c.max_col,c.max_row))
+            if forms: rule.formula=[render(f,crs[0].min_row,crs[0].min_col) for f in forms]
+            ws.conditional_formatting.add(" ".join(c.coord for c in crs),rule); n+=1
+        self.groups={}; self.emitted+=n
+        return n
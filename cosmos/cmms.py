@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""KPI maintenance (C8) depuis le journal d'événements des ordres de travail (export GMAO), en incrémental.
+Un point de reprise SQLite persiste l'état de chaque OT (table ot, une ligne par OT), les cumuls mensuels et la position
+de lecture (octets) des fichiers (table etat) ; une passe ne lit que les événements ajoutés depuis. Chaque OT touché est
+relu par sa clé, retire sa contribution aux cumuls puis rajoute la nouvelle, et seul lui est réécrit : le coût d'un
+rafraîchissement est proportionnel aux événements du jour, pas à l'historique.
+
+Journal CSV (en-tête) : ot, type (P = préventif, C = correctif), evenement, horodatage (AAAA-MM-JJ HH:MM), echeance.
+Événements : O ouverture (type, échéance SLA), C clôture, R réouverture, A annulation."""
+import bisect, glob, json, os, sqlite3
+import numpy as np
+import build_cosmos as B
+from periods import BASE_YEAR
+
+STATE=".cmms.db"
+SUMS=("opened","prev","corr","closed","rep_h","rep_n","sla_ok","sla_n")
+
+def minutes(s):
+    """'AAAA-MM-JJ HH:MM' -> minutes depuis 1970 (None si vide)."""
+    return int(np.datetime64(s.strip().replace(" ","T"),"m").astype(np.int64)) if s.strip() else None
+
+class Cmms:
+    """OT {id: [type, ouverture, clôture, échéance, annulé]} (minutes) ; cumuls par mois, case 0 = avant la fenêtre.
+    tickets : OT touchés par la passe (None = inconnu du point de reprise), relus à la demande dans la table ot."""
+    def __init__(self,n=B.N_MONTHS,db=None):
+        self.n=n; self.db=db
+        m0=np.datetime64("%d-01"%BASE_YEAR,"M")
+        self.starts=(m0+np.arange(n+1)).astype("datetime64[m]").astype(np.int64).tolist()
+        self.acc={k:np.zeros(n+1) for k in SUMS}; self.tickets={}; self.offsets={}
+
+    # ------------------------------------------------------------ point de reprise
+    @classmethod
+    def load(cls,fn):
+        db=sqlite3.connect(fn)
+        db.execute("CREATE TABLE IF NOT EXISTS ot(id TEXT PRIMARY KEY,typ TEXT,o INTEGER,c INTEGER,due INTEGER,cancel INTEGER)")
+        db.execute("CREATE TABLE IF NOT EXISTS etat(k TEXT PRIMARY KEY,v TEXT)")
+        self=cls(db=db); st=dict(db.execute("SELECT k,v FROM etat"))
+        if st:
+            self.acc={k:np.array(v,dtype=float) for k,v in json.loads(st["acc"]).items()}; self.offsets=json.loads(st["offsets"])
+        return self
+
+    def reset(self):
+        """Reconstruction complète : cumuls, positions et OT vidés (dans la transaction de la passe)."""
+        db=self.db; self.__init__(self.n,db)
+        if db is not None: db.execute("DELETE FROM ot")
+
+    def save(self):
+        """OT touchés et état en une transaction : la passe est enregistrée entière ou pas du tout."""
+        rows=[(k,t[0],t[1],t[2],t[3],int(t[4])) for k,t in self.tickets.items() if t is not None]
+        with self.db:
+            self.db.executemany("INSERT OR REPLACE INTO ot VALUES (?,?,?,?,?,?)",rows)
+            self.db.executemany("INSERT OR REPLACE INTO etat VALUES (?,?)",
+                                (("acc",json.dumps({k:v.tolist() for k,v in self.acc.items()})),("offsets",json.dumps(self.offsets))))
+        self.db.close()
+
+    def ticket(self,ot):
+        if ot not in self.tickets and self.db is not None:
+            r=self.db.execute("SELECT typ,o,c,due,cancel FROM ot WHERE id=?",(ot,)).fetchone()
+            self.tickets[ot]=None if r is None else [r[0],r[1],r[2],r[3],bool(r[4])]
+        return self.tickets.get(ot)
+
+    # ------------------------------------------------------------ cumuls
+    def bucket(self,t):
+        """Minutes -> case mensuelle (0 = avant BASE_YEAR), None au-delà de la fenêtre."""
+        i=bisect.bisect_right(self.starts,t)
+        return i if i<=self.n else None
+
+    def apply(self,t,sign):
+        """Ajoute (sign=1) ou retire (-1) la contribution d'un OT aux cumuls."""
+        typ,o,c,due,cancel=t
+        if cancel: return
+        A=self.acc; bo=self.bucket(o)
+        if bo is not None:
+            A["opened"][bo]+=sign; A["prev" if typ=="P" else "corr"][bo]+=sign
+        bc=None if c is None else self.bucket(c)
+        if bc is None: return
+        A["closed"][bc]+=sign
+        if typ=="C": A["rep_h"][bc]+=sign*(c-o)/60; A["rep_n"][bc]+=sign
+        if due is not None: A["sla_n"][bc]+=sign; A["sla_ok"][bc]+=sign*(c<=due)
+
+    def event(self,ot,typ,ev,ts,due):
+        t=self.ticket(ot)
+        if t is not None: self.apply(t,-1)
+        ev=ev.upper()
+        if ev=="O": t=[typ.upper() or "C",ts,None,due,False]
+        elif t is None: return   # événement d'un OT ouvert avant l'export : ignoré
+        elif ev=="C": t[2]=ts
+        elif ev=="R": t[2]=None
+        elif ev=="A": t[4]=True
+        self.tickets[ot]=t; self.apply(t,1)
+
+    # ------------------------------------------------------------ lecture
+    def read(self,fn):
+        """Événements complets ajoutés depuis le point de reprise ; fichier raccourci -> None (reconstruction)."""
+        with open(fn,"rb") as f:
+            head=f.readline(); cols=[c.strip().lower() for c in head.decode("utf-8").split(",")]
+            off=self.offsets.get(fn,len(head))
+            if off>os.fstat(f.fileno()).st_size: return None
+            f.seek(off); buf=f.read()
+        end=buf.rfind(b"\n")+1
+        ix=[cols.index(c) for c in ("ot","type","evenement","horodatage","echeance")]
+        n=0
+        for line in buf[:end].decode("utf-8").splitlines():
+            r=line.split(",")
+            if len(r)<len(cols): continue
+            ot,typ,ev,ts,due=(r[i] for i in ix)
+            self.event(ot.strip(),typ.strip(),ev.strip(),minutes(ts),minutes(due)); n+=1
+        self.offsets[fn]=off+end
+        return n
+
+    # ------------------------------------------------------------ sorties
+    def kpis(self):
+        """Séries C8 (forme gen_data) ; backlog = OT ouverts non clôturés en fin de mois."""
+        A={k:v[1:] for k,v in self.acc.items()}
+        back=np.cumsum(self.acc["opened"]-self.acc["closed"])[1:]
+        cnt=lambda x:[int(round(v)) for v in x]
+        rate=lambda a,b,nd:[round(float(x/y),nd) if y>0 else None for x,y in zip(a,b)]
+        return {"kpi.fac.ot_opened":cnt(A["opened"]),"kpi.fac.ot_closed":cnt(A["closed"]),"kpi.fac.ot_backlog":cnt(back),
+                "kpi.fac.wo_prev":cnt(A["prev"]),"kpi.fac.wo_corr":cnt(A["corr"]),
+                "kpi.fac.prev_corr":rate(A["prev"],A["prev"]+A["corr"],4),
+                "kpi.fac.mttr":rate(A["rep_h"],A["rep_n"],2),"kpi.fac.sla":rate(A["sla_ok"],A["sla_n"],4)}
+
+def refresh(folder,state=None):
+    """Passe incrémentale sur les journaux du dossier (ordre des noms) ; point de reprise : folder/.cmms.db.
+    Un journal raccourci ou remplacé relance une reconstruction complète."""
+    state=state or os.path.join(folder,STATE); files=sorted(glob.glob(os.path.join(folder,"*.csv")))
+    C=Cmms.load(state)
+    if any(C.read(fn) is None for fn in files):
+        C.reset()
+        for fn in files: C.read(fn)
+    k=C.kpis(); C.save()
+    return k
+
+def demo_log(fn,start="2024-01-01",days=B.N_MONTHS*30,per_day=2.2,seed=1):
+    """Journal de démo (ajout en fin de fichier) : ~65 OT / mois, 35 % correctifs, réparation ~6 h, SLA 8 h / 72 h."""
+    rng=np.random.default_rng(seed); new=not os.path.exists(fn); tag="OT"+start.replace("-","")[:8]+"-"
+    n=rng.poisson(per_day*days); d0=np.datetime64(start,"m")
+    o=np.sort(d0+rng.integers(0,days*1440,n).astype("timedelta64[m]"))
+    corr=rng.random(n)<0.35
+    dur=np.where(corr,rng.gamma(2,3.2,n),rng.gamma(3,8,n))*60
+    due=o+np.where(corr,8*60,72*60).astype("timedelta64[m]"); c=o+dur.astype("timedelta64[m]")
+    ev=[(t,"O",tag+"%05d"%i,"C" if k else "P",dd) for i,(t,k,dd) in enumerate(zip(o,corr,due))]
+    ev+=[(t,"C",tag+"%05d"%i,"C" if k else "P","") for i,(t,k) in enumerate(zip(c,corr)) if t<d0+np.timedelta64(days*1440,"m")]
+    ev.sort(key=lambda e:e[0])
+    fmt=lambda t:str(t).replace("T"," ")
+    with open(fn,"a",encoding="utf-8") as f:
+        if new: f.write("ot,type,evenement,horodatage,echeance\n")
+        f.write("".join("%s,%s,%s,%s,%s\n"%(ot,typ,e,fmt(t),fmt(dd) if dd!="" else "") for t,e,ot,typ,dd in ev))
+
+if __name__=="__main__":
+    import argparse, time
+    ap=argparse.ArgumentParser(description="Journal d'OT (GMAO) -> KPI maintenance C8 (passe incrémentale)")
+    ap.add_argument("folder",help="dossier des journaux CSV")
+    ap.add_argument("--state",help="point de reprise SQLite (défaut : folder/.cmms.db)")
+    ap.add_argument("--demo",metavar="AAAA-MM-JJ:JOURS",help="ajoute d'abord un journal de démo")
+    a=ap.parse_args()
+    if a.demo:
+        s,d=a.demo.split(":"); os.makedirs(a.folder,exist_ok=True)
+        demo_log(os.path.join(a.folder,"ot.csv"),s,int(d),seed=int(s.replace("-","")))
+    t=time.perf_counter(); k=refresh(a.folder,a.state)
+    for key,v in k.items(): print("  %-20s"%key," ".join(str(x) for x in v[-6:]))
+    print("CMMS: %.2fs"%(time.perf_counter()-t))
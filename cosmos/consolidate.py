@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""Consolidation groupe (numpy) : les séries KPI × mois de tous les centres sont empilées en un tableau
+(site, KPI, mois) puis agrégées en une passe selon l'agg et l'unité de chaque KPI :
+montants / volumes sommés (LAST : somme des soldes de fin de mois), pourcentages et ratios pondérés
+(GLA pour l'occupation, facturé pour le recouvrement…), autres moyennes simples.
+Le résultat a la forme de build_cosmos.gen_data : il alimente tel quel les collectes et le rapport."""
+import numpy as np
+import build_cosmos as B
+
+SUMMED={"FCFA","nb","visites","ETP","m²","unité"}   # unités additives (agg SUM ou LAST)
+GLA="GLA"   # pondération par la surface locative du centre
+WEIGHT={
+    "kpi.lease.occ_gla":GLA,"kpi.lease.occ_unit":GLA,"kpi.lease.rent_sqm":GLA,"kpi.foot.per_sqm":GLA,
+    "kpi.com.sales_sqm":GLA,"kpi.com.kiosk_occ":GLA,"kpi.com.market_occ":GLA,"kpi.fac.energy_int":GLA,
+    "kpi.rec.recovery":"kpi.rec.billed","kpi.rec.provision":"kpi.rec.billed","kpi.rec.dso":"kpi.rec.billed",
+    "kpi.lease.ocr":"kpi.com.tenant_sales","kpi.com.lfl":"kpi.com.total_sales","kpi.com.discount":"kpi.com.total_sales",
+    "kpi.mkt.spend_pct":"kpi.com.total_sales","kpi.mkt.cpa":"kpi.mkt.spend","kpi.foot.conversion":"kpi.foot.total",
+    "kpi.rh.payroll_var":"kpi.rh.payroll","kpi.rh.turnover":"kpi.rh.headcount","kpi.rh.absence":"kpi.rh.headcount",
+    "kpi.rh.train_cover":"kpi.rh.headcount","kpi.fac.capex_var":"kpi.fac.capex",
+}
+LOWEST={"kpi.hsse.days_no_lti"}   # compteur « depuis le dernier événement » : le plus faible des centres
+SUM,WAVG,MIN=0,1,2
+
+def rules(keys):
+    """Par KPI : mode (SUM/WAVG/MIN), index du KPI de pondération (-1 = GLA, -2 = poids égaux), décimales."""
+    ix={k:i for i,k in enumerate(keys)}; mode=[]; wk=[]; dec=[]
+    for k in keys:
+        _,fr,en,u,agg,dep,h2,b,base=B.KMETA[k]; w=WEIGHT.get(k)
+        if k in LOWEST: mode.append(MIN); wk.append(-2)
+        elif w is None and u in SUMMED and agg in ("SUM","LAST"): mode.append(SUM); wk.append(-2)
+        else: mode.append(WAVG); wk.append(-1 if w==GLA else ix.get(w,-2))
+        dec.append(B.decimals(u,agg))
+    return np.array(mode),np.array(wk),np.array(dec)
+
+def stack(sites,keys):
+    """{site: (données, GLA m²)} -> S (site, KPI, mois) en float (NaN = vide), gla (site,)."""
+    S=np.array([[[np.nan if v is None else v for v in data[k]] for k in keys] for data,gla in sites.values()],dtype=float)
+    return S,np.array([gla for data,gla in sites.values()],dtype=float)
+
+def aggregate(S,gla,mode,wk):
+    """Une passe vectorisée sur tous les KPI : (site, KPI, mois) -> (KPI, mois)."""
+    ok=~np.isnan(S); S0=np.where(ok,S,0.0)
+    W=np.ones_like(S); kw=wk>=0
+    W[:,kw,:]=S0[:,wk[kw],:]; W[:,wk==-1,:]=gla[:,None,None]
+    W=np.where(ok,W,0.0)
+    tot=S0.sum(0); den=W.sum(0)
+    with np.errstate(invalid="ignore",divide="ignore"): wavg=(S0*W).sum(0)/den
+    low=np.where(ok,S,np.inf).min(0)
+    m=mode[:,None]
+    out=np.where(m==SUM,tot,np.where(m==MIN,low,wavg))
+    return np.where(ok.any(0),out,np.nan)
+
+def consolidate(sites):
+    """{site: (données, GLA)} -> données groupe (forme gen_data), arrondies comme la saisie."""
+    keys=list(B.KMETA); mode,wk,dec=rules(keys)
+    S,gla=stack(sites,keys); X=aggregate(S,gla,mode,wk)
+    for d in np.unique(dec): X[dec==d]=np.round(X[dec==d],int(d))
+    return {k:[None if np.isnan(v) else (int(v) if dec[i]==0 else float(v)) for v in X[i]] for i,k in enumerate(keys)}
+
+def demo_sites(n):
+    """n centres de démo : données reproductibles par centre, GLA tirée autour de celle de Cosmos."""
+    rng=np.random.default_rng(7)
+    return {"site-%02d"%i:(B.gen_data("site-%02d"%i),float(rng.uniform(12000,30000))) for i in range(1,n+1)}
+
+def build_group(fn,sites,cached=False,cache=None,jobs=None):
+    """Classeur groupe : données consolidées -> mêmes builders et renderers que le classeur centre."""
+    import xlsave, xlcalc
+    ctx=B.Build(cache); nrules=B.assemble(ctx,consolidate(sites))
+    xlsave.save(ctx.wb,fn,xlcalc.evaluate(ctx.wb) if cached else None,jobs=jobs)
+    print("GROUPE:",len(sites),"centres | CF rules:",nrules,"| cached:",cached)
+    return ctx
+
+if __name__=="__main__":
+    import argparse, os
+    ap=argparse.ArgumentParser(description="Rapport groupe consolidé (tous centres)")
+    ap.add_argument("out",nargs="?",default="Cosmos-Groupe.xlsx")
+    ap.add_argument("--sites",type=int,default=5,help="nombre de centres de démo consolidés")
+    ap.add_argument("--store",help="magasin KPI persistant : consolide ses sites au lieu des centres de démo (kpistore)")
+    ap.add_argument("--cached",action="store_true",help="écrit les résultats des formules en cache")
+    ap.add_argument("--cache",default=os.path.join(os.path.dirname(os.path.abspath(__file__)),".cache"),
+                    help="cache disque des fragments départements du rapport")
+    ap.add_argument("--no-cache",dest="cache",action="store_const",const=None,help="rendu complet sans cache")
+    ap.add_argument("--jobs",type=int,help="processus de sérialisation des feuilles à la sauvegarde")
+    a=ap.parse_args()
+    if a.store:
+        import kpistore
+        sites={s:(S.data(),S.meta["gla"] or B.building("GLA totale")) for s,S in
+               ((s,kpistore.Store(a.store,s)) for s in kpistore.Store.sites(a.store))}
+    else: sites=demo_sites(a.sites)
+    build_group(a.out,sites,cached=a.cached,cache=a.cache,jobs=a.jobs)
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""KPI énergie (C8) depuis les relevés horaires des sous-compteurs, stockés en binaire à largeur fixe et mappés en mémoire.
+Magasin : <dossier>/meters.f4, matrice float32 (compteur × heure de la fenêtre de 36 mois, NaN = pas de relevé),
+un compteur par bloc contigu ; <dossier>/meters.json liste les compteurs (ordre des blocs), 1re heure et nb d'heures.
+Un magasin écrit pour une autre fenêtre (BASE_YEAR / N_MONTHS) est réaligné à l'ouverture (heures communes gardées).
+Un compteur nouveau ajoute un bloc en fin de fichier ; un relevé s'écrit en place. Les agrégats mensuels
+(np.add.reduceat) parcourent le fichier par paquets de compteurs : trois ans d'historique sans tout charger en RAM.
+
+Relevés CSV (en-tête) : compteur, horodatage (début d'heure, AAAA-MM-JJ HH:MM), kwh."""
+import csv, itertools, json, os
+import numpy as np
+import build_cosmos as B
+from periods import BASE_YEAR
+
+GLA=B.building("GLA totale")   # m² : intensité kWh/m²
+TARIFF=(105.0,145.0)   # FCFA/kWh : heures creuses (22h-6h), heures pleines
+PEAK=(6,22)
+INDEX=0.03   # budget par défaut : coût du même mois N-1 + indexation
+CHUNK=250000; BLOCK=16   # lignes CSV par bloc ; compteurs par paquet de lecture
+
+START=np.datetime64("%d-01-01T00"%BASE_YEAR,"h")
+MONTHS=(np.datetime64("%d-01"%BASE_YEAR,"M")+np.arange(B.N_MONTHS+1)).astype("datetime64[h]")
+HOURS=int((MONTHS[-1]-START).astype(np.int64))
+M0=(MONTHS[:-1]-START).astype(np.int64)   # 1re heure de chaque mois (reduceat)
+
+def tariff():
+    """Prix FCFA/kWh de chaque heure de la fenêtre."""
+    h=np.arange(HOURS)%24
+    return np.where((h>=PEAK[0])&(h<PEAK[1]),TARIFF[1],TARIFF[0])
+
+class Store:
+    def __init__(self,folder):
+        self.folder=folder; self.bin=os.path.join(folder,"meters.f4"); self.head=os.path.join(folder,"meters.json")
+        os.makedirs(folder,exist_ok=True)
+        self.meters=[]
+        if os.path.exists(self.head):
+            with open(self.head,encoding="utf-8") as f: h=json.load(f)
+            self.meters=h["meters"]
+            if h["meters"] and (h["start"],h["hours"])!=(str(START),HOURS): self.relayout(np.datetime64(h["start"],"h"),h["hours"])
+        self.row={m:i for i,m in enumerate(self.meters)}
+
+    def save_head(self):
+        tmp=self.head+".tmp"
+        with open(tmp,"w",encoding="utf-8") as f: json.dump({"meters":self.meters,"start":str(START),"hours":HOURS},f)
+        os.replace(tmp,self.head)
+
+    def relayout(self,start,hours,block=BLOCK):
+        """Blocs écrits pour la fenêtre (start, hours) -> fenêtre courante, par paquets de compteurs."""
+        old=np.memmap(self.bin,np.float32,"r",shape=(len(self.meters),hours)); d=int((start-START).astype(np.int64))
+        lo,hi=max(d,0),min(d+hours,HOURS); tmp=self.bin+".tmp"
+        with open(tmp,"wb") as f:
+            for i in range(0,len(self.meters),block):
+                x=np.full((min(block,len(self.meters)-i),HOURS),np.nan,np.float32)
+                if lo<hi: x[:,lo:hi]=old[i:i+block,lo-d:hi-d]
+                f.write(x.tobytes())
+        del old; os.replace(tmp,self.bin); self.save_head()
+
+    def map(self,mode="r"):
+        return np.memmap(self.bin,np.float32,mode,shape=(len(self.meters),HOURS)) if self.meters else None
+
+    def add(self,names):
+        """Nouveaux compteurs : un bloc NaN chacun en fin de fichier."""
+        new=[m for m in dict.fromkeys(names) if m not in self.row]
+        if not new: return
+        blank=np.full(HOURS,np.nan,np.float32).tobytes()
+        with open(self.bin,"ab") as f:
+            for m in new: f.write(blank); self.row[m]=len(self.meters); self.meters.append(m)
+        self.save_head()
+
+    def ingest(self,fn,size=CHUNK):
+        """Relevés CSV -> écriture en place (dernier relevé d'une heure gagnant). Renvoie le nombre de relevés retenus."""
+        n=0
+        with open(fn,newline="",encoding="utf-8") as f:
+            rd=csv.reader(f); head=[h.strip().lower() for h in next(rd)]
+            ix=[head.index(c) for c in ("compteur","horodatage","kwh")]
+            while True:
+                rows=list(itertools.islice(rd,size))
+                if not rows: return n
+                m,t,v=([r[i] for r in rows] for i in ix)
+                h=(np.char.replace(np.array(t)," ","T").astype("datetime64[h]")-START).astype(np.int64)
+                ok=(h>=0)&(h<HOURS)
+                self.add(m)
+                r=np.array([self.row[x] for x in m])
+                X=self.map("r+"); X[r[ok],h[ok]]=np.array(v,dtype=np.float32)[ok]; X.flush(); del X
+                n+=int(ok.sum())
+
+    def monthly(self,block=BLOCK):
+        """kWh, coût et heures relevées par mois (sommes sur les compteurs), lecture par paquets de compteurs."""
+        kwh=np.zeros(B.N_MONTHS); cost=np.zeros(B.N_MONTHS); seen=np.zeros(B.N_MONTHS)
+        X=self.map(); p=tariff()
+        for i in range(0,len(self.meters),block):
+            x=np.asarray(X[i:i+block],dtype=np.float64); ok=~np.isnan(x); x=np.where(ok,x,0.0)
+            kwh+=np.add.reduceat(x,M0,axis=1).sum(0); cost+=np.add.reduceat(x*p,M0,axis=1).sum(0)
+            seen+=np.add.reduceat(ok,M0,axis=1).sum(0)
+        return kwh,cost,seen
+
+def kpis(kwh,cost,seen,gla=GLA,budget=None):
+    """Séries C8 : consommation (kWh), intensité (kWh/m²), coût vs budget ; lignes de la section 9.2.1 (6 derniers mois relevés).
+    budget : FCFA par mois ; défaut : coût du même mois N-1 × (1 + INDEX)."""
+    ok=seen>0
+    if budget: bud=np.full(B.N_MONTHS,float(budget))
+    else:
+        py=np.concatenate([np.zeros(12,bool),ok[:-12]])
+        bud=np.where(py,np.concatenate([np.zeros(12),cost[:-12]])*(1+INDEX),np.nan)
+    with np.errstate(invalid="ignore",divide="ignore"): ratio=cost/bud
+    val=lambda x,nd:[None if not k or np.isnan(v) else (int(round(v)) if nd==0 else round(float(v),nd)) for v,k in zip(x,ok)]
+    out={"kpi.fac.consumption":val(kwh,0),"kpi.fac.energy_int":val(kwh/gla,2),"kpi.fac.util_cost":val(ratio,4)}
+    months=[m for m in np.nonzero(ok)[0]][-6:]
+    rows=[("%d-%02d"%(BASE_YEAR+m//12,m%12+1),int(round(kwh[m])),int(round(cost[m])),
+           None if np.isnan(ratio[m]) else round(float(ratio[m]-1),4)) for m in months]
+    return out,rows
+
+def refresh(folder,files=(),gla=GLA,budget=None):
+    """Ingère les relevés CSV éventuels puis agrège le magasin : (séries KPI, lignes 9.2.1)."""
+    S=Store(folder)
+    for fn in files: S.ingest(fn)
+    return kpis(*S.monthly(),gla=gla,budget=budget)
+
+def demo_readings(fn,meters=40,seed=1):
+    """Relevés de démo : profil horaire d'ouverture, saison chaude (clim), ~250 MWh / mois au total."""
+    rng=np.random.default_rng(seed); t=START+np.arange(HOURS)
+    h=np.arange(HOURS)%24; doy=(t.astype("datetime64[D]")-t.astype("datetime64[Y]")).astype(np.int64)
+    base=np.where((h>=8)&(h<22),1.0,0.35)*(1+0.25*np.cos(2*np.pi*(doy-80)/365))
+    ts=[str(x).replace("T"," ")+":00" for x in t]
+    with open(fn,"w",encoding="utf-8") as f:
+        f.write("compteur,horodatage,kwh\n")
+        for i in range(meters):
+            v=np.round(base*rng.uniform(7,20)*rng.uniform(0.9,1.1,HOURS),2)
+            f.write("".join("CPT-%03d,%s,%s\n"%(i,a,b) for a,b in zip(ts,v)))
+
+if __name__=="__main__":
+    import argparse, time
+    ap=argparse.ArgumentParser(description="Relevés horaires des sous-compteurs -> KPI énergie C8 (magasin mappé en mémoire)")
+    ap.add_argument("store",help="dossier du magasin binaire (meters.f4 / meters.json)")
+    ap.add_argument("csv",nargs="*",help="relevés CSV à ingérer")
+    ap.add_argument("--budget",type=float,help="budget utilities FCFA / mois (défaut : N-1 indexé)")
+    ap.add_argument("--demo",type=int,metavar="N",help="écrit d'abord des relevés de démo de N compteurs dans le 1er CSV")
+    a=ap.parse_args()
+    if a.demo and a.csv: demo_readings(a.csv[0],a.demo)
+    t=time.perf_counter(); k,rows=refresh(a.store,a.csv,budget=a.budget)
+    for key,v in k.items(): print("  %-22s"%key," ".join(str(x) for x in v[-6:]))
+    for r in rows: print("  ",*r)
+    print("ENERGY: %.2fs"%(time.perf_counter()-t))
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""Agrégation des compteurs de fréquentation (C4) : fichiers d'intervalles 15 min, un par entrée.
+Lecture incrémentale : chaque fichier est repris à l'octet où la passe précédente s'est arrêtée (lignes complètes),
+et un filigrane par entrée écarte les intervalles déjà comptés (fichier renvoyé ou réécrit).
+Les blocs lus sont agrégés par group-by vectorisés (numpy) dans des cumuls mensuels persistés avec l'état :
+total, heures (pointe), week-end, personnes-minutes (durée de visite, loi de Little), zones.
+
+Fichier compteur CSV (en-tête) : horodatage (début d'intervalle, AAAA-MM-JJ HH:MM), entrees[, sorties].
+L'entrée est le nom du fichier (sans extension) ; ZONES la rattache à une zone de la section 5.1."""
+import glob, json, os
+import numpy as np
+import build_cosmos as B
+from periods import BASE_YEAR
+
+SLOT=15; SLOTS=24*60//SLOT
+GLA=B.building("GLA totale")   # m² : Footfall /m²
+ZONES={"main":"Entrée principale / Main","parking":"Parking","food":"Food court",
+       "nord":"Galerie Nord / North mall","sud":"Galerie Sud / South mall"}
+STATE=".footfall.json"
+
+class Footfall:
+    """Cumuls mensuels + positions de lecture (octets) et filigranes (dernier intervalle compté) par entrée."""
+    def __init__(self,n=B.N_MONTHS):
+        self.n=n; self.month0=np.datetime64("%d-01"%BASE_YEAR,"M")
+        self.total=np.zeros(n); self.weekend=np.zeros(n); self.hours=np.zeros((n,24))
+        self.pmin=np.zeros(n); self.tracked=np.zeros(n)   # personnes-minutes / entrées des intervalles avec sorties
+        self.zones={}; self.offsets={}; self.watermark={}
+
+    # ------------------------------------------------------------ état
+    @classmethod
+    def load(cls,fn):
+        self=cls()
+        if fn and os.path.exists(fn):
+            with open(fn,encoding="utf-8") as f: st=json.load(f)
+            for k in ("total","weekend","hours","pmin","tracked"): setattr(self,k,np.array(st[k],dtype=float))
+            self.zones={z:np.array(v,dtype=float) for z,v in st["zones"].items()}
+            self.offsets=st["offsets"]; self.watermark={e:np.datetime64(w) for e,w in st["watermark"].items()}
+        return self
+
+    def save(self,fn):
+        st={k:getattr(self,k).tolist() for k in ("total","weekend","hours","pmin","tracked")}
+        st.update(zones={z:v.tolist() for z,v in self.zones.items()},offsets=self.offsets,
+                  watermark={e:str(w) for e,w in self.watermark.items()})
+        tmp=fn+".tmp"
+        with open(tmp,"w",encoding="utf-8") as f: json.dump(st,f)
+        os.replace(tmp,fn)
+
+    # ------------------------------------------------------------ lecture
+    def read(self,fn):
+        """Lignes complètes ajoutées depuis la dernière passe -> feed(). Renvoie le nombre d'intervalles comptés."""
+        entrance=os.path.splitext(os.path.basename(fn))[0]
+        with open(fn,"rb") as f:
+            head=f.readline(); cols=[c.strip().lower() for c in head.decode("utf-8").split(",")]
+            off=self.offsets.get(fn,0)
+            if off<len(head) or off>os.fstat(f.fileno()).st_size: off=len(head)   # nouveau fichier, tronqué ou remplacé
+            f.seek(off); buf=f.read()
+        end=buf.rfind(b"\n")+1   # ligne en cours d'écriture : reprise au prochain passage
+        self.offsets[fn]=off+end
+        lines=buf[:end].decode("utf-8").splitlines()
+        if not lines: return 0
+        rows=np.array([l.split(",") for l in lines]).T
+        get=lambda c:rows[cols.index(c)] if c in cols else None
+        outs=get("sorties")
+        return self.feed(entrance,np.char.replace(get("horodatage")," ","T").astype("datetime64[m]"),
+                         get("entrees").astype(float),None if outs is None else outs.astype(float))
+
+    def feed(self,entrance,ts,ins,outs=None):
+        """Un bloc d'intervalles d'une entrée (group-by vectorisés sur mois / heure / jour)."""
+        wm=self.watermark.get(entrance)
+        keep=np.ones(len(ts),bool) if wm is None else ts>wm
+        m=(ts.astype("datetime64[M]")-self.month0).astype(np.int64); keep&=(m>=0)&(m<self.n)
+        if not keep.any(): return 0
+        ts,ins,m=ts[keep],ins[keep],m[keep]
+        self.watermark[entrance]=max(ts.max(),wm) if wm is not None else ts.max()
+        mins=(ts-ts.astype("datetime64[D]")).astype(np.int64)
+        wd=(ts.astype("datetime64[D]").astype(np.int64)+3)%7   # 0 = lundi (1970-01-01 : jeudi)
+        n=self.n
+        self.total+=np.bincount(m,ins,n)
+        self.weekend+=np.bincount(m,ins*(wd>=5),n)
+        self.hours+=np.bincount(m*24+mins//60,ins,n*24).reshape(n,24)
+        if outs is not None:   # occupation intégrée jusqu'à minuit : (entrées - sorties) × temps restant du jour
+            outs=outs[keep]; self.pmin+=np.bincount(m,(ins-outs)*(SLOTS-mins//SLOT)*SLOT,n); self.tracked+=np.bincount(m,ins,n)
+        z=ZONES.get(entrance,entrance)
+        self.zones[z]=self.zones.get(z,np.zeros(n))+np.bincount(m,ins,n)
+        return int(keep.sum())
+
+    # ------------------------------------------------------------ sorties
+    def kpis(self,gla=GLA):
+        """Séries C4 (forme gen_data) ; None pour les mois sans comptage."""
+        t=self.total; ok=t>0; d=np.where(ok,t,1.0); dt=np.where(self.tracked>0,self.tracked,1.0)
+        ser=lambda x,nd,mask=ok:[None if not k else (int(round(v)) if nd==0 else round(float(v),nd)) for v,k in zip(x,mask)]
+        return {"kpi.foot.total":ser(t,0),"kpi.foot.per_sqm":ser(t/gla,2),
+                "kpi.foot.peak_share":ser(self.hours.max(1)/d,4),"kpi.foot.weekend_share":ser(self.weekend/d,4),
+                "kpi.foot.dwell":ser(self.pmin/dt,2,self.tracked>0)}
+
+    def zone_rows(self,m=None):
+        """Lignes de la section 5.1 (zone, visites, part, Δ vs N-1) pour le mois m (défaut : dernier mois compté)."""
+        if m is None:
+            nz=np.nonzero(self.total)[0]
+            if not len(nz): return []
+            m=int(nz[-1])
+        rows=[]
+        for z,v in sorted(self.zones.items(),key=lambda zv:-zv[1][m]):
+            py=v[m-12] if m>=12 else 0
+            rows.append((z,int(v[m]),round(float(v[m]/self.total[m]),4) if self.total[m] else None,
+                         round(float(v[m]/py-1),4) if py else None))
+        return rows
+
+def refresh(folder,state=None,gla=GLA):
+    """Passe incrémentale sur les fichiers compteurs du dossier ; état persisté (défaut : folder/.footfall.json).
+    Renvoie (séries KPI C4, lignes de la section 5.1)."""
+    state=state or os.path.join(folder,STATE); F=Footfall.load(state)
+    for fn in sorted(glob.glob(os.path.join(folder,"*.csv"))): F.read(fn)
+    F.save(state)
+    return F.kpis(gla),F.zone_rows()
+
+def demo_counters(folder,start="2024-01",months=B.N_MONTHS,seed=1):
+    """Fichiers de démo : 5 entrées, intervalles 9h-22h, pic en soirée, week-end renforcé, visite ~45 min (ajout en fin de fichier)."""
+    rng=np.random.default_rng(seed); os.makedirs(folder,exist_ok=True)
+    m0=np.datetime64(start,"M"); days=np.arange(m0.astype("datetime64[D]"),(m0+months).astype("datetime64[D]"))
+    slots=np.arange(9*60,22*60,SLOT); ts=(days[:,None].astype("datetime64[m]")+slots[None,:]).ravel()
+    prof=np.interp(slots,[540,720,1080,1260,1320],[0.3,0.8,1.0,0.7,0.1]); wd=(days.astype(np.int64)+3)%7
+    for e,w in zip(ZONES,(0.36,0.20,0.175,0.15,0.115)):
+        lam=w*340*prof[None,:]*np.where(wd>=5,1.5,1.0)[:,None]
+        ins=rng.poisson(lam); outs=np.zeros_like(ins); outs[:,3:]=ins[:,:-3]; outs[:,-1]+=ins[:,-3:].sum(1)   # tout le monde sort avant la fermeture
+        fn=os.path.join(folder,e+".csv"); new=not os.path.exists(fn)
+        with open(fn,"a",encoding="utf-8") as f:
+            if new: f.write("horodatage,entrees,sorties\n")
+            f.write("".join("%s,%d,%d\n"%(str(t).replace("T"," "),i,o) for t,i,o in zip(ts,ins.ravel(),outs.ravel())))
+
+if __name__=="__main__":
+    import argparse, time
+    ap=argparse.ArgumentParser(description="Compteurs de fréquentation 15 min -> KPI C4 (passe incrémentale)")
+    ap.add_argument("folder",help="dossier des fichiers compteurs (un CSV par entrée)")
+    ap.add_argument("--state",help="état persistant (défaut : folder/.footfall.json)")
+    ap.add_argument("--gla",type=float,default=GLA)
+    ap.add_argument("--demo",metavar="AAAA-MM:N",help="ajoute d'abord N mois de démo à partir de AAAA-MM")
+    a=ap.parse_args()
+    if a.demo:
+        s,n=a.demo.split(":"); demo_counters(a.folder,s,int(n))
+    t=time.perf_counter(); k,z=refresh(a.folder,a.state,a.gla)
+    for key,v in k.items(): print("  %-24s"%key," ".join(str(x) for x in v[-6:]))
+    for r in z: print("  ",*r)
+    print("FOOTFALL: %.2fs"%(time.perf_counter()-t))
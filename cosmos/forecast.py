@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""Atterrissage fin d'année de tous les KPI, calculé en bloc (numpy) pour chaque mois de la fenêtre de 36 mois.
+Au mois t, l'année de t est connue jusqu'à t (cumul depuis janvier) ; les mois restants sont estimés par :
+  run-rate      moyenne mensuelle de l'année à date ;
+  saisonnier    même mois des années précédentes (moyenne), × croissance de l'année à date sur ces mêmes mois ;
+  budget        plan mensuel de M1 (budget_plan), × taux d'atteinte de l'année à date.
+Atterrissage = mélange pondéré par le budget : part des mois restants (12 - m) / 12 sur l'estimation budget, le reste
+sur le saisonnier (à défaut le run-rate). Agrégation du KPI respectée : SUM -> total annuel, AVG / RATIO -> moyenne
+des 12 mois, LAST -> valeur de décembre (dernière valeur × rapport déc. / mois courant du profil)."""
+import numpy as np
+import build_cosmos as B
+from periods import BASE_YEAR
+
+def matrix(data,keys):
+    return np.array([[np.nan if v is None else v for v in data.get(k,[None]*B.N_MONTHS)] for k in keys],dtype=float)
+
+def methods(data,keys=None):
+    """{méthode: (KPI, mois)} pour run_rate, seasonal, budget et landing ; NaN = non estimable."""
+    keys=list(B.KMETA) if keys is None else keys; K=len(keys); ny=B.N_MONTHS//12
+    agg=np.array([B.KMETA[k][4] for k in keys])[:,None,None]
+    Y=matrix(data,keys).reshape(K,ny,12); ok=~np.isnan(Y); V=np.where(ok,Y,0.0)
+    rem=(11-np.arange(12))[None,None,:]                       # mois restants après le mois courant
+    cs=lambda x:np.cumsum(x,axis=2)
+    after=lambda x:x.sum(2,keepdims=True)-cs(x)               # somme des mois suivants
+    ytd,n=cs(V),cs(ok)
+    # profil saisonnier : moyenne du même mois sur les années précédentes de la fenêtre
+    pn=np.cumsum(ok,axis=1)-ok; ps=np.cumsum(V,axis=1)-V
+    with np.errstate(invalid="ignore",divide="ignore"):
+        base=ps/pn; bok=pn>0
+        P=np.array([B.budget_plan(k) or [np.nan]*12 for k in keys],dtype=float)[:,None,:]*np.ones((1,ny,1)); pok=~np.isnan(P)
+        def rest(path,has):
+            """Mois restants estimés : chemin × (réalisé / chemin sur les mêmes mois à date) ; NaN si le chemin a un trou."""
+            both=ok&has; g=cs(np.where(both,V,0.0))/cs(np.where(both,path,0.0))
+            full=after(has.astype(int))==rem                      # chemin connu pour tous les mois restants
+            return np.where(full,g*after(np.where(has,path,0.0)),np.nan)
+        r_rr=ytd/n*rem; r_sn=rest(base,bok); r_bw=rest(P,pok)
+        tot=lambda r:np.where(agg=="SUM",ytd+r,(ytd+r)/(n+rem))
+        cur=np.where(ok,Y,np.nan)
+        last=lambda path:path[:,:,11:]*cur/path
+        rr,sn,bw=(np.where(agg=="LAST",lt,tot(r)) for r,lt in ((r_rr,cur),(r_sn,last(base)),(r_bw,last(P))))
+    good=lambda x:np.where(np.isfinite(x),x,np.nan)
+    rr,sn,bw=good(rr),good(sn),good(bw)
+    w=rem/12; other=np.where(np.isnan(sn),rr,sn)
+    land=np.where(np.isnan(bw),other,np.where(np.isnan(other),bw,w*bw+(1-w)*other))
+    land=np.where(n>0,land,np.nan)                             # rien de réalisé dans l'année : pas d'atterrissage
+    flat=lambda x:x.reshape(K,B.N_MONTHS)
+    return {"run_rate":flat(rr),"seasonal":flat(sn),"budget":flat(bw),"landing":flat(land)}
+
+def landing(data):
+    """{clé: [36 atterrissages]} (forme gen_data ; None = non estimable). % à 4 décimales, montants FCFA entiers, sinon 2."""
+    keys=list(B.KMETA); L=methods(data,keys)["landing"]
+    nd=lambda u:4 if B.is_pct(u) else (0 if u.startswith("FCFA") else 2)
+    return {k:[None if np.isnan(v) else round(float(v),nd(B.KMETA[k][3])) for v in L[i]] for i,k in enumerate(keys)}
+
+if __name__=="__main__":
+    import argparse, time
+    ap=argparse.ArgumentParser(description="Atterrissage fin d'année de tous les KPI (run-rate, saisonnier, budget, mélange)")
+    ap.add_argument("--annee",type=int,default=2026); ap.add_argument("--mois",type=int,default=6)
+    ap.add_argument("--retours",nargs="*",help="classeurs retournés (défaut : magasin KPI, sinon données de démo)")
+    ap.add_argument("--store",help="magasin KPI persistant (kpistore)"); ap.add_argument("--site",default="cosmos")
+    a=ap.parse_args()
+    import kpistore; data=kpistore.source(a.store,a.site,a.retours)
+    t=time.perf_counter(); M=methods(data); keys=list(B.KMETA); j=(a.annee-BASE_YEAR)*12+a.mois-1; dt=time.perf_counter()-t
+    print("%d-%02d %-28s %14s %14s %14s %14s"%(a.annee,a.mois,"",*M))
+    for i,k in enumerate(keys): print("  %-33s"%k," ".join("%14s"%("" if np.isnan(M[m][i,j]) else "%.4g"%M[m][i,j]) for m in M))
+    print("FORECAST: %.3fs"%dt)
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""Fragments de rapport : un bloc rendu à l'origine locale (ligne 1) dans un classeur brouillon est capturé
+(cellules + styles, fusions, hauteurs/largeurs, sauts de page, MFC, graphiques, icônes, lignes d'aide M5),
+mis en cache disque sous son empreinte, puis recollé dans le vrai classeur avec les décalages de lignes voulus.
+Les blocs rendus dans un layout.Plan sont conservés tels quels (plan détaché) et recollés par Plan.paste.
+Les formules sont stockées sous forme canonique (cfplan.canon) : seules les réfs relatives suivent le décalage."""
+import copy, hashlib, os, pickle, re, threading
+from openpyxl.cell.cell import MergedCell
+from openpyxl.styles.cell_style import StyleArray
+from openpyxl.styles.numbers import BUILTIN_FORMATS_MAX_SIZE, BUILTIN_FORMATS_REVERSE
+from openpyxl.utils import column_index_from_string
+from openpyxl.utils.cell import coordinate_from_string
+from openpyxl.worksheet.cell_range import CellRange
+from openpyxl.worksheet.merge import MergedCellRange
+from openpyxl.worksheet.pagebreak import Break
+from cfplan import canon, render
+
+VERSION=2   # à incrémenter si le format des fragments change
+_AREF=re.compile(r"^(.+)!\$([A-Z]{1,3})\$(\d+)(?::\$([A-Z]{1,3})\$(\d+))?$")
+
+def fingerprint(*parts):
+    """Empreinte stable des entrées d'un fragment (types simples : str, nombres, tuples, listes, dicts)."""
+    return hashlib.sha1(repr((VERSION,)+parts).encode("utf-8")).hexdigest()
+
+def code(*modules):
+    """Empreinte des sources des modules (fichiers entiers) : toute modification du code de rendu invalide le cache."""
+    h=hashlib.sha1()
+    for m in modules:
+        with open(m.__file__,"rb") as f: h.update(f.read())
+    return h.hexdigest()
+
+class CFLog:
+    """Remplace CFPlan pendant la capture : garde les demandes brutes, dans l'ordre."""
+    def __init__(self): self.items=[]
+    def add(self,ws,rng,rule): self.items.append((ws.title,rng,rule))
+
+# ---------------------------------------------------------------- capture
+def _sheet(ws):
+    wb=ws.parent; styles=[]; sidx={}; cells=[]; mcells=[]
+    for (r,c),cl in ws._cells.items():
+        si=None
+        if cl.has_style:
+            k=tuple(cl._style); si=sidx.get(k)
+            if si is None:
+                sa=cl._style; si=sidx[k]=len(styles)
+                styles.append((k,wb._fonts[sa.fontId],wb._fills[sa.fillId],wb._borders[sa.borderId],
+                               wb._alignments[sa.alignmentId],wb._protections[sa.protectionId],cl.number_format))
+        if isinstance(cl,MergedCell):
+            if si is not None: mcells.append((r,c,si))
+            continue
+        v=cl._value
+        if cl.data_type=="f" and isinstance(v,str): v=("f",canon(v,r,c)[0])
+        cells.append((r,c,v,si,cl._hyperlink))
+    return {"cells":cells,"mcells":mcells,"styles":styles,
+            "merges":[m.coord for m in ws.merged_cells.ranges],
+            "heights":{r:d.height for r,d in ws.row_dimensions.items() if d.height is not None},
+            "widths":{k:d.width for k,d in ws.column_dimensions.items()},
+            "breaks":[b.id for b in ws.row_breaks.brk],
+            "charts":list(ws._charts),"images":list(ws._images)}
+
+def capture(sheets,cflog,plans=()):
+    """Feuilles brouillon et plans détachés (rendus à l'origine locale) + journal MFC -> fragment (dict sérialisable)."""
+    cf=[]
+    for title,rng,rule in cflog.items:
+        cr=CellRange(rng.split()[0])
+        forms=[canon(f,cr.min_row,cr.min_col)[0] for f in rule.formula] if rule.type=="expression" else None
+        cf.append((title,rng,rule,forms))
+    return {"sheets":{ws.title:_sheet(ws) for ws in sheets},"plans":{p.title:p.intern() for p in plans},"cf":cf}
+
+# ---------------------------------------------------------------- cache disque
+def load(cache_dir,key):
+    try:
+        with open(os.path.join(cache_dir,key+".pkl"),"rb") as f: return pickle.load(f)
+    except (OSError,EOFError,pickle.UnpicklingError,AttributeError,ImportError): return None
+
+def store(cache_dir,key,frag):
+    os.makedirs(cache_dir,exist_ok=True)
+    fn=os.path.join(cache_dir,key+".pkl"); tmp=fn+".%d.%d.tmp"%(os.getpid(),threading.get_ident())
+    with open(tmp,"wb") as f: pickle.dump(frag,f,protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp,fn)
+
+# ---------------------------------------------------------------- recollage
+def _style(wb,st):
+    k,font,fl,border,al,prot,nf=st; sa=StyleArray(k)
+    sa.fontId=wb._fonts.add(font); sa.fillId=wb._fills.add(fl); sa.borderId=wb._borders.add(border)
+    sa.alignmentId=wb._alignments.add(al); sa.protectionId=wb._protections.add(prot)
+    sa.numFmtId=BUILTIN_FORMATS_REVERSE.get(nf) if nf in BUILTIN_FORMATS_REVERSE else wb._number_formats.add(nf)+BUILTIN_FORMATS_MAX_SIZE
+    return sa
+
+def _cell_shift(sh,coord):
+    col,r=coordinate_from_string(coord)
+    return f"{col}{r+sh(r,column_index_from_string(col))}"
+
+def _shift_ref(f,targets):
+    m=_AREF.match(f or "")
+    if not m: return f
+    title=m.group(1); t=targets.get(title[1:-1].replace("''","'") if title.startswith("'") else title)
+    if t is None: return f
+    c1,r1,c2,r2=m.group(2),int(m.group(3)),m.group(4),m.group(5)
+    d=t[1](r1,column_index_from_string(c1))
+    out=f"{title}!${c1}${r1+d}"
+    return out+(f":${c2}${int(r2)+d}" if c2 else "")
+
+def _chart_refs(ch):
+    for part in ch._charts:
+        for ser in part.series:
+            for src in (ser.val,ser.cat,ser.tx,getattr(ser,"xVal",None),getattr(ser,"yVal",None)):
+                for ref in (getattr(src,"numRef",None),getattr(src,"strRef",None)):
+                    if ref is not None: yield ref
+
+def splice(frag,targets,cf):
+    """Recolle le fragment. targets : {titre: (feuille ou plan, décalage(r,c)->dr)} ; cf : CFPlan cible."""
+    for title,sub in frag.get("plans",{}).items():
+        for ch in sub.charts:
+            for ref in _chart_refs(ch): ref.f=_shift_ref(ref.f,targets)
+        targets[title][0].paste(sub,targets[title][1])
+    for title,blk in frag["sheets"].items():
+        ws,sh=targets[title]; wb=ws.parent
+        sas=[None]*len(blk["styles"])
+        def sa(si):
+            if sas[si] is None: sas[si]=_style(wb,blk["styles"][si])
+            return copy.copy(sas[si])
+        for r,c,v,si,link in blk["cells"]:
+            d=sh(r,c)
+            if type(v) is tuple: v=render(v[1],r+d,c)
+            cl=ws.cell(r+d,c,v)
+            if si is not None: cl._style=sa(si)
+            if link is not None: cl.hyperlink=link
+        for coord in blk["merges"]:   # sans MergedCellRange.format() : les styles des cellules fusionnées sont rejoués tels quels
+            cr=CellRange(coord); cr.shift(row_shift=sh(cr.min_row,cr.min_col))
+            mcr=MergedCellRange(ws,cr.coord); ws.merged_cells.add(mcr)
+            cells=mcr.cells; next(cells)
+            for r,c in cells: ws._cells[r,c]=MergedCell(ws,r,c)
+        for r,c,si in blk["mcells"]: ws.cell(r+sh(r,c),c)._style=sa(si)
+        for r,h in blk["heights"].items(): ws.row_dimensions[r+sh(r,1)].height=h
+        for k,w in blk["widths"].items(): ws.column_dimensions[k].width=w
+        for r in blk["breaks"]: ws.row_breaks.append(Break(id=r+sh(r,1)))
+        for ch in blk["charts"]:
+            for ref in _chart_refs(ch): ref.f=_shift_ref(ref.f,targets)
+            ws.add_chart(ch,_cell_shift(sh,ch.anchor))
+        for im in blk["images"]: ws.add_image(im,_cell_shift(sh,im.anchor))
+    for title,rng,rule,forms in frag["cf"]:
+        ws,sh=targets[title]; crs=[CellRange(x) for x in rng.split()]
+        for cr in crs: cr.shift(row_shift=sh(cr.min_row,cr.min_col))
+        if forms: rule.formula=[render(f,crs[0].min_row,crs[0].min_col) for f in forms]
+        cf.add(ws," ".join(cr.coord for cr in crs),rule)
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""Relecture des collectes retournées (C1–C8) : seules les plages de saisie connues sont lues
+(lignes KPI + grille de commentaires, colonnes mois), en lecture seule streamée, plusieurs classeurs en parallèle.
+Chaque valeur est contrôlée contre KMETA puis versée dans un jeu long (une ligne par KPI × mois) avec sa provenance."""
+import datetime, os
+from concurrent.futures import ProcessPoolExecutor
+from openpyxl import load_workbook
+from openpyxl.utils import get_column_letter
+import build_cosmos as B
+from periods import BASE_YEAR
+
+COLUMNS=("dept","key","period","value","comment","file","sheet","cell","mtime")
+PCT_MAX=10   # au-delà, pourcentage saisi en points (85 au lieu de 0,85)
+
+def period(i):
+    """Index de mois de la collecte -> 1er du mois (ligne 6 : DATE(BASE_YEAR+i//12, i%12+1, 1))."""
+    return datetime.date(BASE_YEAR+i//12,i%12+1,1)
+
+def check(key,v):
+    """Contrôle d'une saisie contre KMETA ; renvoie le motif de rejet ou None."""
+    if v is None: return None
+    if isinstance(v,bool) or not isinstance(v,(int,float)): return "non numérique"
+    _,fr,en,u,agg,dep,h2,b,base=B.KMETA[key]
+    if B.is_pct(u) and abs(v)>PCT_MAX: return "pourcentage hors échelle"
+    if u in ("FCFA","nb","visites","ETP","m²","unité") and agg in ("SUM","LAST") and v<0: return "négatif"
+    return None
+
+def grid(ws,dep):
+    """Grille de saisie d'une collecte, un seul passage sur les lignes 8 .. fin de la grille commentaires.
+    Rend (ligne, clé, libellé, valeurs[N_MONTHS], commentaires[N_MONTHS]) par KPI."""
+    keys=B.DEPT_KEYS[dep]; last=B.collecte_last(dep); n=len(keys); w=B.N_MONTHS+1
+    rows=list(ws.iter_rows(min_row=8,max_row=last+2+n,min_col=3,max_col=B.BASE_FIRST_COL+B.N_MONTHS-1,values_only=True))
+    rows+=[()]*(last+3+n-8-len(rows))
+    pad=lambda t:tuple(t)+(None,)*(w-len(t))
+    for j,key in enumerate(keys):
+        vals=pad(rows[j]); com=pad(rows[last+3-8+j])
+        yield 8+j,key,vals[0],vals[1:],com[1:]
+
+def read_sheet(ws,dep,fn,mtime):
+    """Une collecte -> (lignes, anomalies)."""
+    c0=B.BASE_FIRST_COL; out=[]; bad=[]
+    for r,key,label,vals,com in grid(ws,dep):
+        if label is not None and label not in B.KMETA[key][1:3]:
+            bad.append((dep,key,None,label,"libellé inattendu (ligne décalée ?)",fn,ws.title,"C%d"%r)); continue
+        for i,(v,cm) in enumerate(zip(vals,com)):
+            if v is None and cm is None: continue
+            ref=get_column_letter(c0+i)+str(r); why=check(key,v)
+            if why: bad.append((dep,key,period(i),v,why,fn,ws.title,ref)); continue
+            out.append((dep,key,period(i),v,cm,fn,ws.title,ref,mtime))
+    return out,bad
+
+def read_file(fn):
+    """Un classeur retourné (complet ou de département) -> (lignes, anomalies)."""
+    mtime=os.path.getmtime(fn); out=[]; bad=[]
+    wb=load_workbook(fn,read_only=True,data_only=True)
+    try:
+        for dep,code in B.DEPT_COLLECTE.items():
+            if B.SH[code] in wb.sheetnames:
+                o,b=read_sheet(wb[B.SH[code]],dep,fn,mtime); out+=o; bad+=b
+    finally: wb.close()
+    return out,bad
+
+def harvest(files,jobs=None):
+    """Lit les classeurs en parallèle ; renvoie (jeu long trié, anomalies). Ordre des lignes indépendant de jobs."""
+    files=sorted(files); jobs=min(jobs or os.cpu_count() or 1,len(files) or 1)
+    if jobs<2: parts=list(map(read_file,files))
+    else:
+        with ProcessPoolExecutor(jobs) as ex: parts=list(ex.map(read_file,files,chunksize=max(1,len(files)//(4*jobs))))
+    rows=[r for o,b in parts for r in o]; bad=[x for o,b in parts for x in b]
+    rows.sort(key=lambda r:(r[0],r[1],r[2],r[8]))
+    return rows,bad
+
+def to_data(rows):
+    """Jeu long -> données forme gen_data ({clé: [36 mois]}) ; dernière soumission (mtime) retenue par cellule."""
+    data={k:[None]*B.N_MONTHS for k in B.KMETA}
+    for dep,key,p,v,cm,fn,sh,ref,mtime in rows:   # trié par mtime à (clé, période) égale
+        if v is not None: data[key][(p.year-BASE_YEAR)*12+p.month-1]=v
+    return data
+
+def to_comments(rows):
+    """Jeu long -> commentaires {clé: {'AAAA-MM': texte}} (dernière soumission retenue), pour le magasin KPI."""
+    out={}
+    for dep,key,p,v,cm,fn,sh,ref,mtime in rows:
+        if cm: out.setdefault(key,{})["%d-%02d"%(p.year,p.month)]=cm
+    return out
+
+if __name__=="__main__":
+    import argparse, csv, glob, time
+    ap=argparse.ArgumentParser(description="Relecture des collectes retournées -> jeu long CSV")
+    ap.add_argument("files",nargs="+",help="classeurs .xlsx (motifs glob acceptés)")
+    ap.add_argument("-o","--out",default="collectes.csv")
+    ap.add_argument("--jobs",type=int,help="processus de lecture (défaut : nb de cœurs)")
+    ap.add_argument("--store",help="magasin KPI persistant à alimenter (kpistore) : valeurs et commentaires relus")
+    ap.add_argument("--site",default="cosmos",help="site du magasin KPI")
+    a=ap.parse_args()
+    files=sorted({f for p in a.files for f in (glob.glob(p) or [p])})
+    t=time.perf_counter(); rows,bad=harvest(files,a.jobs)
+    with open(a.out,"w",newline="",encoding="utf-8") as f:
+        w=csv.writer(f); w.writerow(COLUMNS)
+        for r in rows: w.writerow(r[:8]+(datetime.datetime.fromtimestamp(r[8]).isoformat(timespec="seconds"),))
+    print("HARVEST:",len(files),"classeurs |",len(rows),"lignes |",len(bad),"anomalies |","%.2fs"%(time.perf_counter()-t))
+    for b in bad[:20]: print("  ",b[6],b[7],b[1],repr(b[3]),"—",b[4])
+    if a.store:
+        import kpistore
+        n,new=kpistore.Store(a.store,a.site).write(to_data(rows),comments=to_comments(rows))
+        print("MAGASIN:",a.store,a.site,"|",n,"mois réécrits |",new,"mois ajoutés")
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""Diff des saisies entre deux soumissions : seules les grilles de collecte (lignes KPI × colonnes mois,
+plus la grille commentaires) sont relues, en streaming (harvest.grid). Rend les cellules modifiées avec
+ancienne / nouvelle valeur et un résumé par KPI. Sur un historique, une seule grille est gardée en mémoire."""
+import math, os
+from openpyxl import load_workbook
+from openpyxl.utils import get_column_letter
+import build_cosmos as B
+from harvest import grid, period
+
+COLUMNS=("dept","key","period","field","old","new","cell")
+TOL=1e-9   # écart relatif en dessous duquel deux nombres sont égaux (flottants relus)
+
+def inputs(fn):
+    """Classeur -> {dept: {clé: (ligne, valeurs, commentaires)}} pour les collectes présentes."""
+    wb=load_workbook(fn,read_only=True,data_only=True)
+    try: return {dep:{key:(r,vals,com) for r,key,label,vals,com in grid(wb[B.SH[code]],dep)}
+                 for dep,code in B.DEPT_COLLECTE.items() if B.SH[code] in wb.sheetnames}
+    finally: wb.close()
+
+def same(a,b):
+    if a==b: return True
+    num=lambda v:isinstance(v,(int,float)) and not isinstance(v,bool)
+    return num(a) and num(b) and math.isclose(a,b,rel_tol=TOL,abs_tol=TOL)
+
+def diff(old,new):
+    """Deux classeurs (chemins ou grilles déjà lues) -> cellules modifiées, dans l'ordre dept / KPI / mois.
+    Une collecte absente d'un côté est ignorée (classeur département contre classeur complet)."""
+    a=inputs(old) if isinstance(old,(str,os.PathLike)) else old
+    b=inputs(new) if isinstance(new,(str,os.PathLike)) else new
+    c0=B.BASE_FIRST_COL; last={dep:B.collecte_last(dep) for dep in B.DEPT_COLLECTE}
+    for dep in [d for d in a if d in b]:
+        for key in B.DEPT_KEYS[dep]:
+            r,va,ca=a[dep][key]; _,vb,cb=b[dep][key]
+            for field,xa,xb,row in (("value",va,vb,r),("comment",ca,cb,last[dep]+3+r-8)):
+                if xa==xb: continue
+                for i,(u,v) in enumerate(zip(xa,xb)):
+                    if not same(u,v): yield dep,key,period(i),field,u,v,get_column_letter(c0+i)+str(row)
+
+def summary(changes):
+    """Résumé par KPI : {clé: {n, ajouts, suppressions, commentaires, delta (somme new-old), delta_max}}."""
+    out={}
+    for dep,key,p,field,u,v,ref in changes:
+        s=out.setdefault(key,{"dept":dep,"n":0,"ajouts":0,"suppressions":0,"commentaires":0,"delta":0.0,"delta_max":0.0})
+        s["n"]+=1
+        if field=="comment": s["commentaires"]+=1; continue
+        if u is None: s["ajouts"]+=1
+        elif v is None: s["suppressions"]+=1
+        if isinstance(u,(int,float)) and isinstance(v,(int,float)):
+            d=v-u; s["delta"]+=d
+            if abs(d)>abs(s["delta_max"]): s["delta_max"]=d
+    return out
+
+def history(files,by_mtime=True):
+    """Soumissions successives -> (précédent, suivant, *changement) ; chaque classeur lu une fois,
+    mémoire bornée à deux grilles. by_mtime=False : ordre donné."""
+    if by_mtime: files=sorted(files,key=os.path.getmtime)
+    prev=None
+    for fn in files:
+        cur=inputs(fn)
+        if prev is not None:
+            for ch in diff(prev[1],cur): yield (prev[0],fn)+ch
+        prev=(fn,cur)
+
+if __name__=="__main__":
+    import argparse, csv, sys, time
+    ap=argparse.ArgumentParser(description="Diff des saisies entre soumissions successives d'une collecte")
+    ap.add_argument("files",nargs="+",help="classeurs .xlsx, du plus ancien au plus récent (2 ou plus)")
+    ap.add_argument("--csv",help="écrit le détail des cellules modifiées")
+    a=ap.parse_args()
+    if len(a.files)<2: ap.error("au moins deux classeurs")
+    t=time.perf_counter(); changes=list(history(a.files,by_mtime=False))
+    if a.csv:
+        with open(a.csv,"w",newline="",encoding="utf-8") as f:
+            w=csv.writer(f); w.writerow(("old_file","new_file")+COLUMNS); w.writerows(changes)
+    for key,s in sorted(summary(ch[2:] for ch in changes).items()):
+        print("  %-28s %-6s %4d modif. | +%d -%d | %d comm. | Δ %s (max %s)"%(key,s["dept"],s["n"],s["ajouts"],s["suppressions"],
+              s["commentaires"],format(s["delta"],",.4g"),format(s["delta_max"],",.4g")))
+    print("DIFF:",len(a.files),"soumissions |",len(changes),"cellules modifiées |","%.2fs"%(time.perf_counter()-t),file=sys.stderr)
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""Magasin KPI persistant : réalisés, budgets, commentaires et métadonnées d'un site entre deux générations.
+Un dossier par site sous la racine :
+  values.f8   matrice float64 mois × KPI (une ligne par mois depuis « start », NaN = vide) : un mois nouveau
+              s'ajoute en fin de fichier, un mois corrigé se réécrit en place ;
+  budget.f8   plan budgétaire KPI × 12 mois (budget_plan au moment de l'écriture, NaN = non budgété) ;
+  meta.json   clés (ordre des colonnes), métadonnées KPI, 1er mois, nb de mois, révision, GLA, commentaires.
+Relecture : meta.json + np.memmap, sans copie ni analyse XML ; data() rend la fenêtre de 36 mois (forme gen_data).
+Une clé KPI nouvelle ou un historique antérieur au 1er mois stocké réécrit la matrice (rare)."""
+import json, os
+import numpy as np
+import build_cosmos as B
+from periods import BASE_YEAR
+
+META="meta.json"; VALUES="values.f8"; BUDGET="budget.f8"
+
+def month(s):
+    """'AAAA-MM' -> index absolu de mois (année × 12 + mois - 1) ; label() en sens inverse."""
+    return int(s[:4])*12+int(s[5:7])-1
+def label(m): return "%d-%02d"%(m//12,m%12+1)
+
+class Store:
+    def __init__(self,root,site="cosmos"):
+        self.folder=os.path.join(root,site); self.site=site
+        self.meta={"keys":[],"kmeta":{},"start":label(BASE_YEAR*12),"months":0,"rev":0,"gla":None,"comments":{}}
+        fn=os.path.join(self.folder,META)
+        if os.path.exists(fn):
+            with open(fn,encoding="utf-8") as f: self.meta=json.load(f)
+        self.keys=self.meta["keys"]; self.col={k:i for i,k in enumerate(self.keys)}
+
+    @classmethod
+    def sites(cls,root):
+        """Sites présents sous la racine."""
+        return sorted(d for d in os.listdir(root) if os.path.exists(os.path.join(root,d,META))) if os.path.isdir(root) else []
+
+    def path(self,name): return os.path.join(self.folder,name)
+
+    def map(self,mode="r"):
+        """Matrice mois × KPI mappée (None si vide)."""
+        n=self.meta["months"]
+        return np.memmap(self.path(VALUES),np.float64,mode,shape=(n,len(self.keys))) if n and self.keys else None
+
+    def budget(self):
+        return np.memmap(self.path(BUDGET),np.float64,"r",shape=(len(self.keys),12)) if self.keys else None
+
+    # ------------------------------------------------------------ écriture
+    def _save_meta(self):
+        self.meta["keys"]=self.keys; self.meta["rev"]+=1
+        tmp=self.path(META+".tmp")
+        with open(tmp,"w",encoding="utf-8") as f: json.dump(self.meta,f,ensure_ascii=False)
+        os.replace(tmp,self.path(META))
+
+    def _relayout(self,keys,start):
+        """Réécrit la matrice pour de nouvelles colonnes (clés) et / ou un 1er mois antérieur."""
+        old=self.map(); s0=month(self.meta["start"]); n=self.meta["months"]+(s0-start)
+        X=np.full((n,len(keys)),np.nan)
+        if old is not None: X[s0-start:,[keys.index(k) for k in self.keys]]=old
+        del old
+        tmp=self.path(VALUES+".tmp"); X.tofile(tmp); os.replace(tmp,self.path(VALUES))
+        self.keys=list(keys); self.col={k:i for i,k in enumerate(self.keys)}
+        self.meta.update(start=label(start),months=n)
+
+    def write(self,data,start=BASE_YEAR*12,comments=None,gla=None):
+        """Séries forme gen_data (1er mois = start) -> magasin ; None = valeur inconnue, la valeur stockée est gardée
+        (une collecte partielle n'efface rien). Mois inchangés non réécrits, mois nouveaux ajoutés en fin de fichier.
+        comments : {clé: {'AAAA-MM': texte}}. Renvoie (mois réécrits, mois ajoutés)."""
+        os.makedirs(self.folder,exist_ok=True)
+        keys=self.keys+[k for k in data if k not in self.col]
+        if not self.meta["months"]: self.meta["start"]=label(start)   # magasin vide : il commence au 1er mois écrit
+        s0=month(self.meta["start"])
+        if keys!=self.keys or start<s0: self._relayout(keys,min(start,s0))
+        s0=month(self.meta["start"]); n=max(len(v) for v in data.values())
+        off=start-s0; have=self.meta["months"]; grow=max(off+n-have,0)
+        if grow:
+            with open(self.path(VALUES),"ab") as f: np.full((grow,len(self.keys)),np.nan).tofile(f)
+            self.meta["months"]=have+grow
+        X=self.map("r+"); cur=X[off:off+n]; new=np.array(cur)
+        for k,v in data.items():
+            x=np.array([np.nan if y is None else y for y in v],dtype=float); ok=~np.isnan(x)
+            new[np.nonzero(ok)[0],self.col[k]]=x[ok]
+        diff=~((cur==new)|(np.isnan(cur)&np.isnan(new))).all(1)
+        cur[diff]=new[diff]; X.flush(); del X,cur
+        plan=lambda k:(B.budget_plan(k) if k in B.KMETA else None) or [np.nan]*12
+        np.array([plan(k) for k in self.keys],dtype=float).tofile(self.path(BUDGET))
+        self.meta["kmeta"]={k:list(B.KMETA[k][1:]) for k in self.keys if k in B.KMETA}
+        for k,c in (comments or {}).items(): self.meta["comments"].setdefault(k,{}).update(c)
+        if gla is not None: self.meta["gla"]=gla
+        self._save_meta()
+        return int(diff[:max(have-off,0)].sum()),grow
+
+    # ------------------------------------------------------------ lecture
+    def window(self,start=BASE_YEAR*12,n=B.N_MONTHS):
+        """KPI × mois de la fenêtre : vue mappée sans copie si la fenêtre est entièrement stockée."""
+        X=self.map(); s0=month(self.meta["start"]); a=start-s0
+        if X is not None and a>=0 and a+n<=len(X): return X[a:a+n].T
+        W=np.full((n,len(self.keys)),np.nan)
+        if X is not None:
+            lo,hi=max(a,0),min(a+n,len(X))
+            if lo<hi: W[lo-a:hi-a]=X[lo:hi]
+        return W.T
+
+    def data(self,start=BASE_YEAR*12,n=B.N_MONTHS):
+        """Fenêtre -> données forme gen_data (clés de KMETA ; entiers rendus entiers sans troncature, vide = None)."""
+        W=self.window(start,n); out={}
+        for k,(_,fr,en,u,agg,dep,h2,b,base) in B.KMETA.items():
+            if k not in self.col: out[k]=[None]*n; continue
+            i=not B.decimals(u,agg)   # unité entière : une valeur décimale (moteurs : délais, ETP) reste telle quelle
+            out[k]=[None if v!=v else int(v) if i and v.is_integer() else v for v in W[self.col[k]].tolist()]
+        return out
+
+    def comments(self): return self.meta["comments"]
+
+def source(root=None,site="cosmos",retours=None):
+    """Données d'un outil en ligne de commande : classeurs retournés (harvest), sinon magasin KPI, sinon démo."""
+    if retours:
+        import harvest; return harvest.to_data(harvest.harvest(retours)[0])
+    if root:
+        S=Store(root,site)
+        if S.meta["months"]: return S.data()
+    return B.gen_data()
+
+if __name__=="__main__":
+    import argparse, time
+    ap=argparse.ArgumentParser(description="Magasin KPI persistant (mois × KPI mappé en mémoire) : écriture / relecture")
+    ap.add_argument("root",help="racine du magasin (un dossier par site)")
+    ap.add_argument("--demo",type=int,metavar="N",help="écrit d'abord N sites de démo (données de démo par site)")
+    ap.add_argument("--years",type=int,default=3,help="années d'historique des sites de démo (avant BASE_YEAR + 3)")
+    a=ap.parse_args()
+    if a.demo:
+        t=time.perf_counter()
+        for i in range(1,a.demo+1):
+            site="site-%02d"%i
+            for y in range(a.years-3,-1,-3):   # blocs de 36 mois, du plus ancien au plus récent
+                Store(a.root,site).write(B.gen_data("%s-%d"%(site,y)),start=(BASE_YEAR-y)*12,gla=20000.0)
+        print("ÉCRIT: %d sites en %.2fs"%(a.demo,time.perf_counter()-t))
+    t=time.perf_counter(); sites={s:Store(a.root,s) for s in Store.sites(a.root)}
+    X={s:S.window() for s,S in sites.items()}; dt=time.perf_counter()-t
+    cells=sum(S.meta["months"]*len(S.keys) for S in sites.values())
+    print("RELECTURE: %d sites | %d valeurs stockées | fenêtre %d mois | %.1f ms"%(len(sites),cells,B.N_MONTHS,dt*1000))
+    t=time.perf_counter(); d={s:S.data() for s,S in sites.items()}
+    print("FORME gen_data: %.1f ms"%((time.perf_counter()-t)*1000))
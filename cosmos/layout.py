@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""Moteur de mise en page en deux temps pour le rapport une-feuille.
+1) Plan : les renderers écrivent dans un modèle de blocs (cellules en attente, fusions, hauteurs, sauts de page,
+   graphiques, icônes, panneaux, ancres) avec le sous-ensemble de l'API Worksheet qu'ils utilisent déjà.
+2) emit() : chaque cellule est créée une seule fois dans la vraie feuille, avec son style final
+   (fond de page, cadres de panneaux déjà résolus dans le modèle) — rendu linéaire en taille de rapport."""
+from collections import defaultdict
+from openpyxl.cell.cell import MergedCell
+from openpyxl.descriptors.serialisable import Serialisable
+from openpyxl.styles.borders import DEFAULT_BORDER
+from openpyxl.styles.cell_style import StyleArray
+from openpyxl.styles.numbers import BUILTIN_FORMATS_MAX_SIZE, BUILTIN_FORMATS_REVERSE
+from openpyxl.utils import get_column_letter
+from openpyxl.worksheet.cell_range import CellRange
+from openpyxl.worksheet.merge import MergedCellRange
+from openpyxl.worksheet.pagebreak import Break
+from cfplan import canon, render
+
+STYLE=("font","fill","border","alignment","protection","number_format")
+
+def shared(cls):
+    """Constructeur mémoïsé : mêmes arguments -> même instance (styles immuables une fois posés).
+    Les objets de style en argument sont indexés par id() ; emit() retrouve ainsi ses index sans hacher."""
+    cache={}
+    def make(*a,**k):
+        key=(a,tuple((n,id(v) if isinstance(v,Serialisable) else v) for n,v in k.items()))
+        o=cache.get(key)
+        if o is None: o=cache[key]=cls(*a,**k)
+        return o
+    return make
+
+class PCell:
+    """Cellule en attente : seuls les attributs affectés sont stockés (valeurs par défaut au niveau classe)."""
+    value=None; font=None; fill=None; border=DEFAULT_BORDER; alignment=None; protection=None; number_format=None; hyperlink=None
+    def __init__(self,value=None):
+        if value is not None: self.value=value
+
+class _Dim:
+    height=None; width=None
+
+class Plan:
+    def __init__(self,ws=None,title=None):
+        self.ws=ws; self.title=ws.title if ws is not None else title
+        self.cells={}; self.merges=[]; self.covered=set()
+        self.row_dimensions=defaultdict(_Dim); self.column_dimensions=defaultdict(_Dim)
+        self.row_breaks=[]; self.charts=[]; self.images=[]
+        self.panels=[]; self.anchors={}; self.links=[]   # links : (cellule, ancre) résolus avant emit()
+
+    @property
+    def conditional_formatting(self): return self.ws.conditional_formatting   # CFPlan.flush -> feuille cible
+
+    def cell(self,row,column,value=None):
+        pc=self.cells.get((row,column))
+        if pc is None: pc=self.cells[(row,column)]=PCell()
+        if value is not None: pc.value=value
+        return pc
+
+    def merge_cells(self,range_string=None,start_row=None,start_column=None,end_row=None,end_column=None):
+        cr=CellRange(range_string,min_col=start_column,min_row=start_row,max_col=end_column,max_row=end_row)
+        self.merges.append(cr.coord)
+        cells=cr.cells; next(cells)
+        for k in cells: self.cells[k]=PCell(); self.covered.add(k)   # comme openpyxl : la fusion remplace les cellules couvertes
+
+    def add_chart(self,chart,anchor): chart.anchor=anchor; self.charts.append(chart)
+    def add_image(self,img,anchor): img.anchor=anchor; self.images.append(img)
+
+    # ------------------------------------------------------------ composition
+    def intern(self):
+        """Une instance par valeur de style (avant pickle) : l'émission indexe ensuite les styles par id()."""
+        seen={}
+        for pc in self.cells.values():
+            d=pc.__dict__
+            for a in STYLE:
+                v=d.get(a)
+                if v is not None: d[a]=seen.setdefault(v,v)
+        return self
+
+    def paste(self,sub,sh):
+        """Recolle un sous-plan ; sh(r,c) -> décalage de lignes. Les réfs relatives des formules suivent."""
+        for (r,c),pc in sub.cells.items():
+            d=sh(r,c); v=pc.value
+            if d and isinstance(v,str) and v.startswith("="): pc.value=render(canon(v,r,c)[0],r+d,c)
+            self.cells[(r+d,c)]=pc
+        for coord in sub.merges:
+            cr=CellRange(coord); cr.shift(row_shift=sh(cr.min_row,cr.min_col)); self.merges.append(cr.coord)
+        self.covered.update((r+sh(r,c),c) for r,c in sub.covered)
+        for r,dm in sub.row_dimensions.items(): self.row_dimensions[r+sh(r,1)].height=dm.height
+        for k,dm in sub.column_dimensions.items(): self.column_dimensions[k].width=dm.width
+        self.row_breaks.extend(Break(id=b.id+sh(b.id,1)) for b in sub.row_breaks)
+        for obj,dest in ((sub.charts,self.charts),(sub.images,self.images)):
+            for o in obj:
+                cr=CellRange(o.anchor); cr.shift(row_shift=sh(cr.min_row,cr.min_col)); o.anchor=cr.coord; dest.append(o)
+        self.panels.extend((a+sh(a,1),b+sh(b,1)) for a,b in sub.panels)
+        self.anchors.update({k:r+sh(r,1) for k,r in sub.anchors.items()}); self.links.extend(sub.links)
+
+    # ------------------------------------------------------------ émission
+    def emit(self,bg=None,bg_cols=None):
+        """Écrit le plan dans la feuille liée. bg : remplissage de fond des colonnes bg_cols=(c1,c2)
+        (style de colonne + cellules sans remplissage propre), appliqué au vol."""
+        ws=self.ws; wb=ws.parent; c1,c2=bg_cols or (0,-1)
+        for k,dm in self.column_dimensions.items():
+            if dm.width is not None: ws.column_dimensions[k].width=dm.width
+        if bg is not None: column_bg(ws,bg,c1,c2)
+        ids={a:{} for a in STYLE}; sas={}
+        colls={"font":wb._fonts,"fill":wb._fills,"border":wb._borders,"alignment":wb._alignments,"protection":wb._protections}
+        def ix(a,v):
+            cache=ids[a]; i=cache.get(id(v))
+            if i is None:
+                if a=="number_format": i=BUILTIN_FORMATS_REVERSE.get(v) if v in BUILTIN_FORMATS_REVERSE else wb._number_formats.add(v)+BUILTIN_FORMATS_MAX_SIZE
+                else: i=colls[a].add(v)
+                cache[id(v)]=i
+            return i
+        def style(pc,c):
+            d=pc.__dict__
+            if bg is not None and c1<=c<=c2 and d.get("fill") is None: d["fill"]=bg
+            k=tuple(ix(a,d[a]) if d.get(a) is not None else 0 for a in STYLE)
+            if not any(k): return None
+            sa=sas.get(k)
+            if sa is None: sa=sas[k]=StyleArray([k[0],k[1],k[2],k[5],k[4],k[3],0,0,0])
+            return StyleArray(sa)
+        covered=self.covered
+        for (r,c),pc in self.cells.items():
+            if (r,c) in covered: continue
+            cl=ws.cell(r,c,pc.value); sa=style(pc,c)
+            if sa is not None: cl._style=sa
+            if pc.hyperlink is not None: cl.hyperlink=pc.hyperlink
+        for coord in self.merges:
+            mcr=MergedCellRange(ws,coord); ws.merged_cells.add(mcr)
+            cells=mcr.cells; next(cells)
+            for r,c in cells:
+                mc=ws._cells[r,c]=MergedCell(ws,r,c)
+                sa=style(self.cells.get((r,c)) or PCell(),c)
+                if sa is not None: mc._style=sa
+        for r,dm in self.row_dimensions.items():
+            if dm.height is not None: ws.row_dimensions[r].height=dm.height
+        for b in self.row_breaks: ws.row_breaks.append(b)
+        for ch in self.charts: ws.add_chart(ch,ch.anchor)
+        for im in self.images: ws.add_image(im,im.anchor)
+
+def column_bg(ws,f,c1,c2):
+    """Fond par style de colonne (sans <col width> pour les colonnes encore non dimensionnées)."""
+    for c in range(c1,c2+1):
+        k=get_column_letter(c)
+        if k not in ws.column_dimensions: ws.column_dimensions[k].width=0
+        ws.column_dimensions[k].fill=f
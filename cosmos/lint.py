@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""Linter statique des formules émises (sans recalcul, sans LibreOffice).
+Chaque formule (cellules, MFC, validations, séries de graphiques, noms définis) est analysée par le parseur
+de xlcalc ; on résout noms définis, feuilles et plages, fonctions et clés de recherche littérales :
+#NAME? (nom / fonction inconnus, clé i18n ou RAG absente), #REF! (feuille inconnue, plage hors feuille).
+Les plages hors de la zone utilisée de leur feuille sont signalées en alerte."""
+from openpyxl.utils import get_column_letter
+import xlcalc
+from xlcalc import E_NAME, E_REF, parse, split_ref, walk
+
+MAX_ROW,MAX_COL=1048576,16384
+ERROR,WARNING="erreur","alerte"
+
+class FormulaError(ValueError):
+    def __init__(self,issues):
+        self.issues=issues; err=[i for i in issues if i[0]==ERROR]
+        super().__init__("%d formule(s) en erreur, ex. %s"%(len(err),"; ".join("%s %s"%(i[2],i[4]) for i in err[:3])))
+    def __reduce__(self): return (FormulaError,(self.issues,))
+
+def formulas(wb):
+    """(lieu, feuille de contexte, texte) de toutes les formules du classeur."""
+    for n,d in wb.defined_names.items(): yield "nom "+n,None,d.attr_text
+    for ws in wb.worksheets:
+        t=ws.title
+        for (r,c),cl in ws._cells.items():
+            v=cl.value
+            if isinstance(v,str) and v.startswith("=") and len(v)>1: yield "%s!%s%d"%(t,get_column_letter(c),r),t,v
+        for cf in ws.conditional_formatting:
+            for rule in cf.rules:
+                for f in rule.formula or (): yield "%s MFC %s"%(t,cf.sqref),t,f
+        for dv in ws.data_validations.dataValidation:
+            for f in (dv.formula1,dv.formula2):
+                if isinstance(f,str): yield "%s validation %s"%(t,dv.sqref),t,f
+        for i,ch in enumerate(ws._charts,1):
+            for s in ch.series:
+                for part in (s.val,s.cat,s.xVal,s.yVal,s.tx):
+                    ref=part and (getattr(part,"numRef",None) or getattr(part,"strRef",None))
+                    if ref is not None and ref.f: yield "%s graphique %d"%(t,i),t,ref.f
+
+class Linter:
+    def __init__(self,wb):
+        self.wb=wb; self.titles=set(wb.sheetnames)
+        self.names={n.upper():d.attr_text for n,d in wb.defined_names.items()}   # le parseur met les noms en majuscules
+        self.keys={}   # nom de plage -> valeurs littérales (clés de MATCH)
+        self.extent={ws.title:(ws.max_row,ws.max_column) for ws in wb.worksheets}
+
+    def domain(self,name):
+        """Valeurs de la plage nommée (ex. I18N_KEY, RAG_KEY) pour contrôler les clés littérales de MATCH."""
+        if name not in self.keys:
+            try: sh,r1,c1,r2,c2=split_ref(self.names[name])
+            except (AttributeError,KeyError,TypeError,ValueError): self.keys[name]=None; return None
+            ws=self.wb[sh] if sh in self.titles else None
+            self.keys[name]=None if ws is None else {ws._cells[r,c].value for r in range(r1,r2+1) for c in range(c1,c2+1) if (r,c) in ws._cells}
+        return self.keys[name]
+
+    def check(self,where,sheet,f):
+        """Anomalies d'une formule : [(niveau, code, lieu, formule, message)]."""
+        try: ast=parse(f)
+        except SyntaxError as e: return [(ERROR,E_NAME.code,where,f,"illisible : %s"%e)]
+        out=[]
+        for a in walk(ast):
+            t=a[0]
+            if t=="name" and a[1] not in self.names: out.append((ERROR,E_NAME.code,where,f,"nom non défini : %s"%a[1]))
+            elif t=="fn":
+                if a[1] not in xlcalc.FUNCS: out.append((ERROR,E_NAME.code,where,f,"fonction inconnue : %s"%a[1]))
+                elif a[1]=="MATCH" and len(a[2])>1 and a[2][0][0]=="s" and a[2][1][0]=="name":
+                    dom=self.domain(a[2][1][1])
+                    if dom is not None and a[2][0][1] not in dom:
+                        out.append((ERROR,E_NAME.code,where,f,"clé %r absente de %s"%(a[2][0][1],a[2][1][1])))
+            elif t=="ref":
+                sh=a[1] or sheet; r1,c1,r2,c2=a[2:]
+                if sh is None: out.append((ERROR,E_REF.code,where,f,"référence sans feuille"))
+                elif sh not in self.titles: out.append((ERROR,E_REF.code,where,f,"feuille inconnue : %s"%sh))
+                elif r2>MAX_ROW or c2>MAX_COL: out.append((ERROR,E_REF.code,where,f,"plage hors feuille"))
+                else:
+                    mr,mc=self.extent[sh]
+                    if r1>mr or c1>mc: out.append((WARNING,"hors zone",where,f,"plage au-delà des données de %s (%d lignes × %d col.)"%(sh,mr,mc)))
+        return list(dict.fromkeys(out))   # T() interroge deux fois la même clé
+
+def lint(wb):
+    """Toutes les anomalies du classeur, dans l'ordre des formules."""
+    L=Linter(wb); out=[]
+    for where,sheet,f in formulas(wb): out+=L.check(where,sheet,f)
+    return out
+
+def ensure(wb):
+    """lint() puis FormulaError s'il y a des erreurs ; renvoie les alertes."""
+    issues=lint(wb)
+    if any(i[0]==ERROR for i in issues): raise FormulaError(issues)
+    return issues
+
+if __name__=="__main__":
+    import argparse, sys
+    from openpyxl import load_workbook
+    ap=argparse.ArgumentParser(description="Linter statique des formules d'un classeur Cosmos")
+    ap.add_argument("xlsx")
+    a=ap.parse_args()
+    issues=lint(load_workbook(a.xlsx))
+    for lvl,code,where,f,msg in issues: print("%-7s %-7s %s : %s"%(lvl,code,where,msg))
+    print("LINT:",sum(i[0]==ERROR for i in issues),"erreur(s),",sum(i[0]==WARNING for i in issues),"alerte(s)",file=sys.stderr)
+    sys.exit(1 if any(i[0]==ERROR for i in issues) else 0)
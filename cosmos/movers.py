@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""Movers : Δ% préc. / N-1 / budget de tous les KPI, meilleur et pire par département et top / flop global.
+Miroir numpy du bloc movers de M5 (build_cosmos.build_movers) : un cube periods pour courant / préc. / N-1,
+le plan budgétaire de M1 masqué sur les mois de la période, puis un seul tri des scores (pas de balayage par section).
+Ex aequo comme le classeur : la 1re ligne du bloc (ordre movers_layout) l'emporte par département et au flop,
+la dernière au top (score Δ + ROW()/1e12)."""
+import numpy as np
+import build_cosmos as B
+import periods
+
+def values(data,annee=2026,grain="M",mois=6):
+    """Clés (ordre KMETA) et tableaux (KPI,) : courant, préc., N-1, budget de la période (NaN = vide ou erreur)."""
+    keys=list(B.KMETA); agg=np.array([B.KMETA[k][4] for k in keys])
+    X=np.array([[np.nan if v is None else v for v in data.get(k,[None]*B.N_MONTHS)] for k in keys],dtype=float)
+    b=periods.bounds(annee,grain,[mois]); cb=periods.cube(X,b)
+    def val(w):
+        S,C,L,inr=(np.asarray(x)[...,0] for x in cb[w])
+        with np.errstate(invalid="ignore",divide="ignore"): avg=np.where(C>0,S/np.where(C>0,C,1),np.nan)
+        return np.where(agg=="SUM",S,np.where(agg=="LAST",np.where(inr,np.nan_to_num(L),np.nan),avg))
+    cur,prev,py=(val(w) for w in periods.WINDOWS)
+    plan=np.array([B.budget_plan(k) or [np.nan]*12 for k in keys],dtype=float)
+    m=np.arange(12); lo,hi=int(b["P_START"][0])%12,int(b["P_END"][0])%12
+    mask=(m>=lo)&(m<=hi)
+    bud=np.where(agg=="SUM",plan[:,mask].sum(1),plan[:,mask].mean(1))
+    return keys,cur,prev,py,bud
+
+def deltas(data,annee=2026,grain="M",mois=6):
+    """Clés et tableaux (KPI,) : courant, Δ préc., Δ N-1, Δ budget (NaN = non calculable)."""
+    keys,cur,prev,py,bud=values(data,annee,grain,mois)
+    with np.errstate(invalid="ignore",divide="ignore"):
+        d=[np.where(np.isfinite(x)&(x!=0),cur/x-1,np.nan) for x in (prev,py,bud)]
+    return keys,cur,*d
+
+def rank(data,annee=2026,grain="M",mois=6,top=B.MOV_TOP):
+    """({dép.: (meilleure clé, Δ, pire clé, Δ)}, top [(clé, Δ préc., Δ N-1, Δ budget)], flop [...]) sur le Δ% préc."""
+    keys,cur,dp,dy,db=deltas(data,annee,grain,mois); ix={k:i for i,k in enumerate(keys)}
+    rows,_,_=B.movers_layout()
+    order=np.array([ix[k] for _,_,k,first in rows if first])   # KPI distincts, ordre du bloc
+    by_dep={}
+    for d,_,_ in B.DEPTS:
+        g=np.array([ix[k] for dd,_,k,_ in rows if dd==d]); g=g[np.isfinite(dp[g])]
+        if len(g): by_dep[d]=(keys[g[np.argmax(dp[g])]],float(dp[g].max()),keys[g[np.argmin(dp[g])]],float(dp[g].min()))
+    o=order[np.isfinite(dp[order])]
+    up=o[np.lexsort((-np.arange(len(o)),-dp[o]))][:top]; down=o[np.argsort(dp[o],kind="stable")][:top]
+    pick=lambda s:[(keys[i],float(dp[i]),float(dy[i]),float(db[i])) for i in s]
+    return by_dep,pick(up),pick(down)
+
+if __name__=="__main__":
+    import argparse, time
+    ap=argparse.ArgumentParser(description="Movers : meilleurs et pires Δ% par département et au global")
+    ap.add_argument("--annee",type=int,default=2026); ap.add_argument("--grain",choices="MQY",default="M")
+    ap.add_argument("--mois",type=int,default=6)
+    ap.add_argument("--retours",nargs="*",help="classeurs retournés (défaut : magasin KPI, sinon données de démo)")
+    ap.add_argument("--store",help="magasin KPI persistant (kpistore)"); ap.add_argument("--site",default="cosmos")
+    a=ap.parse_args()
+    import kpistore; data=kpistore.source(a.store,a.site,a.retours)
+    t=time.perf_counter(); by_dep,up,down=rank(data,a.annee,a.grain,a.mois)
+    f=lambda x:"" if np.isnan(x) else "%+.1f%%"%(100*x)
+    print(periods.label(a.annee,a.grain,a.mois))
+    for d,(bk,bv,wk,wv) in by_dep.items(): print("  %-6s ▲ %-24s %8s   ▼ %-24s %8s"%(d,bk,f(bv),wk,f(wv)))
+    for title,lst in (("TOP",up),("FLOP",down)):
+        print(title)
+        for j,(k,x,y,z) in enumerate(lst,1): print("  %d %-26s %8s %8s %8s"%(j,k,f(x),f(y),f(z)))
+    print("MOVERS: %.3fs"%(time.perf_counter()-t))
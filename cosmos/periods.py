@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""Moteur temporel vectorisé (numpy) — miroir des bornes P_/PP_/PY_ de M0 et de pval().
+Calcule en une passe les agrégats courant / précédent / N-1 de tous les KPI pour toutes les
+périodes d'une année (12 mois, 4 trimestres ou l'année), à partir d'un seul chargement des données."""
+import datetime
+import numpy as np
+from xlcalc import E_DIV0, E_NA, to_serial
+
+BASE_YEAR=2024   # 1re colonne de HDR (M3)
+WINDOWS=(("P_START","P_END"),("PP_START","PP_END"),("PY_START","PY_END"))
+SHIFT={"M":1,"Q":3,"Y":12}
+
+def months_of(grain):
+    """Valeur de MOIS représentative de chaque période (fin de période pour Q/Y)."""
+    return {"M":list(range(1,13)),"Q":[3,6,9,12],"Y":[12]}[grain]
+
+def label(annee,grain,mois):
+    return {"M":"%d-%02d"%(annee,mois),"Q":"%d-Q%d"%(annee,(mois+2)//3),"Y":"%d"%annee}[grain]
+
+def bounds(annee,grain,mois):
+    """Bornes en index de mois (0 = janvier BASE_YEAR), une entrée par période. Mêmes règles que M0!D12:D17."""
+    m=np.asarray(mois); y0=(annee-BASE_YEAR)*12
+    if grain=="M": ps=y0+m-1; pe=ps
+    elif grain=="Q": ps=y0+((m+2)//3-1)*3; pe=ps+2
+    else: ps=np.full_like(m,y0); pe=ps+11
+    k=SHIFT[grain]
+    return {"P_START":ps,"P_END":pe,"PP_START":ps-k,"PP_END":pe-k,"PY_START":ps-12,"PY_END":pe-12}
+
+def serial(idx):
+    """Index de mois -> série Excel du 1er du mois."""
+    return [to_serial(datetime.date(BASE_YEAR+int(i)//12,int(i)%12+1,1)) for i in np.ravel(idx)]
+
+def cube(X,b):
+    """X : matrice KPI × mois (NaN = vide). Renvoie {(d1,d2): (somme, nb, dernier, fin_dans_HDR)} de forme (KPI, période).
+    Sommes accumulées mois par mois (pas de différence de cumuls) : mêmes arrondis que SUMIFS, donc mêmes seuils RAG."""
+    X=np.asarray(X,dtype=float); n,T=X.shape; ok=~np.isnan(X)
+    out={}
+    for d1,d2 in WINDOWS:
+        s,e=b[d1],b[d2]
+        S=np.zeros((n,len(s))); C=np.zeros((n,len(s)))
+        for w in range(int((e-s).max())+1):
+            j=s+w; jj=np.clip(j,0,T-1)
+            m=ok[:,jj]&((j>=0)&(j<T)&(j<=e))
+            S+=np.where(m,X[:,jj],0.0); C+=m
+        inr=(e>=0)&(e<T)
+        out[(d1,d2)]=(S,C,X[:,np.clip(e,0,T-1)],inr)
+    return out
+
+def pvals(cb,rows,aggs,sheet,p):
+    """Cube -> {(feuille,ligne,agg,d1,d2): valeur} pour la période p (clés de xlcalc.Calc.pv)."""
+    out={}
+    for (d1,d2),(S,C,L,inr) in cb.items():
+        for i,(row,agg) in enumerate(zip(rows,aggs)):
+            if agg=="SUM": out[(sheet,row,"SUM",d1,d2)]=float(S[i,p])
+            elif agg=="LAST":
+                v=L[i,p]; out[(sheet,row,"LAST",None,d2)]=(None if np.isnan(v) else float(v)) if inr[p] else E_NA
+            else: out[(sheet,row,"AVG",d1,d2)]=float(S[i,p]/C[i,p]) if C[i,p] else E_DIV0
+    return out
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""Scénarios budget / seuils RAG : quels KPI changent de statut si le budget bouge de ±x % ou si les seuils se décalent ?
+Règle RAG de write_kpi_row (référence = budget s'il est > 0, sinon N-1 ; rapport réalisé / référence comparé aux seuils
+vert et ambre selon le sens UP / DOWN de tbl_param_rag) évaluée en un seul calcul broadcasté
+(multiplicateur de budget × variante de seuils × KPI), sans régénérer ni recalculer le classeur par scénario.
+
+Variante de seuils (dv, da) : décalage des seuils vert et ambre de M1 dans le sens exigeant
+(UP : seuil + d ; DOWN : seuil - d) ; (0, 0) = seuils de M1."""
+import numpy as np
+import build_cosmos as B
+import movers
+
+STATUS=("red","amber","green")   # codes 0, 1, 2 ; -1 = pas de statut (référence nulle ou valeur manquante)
+
+def rag(cur,ref,up,sv,sa):
+    """Codes RAG broadcastés (formule du jeton de write_kpi_row)."""
+    with np.errstate(invalid="ignore",divide="ignore"): rx=cur/ref
+    ok=np.isfinite(rx)&(ref!=0)
+    green=np.where(up,rx>=sv,rx<=sv); amber=np.where(up,rx>=sa,rx<=sa)
+    return np.where(ok,np.where(green,2,np.where(amber,1,0)),-1)
+
+def grid(data,mults=(0.95,1.0,1.05),variants=((0.0,0.0),),annee=2026,grain="M",mois=6):
+    """Statuts (multiplicateur, variante, KPI) et statuts de base (budget et seuils de M1) ; renvoie (clés, S, base)."""
+    keys,cur,prev,py,bud=movers.values(data,annee,grain,mois)
+    par=[B.rag_params(k) for k in keys]
+    up=np.array([p[0]=="UP" for p in par]); sgn=np.where(up,1.0,-1.0)
+    sv0=np.array([p[1] for p in par]); sa0=np.array([p[2] for p in par])
+    m=np.asarray(mults,dtype=float)[:,None,None]; v=np.asarray(variants,dtype=float).reshape(-1,2)
+    b=bud[None,None,:]*m
+    ref=np.where(np.nan_to_num(b)>0,b,py)                             # IF(N(budget)>0, budget, N-1)
+    sv=(sv0+sgn*v[:,0:1])[None]; sa=(sa0+sgn*v[:,1:2])[None]
+    S=rag(cur,ref,up,sv,sa)
+    base=rag(cur,np.where(np.nan_to_num(bud)>0,bud,py),up,sv0,sa0)
+    return keys,S,base
+
+def summary(data,mults=(0.95,1.0,1.05),variants=((0.0,0.0),),annee=2026,grain="M",mois=6):
+    """Une ligne par scénario : (multiplicateur, variante, nb vert, ambre, rouge, [(clé, statut base, statut scénario)])."""
+    keys,S,base=grid(data,mults,variants,annee,grain,mois)
+    cnt=np.stack([(S==c).sum(-1) for c in (2,1,0)],-1)
+    name=lambda c:STATUS[c] if c>=0 else ""
+    out=[]
+    for i,mu in enumerate(mults):
+        for j,va in enumerate(variants):
+            flip=np.nonzero(S[i,j]!=base)[0]
+            out.append((mu,tuple(va),*map(int,cnt[i,j]),[(keys[k],name(base[k]),name(S[i,j,k])) for k in flip]))
+    return out
+
+if __name__=="__main__":
+    import argparse, time
+    ap=argparse.ArgumentParser(description="Scénarios budget × seuils RAG : KPI qui changent de statut")
+    ap.add_argument("--budget",type=float,nargs="+",default=[0.95,1.0,1.05],help="multiplicateurs du budget")
+    ap.add_argument("--seuils",nargs="+",default=["0:0"],metavar="DV:DA",help="décalages des seuils vert:ambre (sens exigeant)")
+    ap.add_argument("--annee",type=int,default=2026); ap.add_argument("--grain",choices="MQY",default="M")
+    ap.add_argument("--mois",type=int,default=6)
+    ap.add_argument("--retours",nargs="*",help="classeurs retournés (défaut : magasin KPI, sinon données de démo)")
+    ap.add_argument("--store",help="magasin KPI persistant (kpistore)"); ap.add_argument("--site",default="cosmos")
+    ap.add_argument("--detail",action="store_true",help="liste les KPI qui changent de statut")
+    a=ap.parse_args()
+    import kpistore; data=kpistore.source(a.store,a.site,a.retours)
+    variants=[tuple(float(x) for x in v.split(":")) for v in a.seuils]
+    t=time.perf_counter(); rows=summary(data,a.budget,variants,a.annee,a.grain,a.mois); dt=time.perf_counter()-t
+    print("%-7s %-12s %6s %6s %6s %6s"%("budget","seuils","vert","ambre","rouge","bascul."))
+    for mu,va,g,am,r,flips in rows:
+        print("%-7s %-12s %6d %6d %6d %6d"%("×%.3g"%mu,"%+.3g:%+.3g"%va,g,am,r,len(flips)))
+        if a.detail:
+            for k,x,y in flips: print("          %-30s %-6s -> %s"%(k,x or "-",y or "-"))
+    print("SCENARIOS: %d × %d KPI en %.3fs"%(len(rows),len(B.KMETA),dt))
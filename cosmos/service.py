@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+"""Service local de rapports Cosmos (asyncio, HTTP minimal, sans dépendance externe).
+Tâches build / recalc / export identifiées par (site, période, grain, langue, version des données) :
+exécuteur borné avec file d'attente (503 quand elle est pleine), tâches identiques en cours mutualisées,
+résultats rangés dans un cache adressé par contenu (objets sha256 + références par clé de tâche).
+
+    python service.py --port 8765 --workers 2
+    GET /build?annee=2026&mois=6&grain=M&lang=FR&data=v1    -> .xlsx (valeurs en cache)
+    GET /recalc?...                                          -> JSON erreurs de formules (format recalc_win)
+    GET /export?...                                          -> JSON KPI courant / précédent / N-1
+    GET /status                                              -> file, tâches en cours, compteurs
+data=demo (défaut) : jeu de démo du CLI (gen_data()) ; autre valeur : tirage de démo de cette version ;
+data=store : données du magasin KPI persistant (--kpis, kpistore) ; la révision du magasin entre dans la clé de tâche."""
+import asyncio, glob, hashlib, io, json, os, threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from urllib.parse import parse_qsl, urlsplit
+
+HERE=os.path.dirname(os.path.abspath(__file__))
+KINDS={"build":"application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+       "recalc":"application/json","export":"application/json"}
+SITES=("cosmos",)   # seul site généré par build_cosmos
+PARAMS=("site","annee","mois","grain","lang","data")
+DEFAULTS={"site":"cosmos","annee":"2026","mois":"6","grain":"M","lang":"FR","data":"demo"}
+
+class BadRequest(ValueError): pass
+class Busy(RuntimeError): pass
+
+def code_version():
+    """Empreinte du code générateur : une modification invalide toutes les références du cache."""
+    h=hashlib.sha1()
+    for fn in sorted(glob.glob(os.path.join(HERE,"*.py"))):
+        with open(fn,"rb") as f: h.update(f.read())
+    return h.hexdigest()[:12]
+
+def parse(kind,q):
+    """Paramètres de requête -> tâche normalisée (kind, params) ; BadRequest si invalide."""
+    if kind not in KINDS: raise BadRequest("tâche inconnue : %s"%kind)
+    p=dict(DEFAULTS); p.update({k:v for k,v in q.items() if k in PARAMS})
+    if p["site"] not in SITES: raise BadRequest("site inconnu : %s"%p["site"])
+    if p["grain"] not in ("M","Q","Y"): raise BadRequest("grain : M, Q ou Y")
+    if p["lang"] not in ("FR","EN"): raise BadRequest("lang : FR ou EN")
+    try: p["annee"]=int(p["annee"]); p["mois"]=int(p["mois"])
+    except ValueError: raise BadRequest("annee / mois entiers")
+    if not 2024<=p["annee"]<=2026 or not 1<=p["mois"]<=12: raise BadRequest("période hors base (2024-2026, mois 1-12)")
+    if p["data"]=="store":
+        root=os.environ.get("COSMOS_KPIS")
+        if not root: raise BadRequest("pas de magasin KPI (--kpis)")
+        import kpistore; p["data"]="store@%d"%kpistore.Store(root,p["site"]).meta["rev"]
+    return kind,tuple(p[k] for k in PARAMS)
+
+def dataset(site,data):
+    """Données d'une tâche : magasin KPI (store@révision) ou démo (data = version du tirage)."""
+    import build_cosmos as B
+    if data.startswith("store@"):
+        import kpistore; return kpistore.Store(os.environ["COSMOS_KPIS"],site).data()
+    return B.gen_data() if data=="demo" else B.gen_data(data)
+
+# ---------------------------------------------------------------- tâches (exécuteur : threads ou processus)
+def _workbook(p,frag_cache):
+    import build_cosmos as B, validate
+    site,annee,mois,grain,lang,data=p
+    d=dataset(site,data); validate.ensure(d,annee,grain,mois)
+    ctx=B.Build(frag_cache)
+    if data.startswith("store@"):
+        import kpistore; ctx.comments.update(kpistore.Store(os.environ["COSMOS_KPIS"],site).comments())
+    B.assemble(ctx,d)
+    B.select(ctx,LANG=lang,GRAIN=grain,ANNEE=annee,MOIS=mois)
+    return ctx
+
+def run_job(kind,p,frag_cache=None):
+    """Exécute une tâche -> octets du résultat. Build réentrant (contexte par appel) : sûr en threads."""
+    import xlcalc
+    if kind=="export": return json.dumps(export(p),ensure_ascii=False,indent=1).encode("utf-8")
+    ctx=_workbook(p,frag_cache); vals=xlcalc.evaluate(ctx.wb)
+    if kind=="recalc": return json.dumps(errors(vals),ensure_ascii=False,indent=2).encode("utf-8")
+    import xlsave
+    buf=io.BytesIO(); xlsave.save(ctx.wb,buf,vals,jobs=1); return buf.getvalue()
+
+def errors(vals):
+    """Valeurs évaluées -> résumé d'erreurs au format de recalc_win.recalc."""
+    from openpyxl.utils import get_column_letter
+    from xlcalc import XLErr
+    details={}; total=0
+    for sn,cells in vals.items():
+        for (r,c),v in sorted(cells.items()):
+            if isinstance(v,XLErr): details.setdefault(v.code,[]).append(f"{sn}!{get_column_letter(c)}{r}"); total+=1
+    return {"status":"success" if total==0 else "errors_found","total_errors":total,
+            "error_summary":{e:{"count":len(l),"locations":l[:25]} for e,l in details.items()}}
+
+def export(p):
+    """KPI courant / précédent / N-1 de la période, sans construire de classeur (periods, mêmes règles que M0)."""
+    import numpy as np, periods, build_cosmos as B
+    from xlcalc import XLErr
+    site,annee,mois,grain,lang,data=p
+    d=dataset(site,data); keys=list(B.KMETA)
+    X=np.array([[np.nan if v is None else v for v in d[k]] for k in keys],dtype=float)
+    pv=periods.pvals(periods.cube(X,periods.bounds(annee,grain,[mois])),
+                     [B.M3_ROW[k] for k in keys],[B.KMETA[k][4] for k in keys],B.SH["M3"],0)
+    def val(row,agg,d1,d2):
+        v=pv[(B.SH["M3"],row,"LAST",None,d2)] if agg=="LAST" else pv[(B.SH["M3"],row,"SUM" if agg=="SUM" else "AVG",d1,d2)]
+        return v.code if isinstance(v,XLErr) else v
+    out={}
+    for k in keys:
+        _,fr,en,u,agg,dep,h2,b,base=B.KMETA[k]; row=B.M3_ROW[k]
+        out[k]={"label":en if lang=="EN" else fr,"unit":u,"agg":agg,
+                "cur":val(row,agg,"P_START","P_END"),"prev":val(row,agg,"PP_START","PP_END"),"py":val(row,agg,"PY_START","PY_END")}
+    return {"site":site,"period":periods.label(annee,grain,mois),"lang":lang,"data":data,"kpis":out}
+
+# ---------------------------------------------------------------- cache adressé par contenu
+class Store:
+    """objects/<sha256> : contenus ; refs/<clé de tâche> : sha256 du résultat. Écritures atomiques."""
+    def __init__(self,root):
+        self.root=root
+        for d in ("objects","refs"): os.makedirs(os.path.join(root,d),exist_ok=True)
+
+    def _write(self,fn,data):
+        tmp="%s.%d.%d.tmp"%(fn,os.getpid(),threading.get_ident())
+        with open(tmp,"wb") as f: f.write(data)
+        os.replace(tmp,fn)
+
+    def get(self,key):
+        try:
+            with open(os.path.join(self.root,"refs",key),"rb") as f: sha=f.read().decode()
+            with open(os.path.join(self.root,"objects",sha),"rb") as f: return f.read()
+        except OSError: return None
+
+    def put(self,key,data):
+        sha=hashlib.sha256(data).hexdigest(); obj=os.path.join(self.root,"objects",sha)
+        if not os.path.exists(obj): self._write(obj,data)
+        self._write(os.path.join(self.root,"refs",key),sha.encode())
+        return sha
+
+# ---------------------------------------------------------------- service
+class Service:
+    def __init__(self,store,workers=2,queue=16,processes=False,frag_cache=None):
+        self.store=store; self.frag_cache=frag_cache; self.version=code_version()
+        self.pool=(ProcessPoolExecutor if processes else ThreadPoolExecutor)(workers)
+        self.workers=workers; self.queue=asyncio.Queue(queue); self.inflight={}; self.tasks=[]
+        self.stats={"hit":0,"miss":0,"joined":0,"busy":0,"error":0}
+
+    def key(self,kind,p):
+        return hashlib.sha1(repr((self.version,kind,p)).encode("utf-8")).hexdigest()
+
+    async def start(self):
+        self.tasks=[asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def close(self):
+        for t in self.tasks: t.cancel()
+        self.pool.shutdown(wait=False,cancel_futures=True)
+
+    async def submit(self,kind,p):
+        """-> (octets, 'hit'|'joined'|'miss'). Busy si la file est pleine."""
+        key=self.key(kind,p); loop=asyncio.get_running_loop()
+        data=await loop.run_in_executor(None,self.store.get,key)
+        if data is not None: self.stats["hit"]+=1; return data,"hit"
+        fut=self.inflight.get(key)
+        if fut is not None: self.stats["joined"]+=1; return await asyncio.shield(fut),"joined"
+        fut=loop.create_future()
+        try: self.queue.put_nowait((key,kind,p,fut))
+        except asyncio.QueueFull:
+            self.stats["busy"]+=1; raise Busy("file pleine (%d)"%self.queue.maxsize)
+        self.inflight[key]=fut; self.stats["miss"]+=1
+        return await asyncio.shield(fut),"miss"
+
+    async def _worker(self):
+        loop=asyncio.get_running_loop()
+        while True:
+            key,kind,p,fut=await self.queue.get()
+            try:
+                data=await loop.run_in_executor(self.pool,run_job,kind,p,self.frag_cache)
+                await loop.run_in_executor(None,self.store.put,key,data)
+                fut.set_result(data)
+            except Exception as e:
+                self.stats["error"]+=1; fut.set_exception(e)
+                fut.exception()   # marquée lue : pas d'avertissement si aucun client n'attend plus
+            finally:
+                self.inflight.pop(key,None); self.queue.task_done()
+
+    def status(self):
+        return {"version":self.version,"workers":self.workers,"queued":self.queue.qsize(),
+                "queue_max":self.queue.maxsize,"inflight":len(self.inflight),**self.stats}
+
+# ---------------------------------------------------------------- HTTP
+REASON={200:"OK",400:"Bad Request",404:"Not Found",405:"Method Not Allowed",422:"Unprocessable Entity",500:"Internal Server Error",503:"Service Unavailable"}
+
+async def _reply(w,code,body,ctype="application/json",extra=()):
+    if isinstance(body,(dict,list)): body=json.dumps(body,ensure_ascii=False).encode("utf-8")
+    head=[f"HTTP/1.1 {code} {REASON[code]}",f"Content-Type: {ctype}",f"Content-Length: {len(body)}","Connection: close",*extra]
+    w.write(("\r\n".join(head)+"\r\n\r\n").encode("latin-1")+body)
+    await w.drain(); w.close()
+
+def handler(svc):
+    from validate import ERROR, ValidationError, fmt
+    async def handle(r,w):
+        try:
+            line=(await r.readline()).decode("latin-1").split()
+            while (await r.readline()) not in (b"\r\n",b"\n",b""): pass   # en-têtes ignorés
+            if len(line)<2: return await _reply(w,400,{"error":"requête invalide"})
+            if line[0]!="GET": return await _reply(w,405,{"error":"GET uniquement"})
+            u=urlsplit(line[1]); kind=u.path.strip("/")
+            if kind=="status": return await _reply(w,200,svc.status())
+            if kind not in KINDS: return await _reply(w,404,{"error":"build, recalc, export ou status"})
+            kind,p=parse(kind,dict(parse_qsl(u.query)))
+            data,how=await svc.submit(kind,p)
+            fn="cosmos-%s-%s-%s-%d%02d-%s.%s"%(kind,p[0],p[3],p[1],p[2],p[4],"xlsx" if kind=="build" else "json")
+            await _reply(w,200,data,KINDS[kind],(f"X-Cache: {how}",f'Content-Disposition: inline; filename="{fn}"'))
+        except BadRequest as e: await _reply(w,400,{"error":str(e)})
+        except ValidationError as e: await _reply(w,422,{"error":str(e),"issues":[fmt(i) for i in e.issues if i[0]==ERROR][:50]})
+        except Busy as e: await _reply(w,503,{"error":str(e)},extra=("Retry-After: 5",))
+        except (ConnectionError,asyncio.IncompleteReadError): w.close()
+        except Exception as e: await _reply(w,500,{"error":"%s: %s"%(type(e).__name__,e)})
+    return handle
+
+async def serve(host,port,**kw):
+    svc=Service(**kw); await svc.start()
+    server=await asyncio.start_server(handler(svc),host,port)
+    print("Cosmos service · http://%s:%d · version %s · %d workers"%(host,port,svc.version,svc.workers),flush=True)
+    try:
+        async with server: await server.serve_forever()
+    finally: await svc.close()
+
+if __name__=="__main__":
+    import argparse
+    ap=argparse.ArgumentParser(description="Service local de rapports Cosmos")
+    ap.add_argument("--host",default="127.0.0.1"); ap.add_argument("--port",type=int,default=8765)
+    ap.add_argument("--workers",type=int,default=2,help="tâches exécutées en parallèle")
+    ap.add_argument("--queue",type=int,default=16,help="tâches en attente au-delà desquelles le service répond 503")
+    ap.add_argument("--processes",action="store_true",help="exécuteur à processus (défaut : threads, builds réentrants)")
+    ap.add_argument("--store",default=os.path.join(HERE,".store"),help="cache des résultats (adressé par contenu)")
+    ap.add_argument("--cache",default=os.path.join(HERE,".cache"),help="cache des fragments du rapport")
+    ap.add_argument("--kpis",help="magasin KPI persistant (kpistore) servi par data=store")
+    a=ap.parse_args()
+    if a.kpis: os.environ["COSMOS_KPIS"]=os.path.abspath(a.kpis)   # hérité par les processus de l'exécuteur
+    try: asyncio.run(serve(a.host,a.port,store=Store(a.store),workers=a.workers,queue=a.queue,processes=a.processes,frag_cache=a.cache))
+    except KeyboardInterrupt: pass
@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""Table de faits locataire × mois (bail) : GLA, loyer, loyer cible, ventes, zone, secteur.
+Stockage en colonnes numpy, lignes triées par mois (tranche d'un mois par searchsorted), zones et secteurs codés
+(np.unique) avec un index de lignes par code. Cumuls mensuels et par zone en bincount ; le top N des locataires
+par sélection de tas (heapq.nlargest) sur les loyers agrégés du mois, sans trier tout le portefeuille.
+Alimente les KPI (OCR, loyer /m², loyer en place, ventes) et les tableaux de détail 3.3 / 3.4 / 3.5.
+
+Faits CSV (en-tête) : locataire, mois (AAAA-MM), zone, secteur, gla, loyer, loyer_cible, ventes[, statut, etape, proba].
+statut = prospect : ligne de pipeline (loyer = valeur locative), hors KPI ; etape / proba pour la section 3.5."""
+import csv, heapq
+import numpy as np
+import build_cosmos as B
+from periods import BASE_YEAR
+
+TOP=10; TOP_PROSPECTS=5
+
+def codes(values):
+    """Libellés -> (libellés distincts, codes, index {code: lignes})."""
+    labels,code=np.unique(np.array(values,dtype=object).astype(str),return_inverse=True)
+    order=np.argsort(code,kind="stable"); cut=np.searchsorted(code[order],np.arange(len(labels)+1))
+    return labels,code,{c:order[cut[c]:cut[c+1]] for c in range(len(labels))}
+
+class Facts:
+    def __init__(self,rows):
+        """rows : dicts (une ligne CSV chacun)."""
+        rows=sorted(rows,key=lambda r:r["mois"])
+        col=lambda c,d="":[r.get(c) or d for r in rows]
+        num=lambda c:np.array(col(c,0),dtype=float)
+        self.month=np.array([(int(m[:4])-BASE_YEAR)*12+int(m[5:7])-1 for m in col("mois")])
+        self.cut=np.searchsorted(self.month,np.arange(B.N_MONTHS+1))   # tranche du mois m : cut[m]:cut[m+1]
+        self.gla,self.rent,self.target,self.sales,self.proba=num("gla"),num("loyer"),num("loyer_cible"),num("ventes"),num("proba")
+        self.prospect=np.array([s.strip().lower()=="prospect" for s in col("statut")])
+        self.stage=np.array(col("etape"),dtype=object)
+        self.tenants,self.tenant,_=codes(col("locataire"))
+        self.zones,self.zone,self.by_zone=codes(col("zone"))
+        self.sectors,self.sector,self.by_sector=codes(col("secteur"))
+
+    @classmethod
+    def load(cls,fn):
+        with open(fn,newline="",encoding="utf-8") as f: return cls(list(csv.DictReader(f)))
+
+    def rows(self,m,prospect=False,zone=None,sector=None):
+        """Lignes du mois m (baux en place, ou pipeline), restreintes à une zone / un secteur par leur index."""
+        ix=np.arange(self.cut[m],self.cut[m+1])
+        for label,labels,index in ((zone,self.zones,self.by_zone),(sector,self.sectors,self.by_sector)):
+            if label is not None:
+                c=np.searchsorted(labels,label)
+                ix=np.intersect1d(ix,index[c],assume_unique=True) if c<len(labels) and labels[c]==label else ix[:0]
+        return ix[self.prospect[ix]==prospect]
+
+    def last(self):
+        """Dernier mois avec des baux en place."""
+        live=np.nonzero(np.bincount(self.month[~self.prospect],minlength=B.N_MONTHS)[:B.N_MONTHS])[0]
+        return int(live[-1]) if len(live) else None
+
+    # ------------------------------------------------------------ KPI
+    def kpis(self):
+        """Séries lease / com (forme gen_data) : OCR, loyer /m², loyer en place, ventes, ventes /m² ; None sans faits."""
+        live=~self.prospect&(self.month>=0)&(self.month<B.N_MONTHS); m=self.month[live]
+        s=lambda x:np.bincount(m,x[live],B.N_MONTHS)
+        rent,gla,sales=s(self.rent),s(self.gla),s(self.sales)
+        rs=s(np.where(self.sales>0,self.rent,0.0))   # OCR : loyers des seuls locataires déclarant leurs ventes
+        ok=np.bincount(m,minlength=B.N_MONTHS)>0
+        val=lambda a,b,nd:[round(float(x/y),nd) if k and y>0 else None for x,y,k in zip(a,b,ok)]
+        amt=lambda a:[int(round(v)) if k else None for v,k in zip(a,ok)]
+        return {"kpi.lease.ocr":val(rs,sales,4),"kpi.lease.rent_sqm":val(rent,gla,2),"kpi.lease.passing":amt(rent),
+                "kpi.com.tenant_sales":amt(sales),"kpi.com.sales_sqm":val(sales,gla,2)}
+
+    # ------------------------------------------------------------ détails
+    def top(self,m=None,n=TOP,zone=None,sector=None):
+        """Section 3.4 : n premiers locataires du mois par loyer (GLA / loyer agrégés par locataire), part du rent roll filtré."""
+        m=self.last() if m is None else m
+        if m is None: return []                       # aucun bail en place
+        ix=self.rows(m,zone=zone,sector=sector)
+        nt=len(self.tenants); t=self.tenant[ix]
+        rent=np.bincount(t,self.rent[ix],nt); gla=np.bincount(t,self.gla[ix],nt)
+        sector=np.zeros(nt,int); sector[t]=self.sector[ix]
+        total=rent.sum()
+        best=heapq.nlargest(n,np.nonzero(rent)[0],key=rent.__getitem__)
+        return [(str(self.tenants[i]),str(self.sectors[sector[i]]),int(gla[i]),int(round(rent[i])),round(float(rent[i]/total),4))
+                for i in best]
+
+    def zone_roll(self,m=None):
+        """Section 3.3 : par zone, GLA, loyer cible, réalisé, atteinte (ordre de l'index des zones)."""
+        m=self.last() if m is None else m
+        if m is None: return []
+        ix=self.rows(m)
+        nz=len(self.zones); z=self.zone[ix]
+        gla,target,rent=(np.bincount(z,x[ix],nz) for x in (self.gla,self.target,self.rent))
+        return [(str(self.zones[c]),int(gla[c]),int(round(target[c])),int(round(rent[c])),
+                 round(float(rent[c]/target[c]),4) if target[c] else None) for c in range(nz) if gla[c] or target[c]]
+
+    def prospects(self,m=None,n=TOP_PROSPECTS):
+        """Section 3.5 : n premiers prospects du mois par valeur locative pondérée (loyer × proba)."""
+        m=self.last() if m is None else m
+        if m is None: return []
+        ix=self.rows(m,prospect=True)
+        w=self.rent*self.proba
+        best=heapq.nlargest(n,ix,key=w.__getitem__)
+        return [(str(self.tenants[self.tenant[i]]),str(self.sectors[self.sector[i]]),int(self.gla[i]),int(round(self.rent[i])),
+                 str(self.stage[i]),round(float(self.proba[i]),4)) for i in best]
+
+    def details(self,m=None):
+        m=self.last() if m is None else m
+        if m is None: return {}
+        out={"3.3":self.zone_roll(m),"3.4":self.top(m)}
+        if self.prospect.any(): out["3.5"]=self.prospects(m)
+        return {k:v for k,v in out.items() if v}
+
+def load(fn):
+    """Faits CSV -> (séries KPI, lignes de détail par section)."""
+    F=Facts.load(fn)
+    return F.kpis(),F.details()
+
+ZONES=(("RDC / Ground floor",0.36),("Niveau 1 / Level 1",0.32),("Niveau 2 / Level 2",0.23),("Food court",0.06),("Kiosques / Kiosks",0.03))
+SECTORS=("Mode / Fashion","Alimentaire / Grocery","Restauration / F&B","Loisirs / Leisure","Électronique / Electronics",
+         "Santé / Health","Beauté / Beauty","Services","Télécom","Sport")
+
+def demo_facts(fn,tenants=90,seed=1):
+    """Faits de démo : GLA log-normale (quelques locomotives), loyer ~9 000 FCFA/m², OCR ~10 %, croissance lente, 5 prospects."""
+    rng=np.random.default_rng(seed); n=tenants
+    gla=np.round(np.minimum(rng.lognormal(4.6,0.9,n),5000)); gla[:3]=(4200,2100,780)
+    zone=rng.choice(len(ZONES),n,p=[w for _,w in ZONES]); sector=rng.integers(0,len(SECTORS),n)
+    psqm=rng.uniform(6000,14000,n); ocr=rng.uniform(0.06,0.16,n); start=rng.integers(-24,30,n); start[:n//2]=-1
+    with open(fn,"w",newline="",encoding="utf-8") as f:
+        w=csv.writer(f); w.writerow(("locataire","mois","zone","secteur","gla","loyer","loyer_cible","ventes","statut","etape","proba"))
+        for m in range(B.N_MONTHS):
+            grow=1+0.03*m/12; mois="%d-%02d"%(BASE_YEAR+m//12,m%12+1)
+            for i in np.nonzero(start<=m)[0]:
+                rent=round(gla[i]*psqm[i]*grow,-3); sales=round(rent/ocr[i]*rng.uniform(0.9,1.1),-3)
+                w.writerow(("Locataire %04d"%i,mois,ZONES[zone[i]][0],SECTORS[sector[i]],int(gla[i]),int(rent),
+                            int(round(rent*1.06,-3)),int(sales),"","",""))
+            for j in range(TOP_PROSPECTS):
+                w.writerow(("Prospect %02d"%j,mois,ZONES[j%len(ZONES)][0],SECTORS[j],int(150+j*300),int((150+j*300)*10000),
+                            "","","prospect",("Prospection / Prospecting","LOI","Négociation / Negotiation","STP / Subject-to")[j%4],
+                            round(0.3+0.1*j,2)))
+
+if __name__=="__main__":
+    import argparse, time
+    ap=argparse.ArgumentParser(description="Table de faits locataires × mois -> KPI lease / com + sections 3.3 / 3.4 / 3.5")
+    ap.add_argument("facts",help="faits CSV")
+    ap.add_argument("--demo",type=int,metavar="N",help="écrit d'abord des faits de démo pour N locataires")
+    a=ap.parse_args()
+    if a.demo: demo_facts(a.facts,a.demo)
+    t=time.perf_counter(); k,d=load(a.facts)
+    for key,v in k.items(): print("  %-22s"%key," ".join(str(x) for x in v[-6:]))
+    for num,rows in d.items():
+        print("  [%s]"%num)
+        for r in rows: print("    ",*r)
+    print("TENANTS: %.2fs"%(time.perf_counter()-t))
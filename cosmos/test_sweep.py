@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+"""Balayage : valeurs en cache de chaque sortie == réévaluation xlcalc du fichier enregistré (pytest)."""
+import datetime, glob, os
+from openpyxl import load_workbook
+import build_cosmos as B, xlcalc
+
+def same(a,b):
+    if isinstance(a,(datetime.date,datetime.datetime)): a=xlcalc.num(a)   # dates relues : numéro de série
+    if isinstance(a,(int,float)) and isinstance(b,(int,float)) and not isinstance(a,bool):
+        return abs(a-b)<=1e-9*max(1.0,abs(a),abs(b))
+    return (a if a not in ("",None) else None)==(b if b not in ("",None) else None) or str(a)==str(b)
+
+def test_sweep_cached_values(tmp_path):
+    B.build(str(tmp_path/"r.xlsx"),sweep="Q",annee=2026)
+    outs=sorted(glob.glob(str(tmp_path/"r-*.xlsx")))
+    assert len(outs)==4
+    for fn in outs:
+        ref=xlcalc.evaluate(load_workbook(fn))
+        wb=load_workbook(fn,data_only=True)
+        bad=[(t,r,c,wb[t].cell(r,c).value,v) for t,d in ref.items() for (r,c),v in d.items() if not same(wb[t].cell(r,c).value,v)]
+        assert not bad,"%s : %d écarts, ex. %s"%(os.path.basename(fn),len(bad),bad[:5])
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""Validation vectorisée (numpy) de la matrice KPI × mois, avant toute écriture ni recalcul.
+Contrôles en bloc : type, plages d'unité (parts en % dans 0–1,3 comme le générateur, sur les mois rapportés et leurs
+comparatifs), signes des montants/volumes, saisies manquantes sur la période rapportée, dénominateurs nuls des RATIO
+(Δ% préc. / N-1 vides, alerte), valeurs atypiques vs l'historique propre du KPI (médiane / MAD). Les erreurs arrêtent le build."""
+import warnings
+import numpy as np
+import build_cosmos as B
+import periods
+
+PCT=(0.0,1.3)
+ADDITIVE={"FCFA","nb","visites","ETP","m²","unité"}   # montants / volumes (SUM, LAST) : jamais négatifs
+SIGNED={"kpi.rh.fte_gap"}   # écarts : signe libre
+UNBOUNDED={"kpi.com.lfl","kpi.lease.reversion","kpi.mkt.event_roi",   # % signés, rendements ou rapports au budget :
+           "kpi.rh.payroll_var","kpi.foot.vs_budget","kpi.fac.util_cost","kpi.fac.capex_var"}   # hors contrôle de plage
+HIST=12   # mois d'historique de référence
+Z_MAX=8.0   # écart robuste (en MAD normalisés) au-delà duquel une valeur est atypique
+ERROR,WARNING="erreur","alerte"
+
+class ValidationError(ValueError):
+    def __init__(self,issues):
+        self.issues=issues; err=[i for i in issues if i[0]==ERROR]
+        super().__init__("%d erreur(s) de données, ex. %s"%(len(err),"; ".join(fmt(i) for i in err[:3])))
+    def __reduce__(self): return (ValidationError,(self.issues,))   # remonte intacte d'un processus de l'exécuteur
+
+def fmt(i):
+    lvl,code,key,m,v,msg=i
+    return "%s %s%s : %s"%(key,"" if m is None else periods.label(periods.BASE_YEAR+m//12,"M",m%12+1)+" ",repr(v),msg)
+
+def matrix(data,keys):
+    """{clé: [mois]} -> X (KPI, mois) float, NaN = vide ; masque des saisies non numériques."""
+    ok=lambda v:isinstance(v,(int,float)) and not isinstance(v,bool)
+    X=np.array([[v if ok(v) else np.nan for v in data.get(k,())] for k in keys],dtype=float)
+    bad=np.array([[v is not None and not ok(v) for v in data.get(k,())] for k in keys],dtype=bool)
+    return X,bad
+
+def windows(annee,grain,mois):
+    """Colonnes (index de mois) des fenêtres courante, précédente et N-1 de toutes les périodes demandées."""
+    b=periods.bounds(annee,grain,np.atleast_1d(mois)); T=B.N_MONTHS
+    cols=lambda d1,d2:np.unique(np.concatenate([np.arange(s,e+1) for s,e in zip(b[d1],b[d2])]))
+    clip=lambda c:c[(c>=0)&(c<T)]
+    return clip(cols("P_START","P_END")),clip(np.concatenate([cols("PP_START","PP_END"),cols("PY_START","PY_END")])),int(np.min(b["P_START"]))
+
+def check(data,annee=2026,grain="M",mois=6):
+    """Renvoie les anomalies [(niveau, code, clé, index mois, valeur, message)], triées par KPI puis mois."""
+    keys=list(B.KMETA)
+    short=[k for k in keys if len(data.get(k,()))!=B.N_MONTHS]
+    if short: return [(ERROR,"forme",k,None,len(data.get(k,())),"série de %d mois attendue"%B.N_MONTHS) for k in short]
+    X,bad=matrix(data,keys)
+    meta=[B.KMETA[k] for k in keys]
+    pct=np.array([B.is_pct(m[3]) and m[0] not in UNBOUNDED for m in meta])[:,None]
+    add=np.array([m[3] in ADDITIVE and m[4] in ("SUM","LAST") and m[0] not in SIGNED for m in meta])[:,None]
+    ratio=np.array([m[4]=="RATIO" for m in meta])[:,None]
+    cur,den,p0=windows(annee,grain,mois)
+    T=np.arange(B.N_MONTHS)[None,:]; incur=np.isin(T,cur); inden=np.isin(T,den)|incur
+    H=np.where((T<p0)&(T>=p0-HIST),X,np.nan)   # historique : HIST mois précédant la 1re période contrôlée
+    with warnings.catch_warnings():   # KPI sans historique : médiane de NaN
+        warnings.simplefilter("ignore",RuntimeWarning)
+        med=np.nanmedian(H,1,keepdims=True); mad=np.nanmedian(np.abs(H-med),1,keepdims=True)*1.4826
+        z=np.abs(X-med)/np.where(mad>0,mad,np.nan)
+    rules=((ERROR,"type",bad,"saisie non numérique"),
+           (ERROR,"inf",np.isinf(X),"valeur infinie"),
+           (ERROR,"plage",pct&inden&((X<PCT[0])|(X>PCT[1])),"pourcentage hors %g–%g"%PCT),
+           (ERROR,"signe",add&(X<0),"montant / volume négatif"),
+           (ERROR,"manquant",incur&np.isnan(X)&~bad,"saisie manquante sur la période"),
+           (WARNING,"den0",ratio&inden&(X==0),"RATIO nul : dénominateur des Δ% (vides)"),
+           (WARNING,"atypique",incur&(z>Z_MAX),"atypique vs historique (> %g MAD)"%Z_MAX))
+    out=[]
+    for lvl,code,mask,msg in rules:
+        for i,m in zip(*np.nonzero(mask)):
+            v=data[keys[i]][m]; out.append((lvl,code,keys[i],int(m),v,msg))
+    ix={k:i for i,k in enumerate(keys)}; out.sort(key=lambda i:(ix[i[2]],i[3]))
+    return out
+
+def ensure(data,annee=2026,grain="M",mois=6):
+    """check() puis ValidationError s'il y a des erreurs ; renvoie les alertes restantes."""
+    issues=check(data,annee,grain,mois)
+    if any(i[0]==ERROR for i in issues): raise ValidationError(issues)
+    return issues
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""KPI capital humain (C1) depuis les journaux RH bruts : entrées, sorties, absences, postes ouverts.
+Un seul balayage des événements triés par date maintient l'état (ETP de chaque agent, date d'ouverture des postes)
+et verse des différences journalières ; les cumuls journaliers puis les réductions mensuelles (numpy) donnent
+ETP en fin de mois, turnover, absentéisme, postes ouverts et time-to-fill sans refiltrer le journal mois par mois.
+
+Journal CSV (en-tête) : type, matricule, date, date_fin, etp, poste. Types : E entrée (etp, poste pourvu éventuel),
+S sortie (dernier jour travaillé), A absence (date -> date_fin incluses), P ouverture de poste, X poste annulé."""
+import csv
+import numpy as np
+import build_cosmos as B
+from periods import BASE_YEAR
+
+BUDGET_FTE=115   # ETP budgétés (fte_gap = ETP - budget)
+ORDER={"P":0,"X":1,"E":2,"A":3,"S":4}   # même jour : le poste s'ouvre avant d'être pourvu, la sortie après l'absence
+
+START=np.datetime64("%d-01-01"%BASE_YEAR,"D")
+MONTHS=(np.datetime64("%d-01"%BASE_YEAR,"M")+np.arange(B.N_MONTHS+1)).astype("datetime64[D]")
+DAYS=int((MONTHS[-1]-START).astype(np.int64))
+M0=(MONTHS[:-1]-START).astype(np.int64)   # 1er jour de chaque mois
+ME=(MONTHS[1:]-START).astype(np.int64)-1   # dernier jour
+
+def events(files):
+    """Journaux CSV -> événements (jour, rang, type, matricule, jour de fin, etp, poste) triés une fois."""
+    out=[]
+    day=lambda s:int((np.datetime64(s.strip(),"D")-START).astype(np.int64)) if s.strip() else None
+    for fn in files:
+        with open(fn,newline="",encoding="utf-8") as f:
+            for r in csv.DictReader(f):
+                t=r["type"].strip().upper()
+                out.append((day(r["date"]),ORDER[t],t,r.get("matricule","").strip(),day(r.get("date_fin") or ""),
+                            float(r.get("etp") or 1),r.get("poste","").strip()))
+    out.sort(key=lambda e:e[:2])
+    return out
+
+def sweep(evs):
+    """Balayage unique -> différences journalières (ETP, agents, absences, postes) et sorties / pourvois par jour."""
+    n=DAYS+1; clip=lambda d:min(max(d,0),DAYS)
+    fte=np.zeros(n); ppl=np.zeros(n); absent=np.zeros(n); pos=np.zeros(n)
+    exits=np.zeros(n); filled=np.zeros(n); wait=np.zeros(n)
+    staff={}; opened={}
+    for d,_,t,who,end,etp,poste in evs:
+        if t=="E":
+            staff[who]=etp; fte[clip(d)]+=etp; ppl[clip(d)]+=1
+            if poste in opened:
+                o=opened.pop(poste); pos[clip(d)]-=1
+                if 0<=d<DAYS: filled[d]+=1; wait[d]+=d-o
+        elif t=="S" and who in staff:
+            e=staff.pop(who); fte[clip(d+1)]-=e; ppl[clip(d+1)]-=1
+            if 0<=d<DAYS: exits[d]+=1
+        elif t=="A":
+            e=staff.get(who,1.0); absent[clip(d)]+=e; absent[clip((end if end is not None else d)+1)]-=e
+        elif t=="P" and poste not in opened: opened[poste]=d; pos[clip(d)]+=1
+        elif t=="X" and poste in opened: opened.pop(poste); pos[clip(d)]-=1
+    cum=lambda x:np.cumsum(x)[:DAYS]
+    return cum(fte),cum(ppl),np.minimum(cum(absent),cum(fte)),cum(pos),exits[:DAYS],filled[:DAYS],wait[:DAYS]
+
+def kpis(files,budget=BUDGET_FTE):
+    """Séries C1 (forme gen_data) : headcount, fte_gap, open_pos, ttf, turnover, absence."""
+    fte,ppl,absent,pos,exits,filled,wait=sweep(events(files))
+    red=lambda x:np.add.reduceat(x,M0)
+    with np.errstate(invalid="ignore",divide="ignore"):
+        turn=red(exits)/(red(ppl)/np.diff(np.append(M0,DAYS))); ab=red(absent)/red(fte); ttf=red(wait)/red(filled)
+    val=lambda x,nd:[None if not np.isfinite(v) else round(float(v),nd) for v in x]
+    return {"kpi.rh.headcount":val(fte[ME],1),"kpi.rh.fte_gap":val(fte[ME]-budget,1),
+            "kpi.rh.open_pos":[int(v) for v in pos[ME]],"kpi.rh.ttf":val(ttf,2),
+            "kpi.rh.turnover":val(turn,4),"kpi.rh.absence":val(ab,4)}
+
+def demo_log(fn,staff=120,seed=1):
+    """Journal de démo : effectif initial, départs ~3 %/mois remplacés (poste ouvert au départ, pourvu ~38 j après),
+    absences ~4 % (arrêts de 1 à 10 jours), quelques créations de postes."""
+    rng=np.random.default_rng(seed); rows=[]; nxt=staff
+    iso=lambda d:str(START+np.timedelta64(int(d),"D"))
+    active={"M%05d"%i:int(rng.integers(-400,0)) for i in range(staff)}
+    for i,(m,d) in enumerate(active.items()): rows.append(("E",m,iso(d),"",1 if i%10 else 0.5,""))
+    for d in range(DAYS):
+        for m in [m for m,h in active.items() if h<=d]:
+            u=rng.random()
+            if u<0.03/30:
+                rows.append(("S",m,iso(d),"","","")); del active[m]; p="P%05d"%d+m
+                rows.append(("P","",iso(d),"","",p)); h=d+int(rng.gamma(4,38/4))
+                nm="M%05d"%nxt; nxt+=1
+                if h<DAYS: rows.append(("E",nm,iso(h),"",1,p))
+                active[nm]=h
+            elif u<0.03/30+0.04/5.5:
+                rows.append(("A",m,iso(d),iso(d+int(rng.integers(1,11))-1),"",""))
+        if rng.random()<0.3/30:
+            p="N%05d"%d; rows.append(("P","",iso(d),"","",p))
+            h=d+int(rng.gamma(4,38/4))
+            if h<DAYS: nm="M%05d"%nxt; nxt+=1; rows.append(("E",nm,iso(h),"",1,p)); active[nm]=h
+    with open(fn,"w",newline="",encoding="utf-8") as f:
+        w=csv.writer(f); w.writerow(("type","matricule","date","date_fin","etp","poste")); w.writerows(rows)
+
+if __name__=="__main__":
+    import argparse, time
+    ap=argparse.ArgumentParser(description="Journaux RH (entrées, sorties, absences, postes) -> KPI capital humain C1")
+    ap.add_argument("logs",nargs="+",help="journaux CSV")
+    ap.add_argument("--budget",type=float,default=BUDGET_FTE,help="ETP budgétés")
+    ap.add_argument("--demo",type=int,metavar="N",help="écrit d'abord un journal de démo (effectif initial N) dans le 1er CSV")
+    a=ap.parse_args()
+    if a.demo: demo_log(a.logs[0],a.demo)
+    t=time.perf_counter(); k=kpis(a.logs,a.budget)
+    for key,v in k.items(): print("  %-18s"%key," ".join(str(x) for x in v[-6:]))
+    print("WORKFORCE: %.2fs"%(time.perf_counter()-t))
@@ -0,0 +1,575 @@
+# -*- coding: utf-8 -*-
+"""Mini moteur de calcul Python pour les formules émises par build_cosmos.
+Couvre exactement le sous-ensemble du générateur (IF/IFERROR, INDEX/MATCH, SUMIFS, AVERAGEIFS,
+SUMPRODUCT, DATE/EDATE, TEXT, SUBSTITUTE…) + noms définis et références inter-feuilles.
+Sert à pré-calculer les valeurs en cache écrites à côté des formules (ouverture instantanée)."""
+import calendar, datetime, math, re
+from openpyxl.utils import column_index_from_string
+
+# ---------------------------------------------------------------- values
+class XLErr:
+    __slots__=("code",)
+    def __init__(self,code): self.code=code
+    def __repr__(self): return self.code
+E_NA,E_VALUE,E_REF,E_NAME,E_DIV0,E_NUM,E_NULL=(XLErr(c) for c in ("#N/A","#VALUE!","#REF!","#NAME?","#DIV/0!","#NUM!","#NULL!"))
+ERRORS={e.code:e for e in (E_NA,E_VALUE,E_REF,E_NAME,E_DIV0,E_NUM,E_NULL)}
+def iserr(v): return isinstance(v,XLErr)
+_MISS=object()
+
+class Rng:
+    """Référence rectangulaire (feuille, r1, c1, r2, c2) — résolue paresseusement."""
+    __slots__=("sheet","r1","c1","r2","c2")
+    def __init__(self,sheet,r1,c1,r2,c2): self.sheet,self.r1,self.c1,self.r2,self.c2=sheet,r1,c1,r2,c2
+    @property
+    def shape(self): return (self.r2-self.r1+1,self.c2-self.c1+1)
+
+EPOCH=datetime.date(1899,12,30)
+def to_date(n): return EPOCH+datetime.timedelta(days=int(n))
+def to_serial(d): return float((d-EPOCH).days)
+MON_EN=["Jan","Feb","Mar","Apr","May","Jun","Jul","Aug","Sep","Oct","Nov","Dec"]
+
+# ---------------------------------------------------------------- tokenizer
+_TOK=re.compile(r"""\s*(?:
+ (?P<str>"(?:[^"]|"")*")
+|(?P<ref>(?:(?:'(?:[^']|'')+'|[A-Za-z_][\w\.]*)!)?\$?[A-Z]{1,3}\$?\d+(?::\$?[A-Z]{1,3}\$?\d+)?)(?![\w\.(!])
+|(?P<num>\d+(?:\.\d+)?(?:[eE][+-]?\d+)?)
+|(?P<func>[A-Za-z_][\w\.]*)\(
+|(?P<name>[A-Za-z_][\w\.]*)
+|(?P<op><>|<=|>=|[-+*/^&=<>(),%])
+)""",re.X)
+_CELL=re.compile(r"\$?([A-Z]{1,3})\$?(\d+)")
+
+def tokenize(src):
+    out=[]; pos=0; n=len(src)
+    while pos<n:
+        if src[pos:].strip()=="": break
+        m=_TOK.match(src,pos)
+        if not m: raise SyntaxError(f"formule illisible à {pos}: {src[pos:pos+20]!r}")
+        kind=m.lastgroup; out.append((kind,m.group(kind))); pos=m.end()
+    return out
+
+def split_ref(txt):
+    """'Feuille'!$A$1:$B$2 -> (feuille|None, r1, c1, r2, c2)."""
+    sheet=None
+    if "!" in txt:
+        sheet,txt=txt.rsplit("!",1)
+        if sheet.startswith("'"): sheet=sheet[1:-1].replace("''","'")
+    parts=txt.split(":"); cells=[]
+    for p in parts:
+        m=_CELL.fullmatch(p); cells.append((int(m.group(2)),column_index_from_string(m.group(1))))
+    (r1,c1),(r2,c2)=cells[0],cells[-1]
+    return sheet,min(r1,r2),min(c1,c2),max(r1,r2),max(c1,c2)
+
+# ---------------------------------------------------------------- parser (précédence Excel)
+_BIN=[("=","<>","<","<=",">",">="),("&",),("+","-"),("*","/"),("^",)]
+class _P:
+    def __init__(self,toks): self.t=toks; self.i=0
+    def peek(self): return self.t[self.i] if self.i<len(self.t) else (None,None)
+    def take(self): tk=self.peek(); self.i+=1; return tk
+    def expect(self,v):
+        k,x=self.take()
+        if x!=v: raise SyntaxError(f"attendu {v!r}, trouvé {x!r}")
+    def expr(self,lvl=0):
+        if lvl==len(_BIN): return self.unary()
+        a=self.expr(lvl+1)
+        while True:
+            k,x=self.peek()
+            if k!="op" or x not in _BIN[lvl]: return a
+            self.take(); a=("op",x,a,self.expr(lvl+1))
+    def unary(self):
+        k,x=self.peek()
+        if k=="op" and x in "+-":
+            self.take(); a=self.unary(); return ("neg",a) if x=="-" else ("pos",a)
+        a=self.atom()
+        while self.peek()==("op","%"): self.take(); a=("pct",a)
+        return a
+    def atom(self):
+        k,x=self.take()
+        if k=="num": return ("n",float(x))
+        if k=="str": return ("s",x[1:-1].replace('""','"'))
+        if k=="ref": return ("ref",)+split_ref(x)
+        if k=="name":
+            u=x.upper()
+            if u in ("TRUE","FALSE"): return ("b",u=="TRUE")
+            return ("name",u)
+        if k=="func":
+            args=[]
+            if self.peek()==("op",")"): self.take(); return ("fn",x.upper(),args)
+            while True:
+                if self.peek() in (("op",","),("op",")")): args.append(("blank",))
+                else: args.append(self.expr())
+                k2,x2=self.take()
+                if x2==")": return ("fn",x.upper(),args)
+                if x2!=",": raise SyntaxError(f"séparateur attendu, trouvé {x2!r}")
+        if (k,x)==("op","("):
+            a=self.expr(); self.expect(")"); return a
+        raise SyntaxError(f"jeton inattendu {x!r}")
+
+_AST={}
+def parse(formula):
+    """'=…' -> AST (tuples). Mis en cache par texte de formule."""
+    a=_AST.get(formula)
+    if a is None:
+        p=_P(tokenize(formula[1:] if formula.startswith("=") else formula)); a=p.expr()
+        if p.i!=len(p.t): raise SyntaxError(f"reste non lu après {p.i} jetons")
+        _AST[formula]=a
+    return a
+
+def walk(ast):
+    """Itère tous les nœuds d'un AST (utile aux outils d'analyse statique)."""
+    yield ast
+    if ast[0]=="op": yield from walk(ast[2]); yield from walk(ast[3])
+    elif ast[0] in ("neg","pos","pct"): yield from walk(ast[1])
+    elif ast[0]=="fn":
+        for a in ast[2]: yield from walk(a)
+
+# ---------------------------------------------------------------- coercions & comparisons
+def num(v):
+    if v is None: return 0.0
+    if isinstance(v,bool): return 1.0 if v else 0.0
+    if isinstance(v,(int,float)): return float(v)
+    if iserr(v): return v
+    if isinstance(v,datetime.datetime): return to_serial(v.date())
+    if isinstance(v,datetime.date): return to_serial(v)
+    try: return float(v)
+    except (TypeError,ValueError): return E_VALUE
+
+def text(v):
+    if v is None: return ""
+    if isinstance(v,bool): return "TRUE" if v else "FALSE"
+    if isinstance(v,float):
+        if v==int(v) and abs(v)<1e15: return str(int(v))
+        return ("%.15g"%v)
+    return str(v)
+
+def _rank(v):
+    if v is None or isinstance(v,(int,float)) and not isinstance(v,bool): return 0
+    if isinstance(v,str): return 1
+    return 2
+def compare(op,a,b):
+    if a is None: a="" if isinstance(b,str) else (False if isinstance(b,bool) else 0.0)
+    if b is None: b="" if isinstance(a,str) else (False if isinstance(a,bool) else 0.0)
+    ra,rb=_rank(a),_rank(b)
+    if ra!=rb: x,y=ra,rb
+    elif ra==1: x,y=a.lower(),b.lower()
+    else: x,y=float(a),float(b)
+    return {"=":x==y,"<>":x!=y,"<":x<y,"<=":x<=y,">":x>y,">=":x>=y}[op]
+
+# ---------------------------------------------------------------- arrays (liste de lignes)
+def is_arr(v): return isinstance(v,list)
+def bcast(f,a,b):
+    if not is_arr(a) and not is_arr(b): return f(a,b)
+    A=a if is_arr(a) else [[a]]; B=b if is_arr(b) else [[b]]
+    nr=max(len(A),len(B)); nc=max(len(A[0]),len(B[0]))
+    g=lambda M,i,j: M[i if len(M)>1 else 0][j if len(M[0])>1 else 0]
+    return [[f(g(A,i,j),g(B,i,j)) for j in range(nc)] for i in range(nr)]
+def flat(v):
+    if is_arr(v):
+        for row in v: yield from row
+    else: yield v
+
+def _arith(op):
+    def f(a,b):
+        if iserr(a): return a
+        if iserr(b): return b
+        x,y=num(a),num(b)
+        if iserr(x): return x
+        if iserr(y): return y
+        if op=="+": return x+y
+        if op=="-": return x-y
+        if op=="*": return x*y
+        if op=="/": return E_DIV0 if y==0 else x/y
+        try: return float(x**y)
+        except (OverflowError,ZeroDivisionError,ValueError): return E_NUM
+    return f
+ARITH={o:_arith(o) for o in "+-*/^"}
+def _concat(a,b):
+    if iserr(a): return a
+    if iserr(b): return b
+    return text(a)+text(b)
+def _cmpf(op):
+    def f(a,b):
+        if iserr(a): return a
+        if iserr(b): return b
+        return compare(op,a,b)
+    return f
+CMP={o:_cmpf(o) for o in ("=","<>","<","<=",">",">=")}
+
+# ---------------------------------------------------------------- TEXT()
+def fmt_text(v,fmt):
+    x=num(v)
+    if iserr(x): return x
+    secs=fmt.split(";")
+    if re.search(r"[ymd]",secs[0].replace('"',"")) and "%" not in fmt:
+        d=to_date(x); out=secs[0]
+        for tok,val in (("yyyy","%04d"%d.year),("yy","%02d"%(d.year%100)),("mmmm",d.strftime("%B")),
+                        ("mmm",MON_EN[d.month-1]),("mm","%02d"%d.month),("dd","%02d"%d.day)):
+            out=out.replace(tok,val)
+        return out
+    sec=secs[0] if (x>=0 or len(secs)==1) else secs[1]
+    if x<0 and len(secs)>1: x=-x
+    pct=sec.count("%"); y=x*(100**pct)
+    m=re.search(r"0(?:\.(0+))?",sec); dec=len(m.group(1)) if m and m.group(1) else 0
+    body=("{:,.%df}"%dec).format(y) if "," in sec else ("{:.%df}"%dec).format(y)
+    if m: return sec[:m.start()].replace('"',"")+body+sec[m.end():].replace('"',"")
+    return body
+
+# ---------------------------------------------------------------- engine
+class Calc:
+    """Évaluateur paresseux et mémoïsé d'un classeur openpyxl (formules en texte)."""
+    def __init__(self,wb,today=None,overrides=None,pvals=None,volatile=()):
+        self.wb=wb; self.cache={}; self.rcache={}; self.busy=set()
+        self.names={n:d.attr_text for n,d in wb.defined_names.items()}
+        self.today=to_serial(today or datetime.date.today())
+        self.overrides=overrides or {}     # {(feuille,r,c): valeur} — sélecteurs forcés
+        self.pvals=pvals                   # {(feuille,ligne,agg,d1,d2): valeur} — agrégats pré-calculés (periods.cube)
+        self.volatile=set(volatile)        # noms « période » : tout ce qui en dépend est marqué (tainted)
+        self.tainted=set(); self.rtainted=set(); self._fr=[]
+        self.titles=set(wb.sheetnames)
+        try: h=parse(self.names["HDR"]); self.span=(h[3],h[5]) if h[0]=="ref" else None
+        except (KeyError,SyntaxError): self.span=None   # colonnes de HDR : seules les lignes sur cette plage sont précalculées
+
+    def _mark(self):
+        if self._fr: self._fr[-1]=True
+
+    def reseed(self,overrides=None,pvals=None):
+        """Nouvel état des sélecteurs : ne garde en cache que les cellules qui n'en dépendent pas."""
+        for k in self.tainted: self.cache.pop(k,None)
+        for k in self.rtainted: self.rcache.pop(k,None)
+        self.tainted=set(); self.rtainted=set()
+        self.overrides=overrides or {}; self.pvals=pvals
+
+    # -- cellules & plages
+    def cell(self,sheet,r,c):
+        k=(sheet,r,c)
+        if k in self.overrides: self._mark(); return self.overrides[k]
+        if k in self.cache:
+            if k in self.tainted: self._mark()
+            return self.cache[k]
+        if sheet not in self.titles: return E_REF
+        cl=self.wb[sheet]._cells.get((r,c)); v=cl.value if cl is not None else None
+        if isinstance(v,str) and v.startswith("=") and len(v)>1:
+            if k in self.busy: return 0.0     # référence circulaire : Excel renvoie 0
+            self.busy.add(k); self._fr.append(False)
+            try: v=self.formula(v,sheet,r,c)
+            finally: self.busy.discard(k); t=self._fr.pop()
+            if is_arr(v): v=v[0][0]
+            if isinstance(v,Rng): v=self.scalar(v)
+            if t: self.tainted.add(k); self._mark()
+        elif isinstance(v,(int,float)) and not isinstance(v,bool): v=float(v)
+        elif isinstance(v,(datetime.date,datetime.datetime)): v=num(v)
+        self.cache[k]=v; return v
+
+    def values(self,rg):
+        k=(rg.sheet,rg.r1,rg.c1,rg.r2,rg.c2); v=self.rcache.get(k)
+        if v is None:
+            self._fr.append(False)
+            try: v=[[self.cell(rg.sheet,r,c) for c in range(rg.c1,rg.c2+1)] for r in range(rg.r1,rg.r2+1)]
+            finally: t=self._fr.pop()
+            if t: self.rtainted.add(k)
+            self.rcache[k]=v
+        if k in self.rtainted: self._mark()
+        return v
+
+    def pv(self,agg,args):
+        """Raccourci cube : SUMIFS/AVERAGEIFS(ligne,HDR,">="&d1,HDR,"<="&d2) et INDEX(ligne,MATCH(d2,HDR,0)),
+        la ligne couvrant les colonnes de HDR (un autre bloc de la même ligne, ex. l'atterrissage de M3, est évalué)."""
+        if self.pvals is None: return _MISS
+        a0=args[0]
+        if a0[0]!="ref" or a0[1] is None or a0[2]!=a0[4] or (a0[3],a0[5])!=self.span: return _MISS
+        if agg=="LAST":
+            if len(args)!=2 or args[1][0]!="fn" or args[1][1]!="MATCH": return _MISS
+            m=args[1][2]
+            if len(m)!=3 or m[1]!=("name","HDR") or m[2]!=("n",0.0) or m[0][0]!="name": return _MISS
+            key=(a0[1],a0[2],"LAST",None,m[0][1])
+        else:
+            if len(args)!=5 or args[1]!=("name","HDR") or args[3]!=("name","HDR"): return _MISS
+            c1,c2=args[2],args[4]
+            if c1[:3]!=("op","&",("s",">=")) or c2[:3]!=("op","&",("s","<=")) or c1[3][0]!="name" or c2[3][0]!="name": return _MISS
+            key=(a0[1],a0[2],agg,c1[3][1],c2[3][1])
+        v=self.pvals.get(key,_MISS)
+        if v is not _MISS: self._mark()
+        return v
+
+    def scalar(self,v):
+        if isinstance(v,Rng):
+            if v.shape==(1,1): return self.cell(v.sheet,v.r1,v.c1)
+            return E_VALUE
+        if is_arr(v): return v[0][0]
+        return v
+    def arr(self,v): return self.values(v) if isinstance(v,Rng) else v
+
+    def formula(self,f,sheet,r=None,c=None):
+        try: ast=parse(f)
+        except SyntaxError: return E_NAME
+        return self.ev(ast,(sheet,r,c))
+
+    # -- noms définis
+    def name(self,nm,ctx):
+        if nm in self.volatile: self._mark()
+        txt=self.names.get(nm)
+        if txt is None: return E_NAME
+        return self.ev(parse(txt),ctx)
+
+    # -- AST
+    def ev(self,a,ctx):
+        t=a[0]
+        if t=="n" or t=="s" or t=="b": return a[1]
+        if t=="blank": return None
+        if t=="ref":
+            return Rng(a[1] or ctx[0],a[2],a[3],a[4],a[5])
+        if t=="name": return self.name(a[1],ctx)
+        if t=="neg":
+            return bcast(lambda x,_: ARITH["-"](0.0,x),self._opnd(self.ev(a[1],ctx)),0.0)
+        if t=="pos": return self.ev(a[1],ctx)
+        if t=="pct": return bcast(lambda x,_: ARITH["/"](x,100.0),self._opnd(self.ev(a[1],ctx)),0.0)
+        if t=="op":
+            op=a[1]; x=self._opnd(self.ev(a[2],ctx)); y=self._opnd(self.ev(a[3],ctx))
+            f=ARITH.get(op) or CMP.get(op) or _concat
+            return bcast(f,x,y)
+        if t=="fn":
+            fn=FUNCS.get(a[1])
+            if fn is None: return E_NAME
+            return fn(self,a[2],ctx)
+        return E_VALUE
+
+    def _opnd(self,v):
+        if isinstance(v,Rng): return self.cell(v.sheet,v.r1,v.c1) if v.shape==(1,1) else self.values(v)
+        return v
+
+    def sv(self,a,ctx):
+        """Argument évalué en scalaire."""
+        return self.scalar(self.ev(a,ctx))
+
+    def evaluate_all(self):
+        """{titre: {(r,c): valeur}} pour chaque cellule formule du classeur."""
+        out={}
+        for ws in self.wb.worksheets:
+            d=out.setdefault(ws.title,{})
+            for (r,c),cl in ws._cells.items():
+                v=cl.value
+                if isinstance(v,str) and v.startswith("=") and len(v)>1: d[(r,c)]=self.cell(ws.title,r,c)
+        return out
+
+# ---------------------------------------------------------------- fonctions
+def _crit(c):
+    """Critère SUMIFS (">="&x, "=x", x) -> prédicat."""
+    if iserr(c): return None
+    op="="; val=c
+    if isinstance(c,str):
+        for o in (">=","<=","<>",">","<","="):
+            if c.startswith(o): op=o; val=c[len(o):]; break
+        try: val=float(val)
+        except ValueError: pass
+    if isinstance(val,(int,float)) and not isinstance(val,bool):
+        return lambda v: isinstance(v,(int,float)) and not isinstance(v,bool) and compare(op,float(v),float(val))
+    return lambda v: (v is not None and not iserr(v)) and compare(op,v if isinstance(v,str) else text(v),val)
+
+def _ifs(X,args,ctx):
+    base=X.arr(X.ev(args[0],ctx)); vals=list(flat(base)); mask=[True]*len(vals)
+    for i in range(1,len(args)-1,2):
+        rng=list(flat(X.arr(X.ev(args[i],ctx)))); pred=_crit(X.sv(args[i+1],ctx))
+        if pred is None or len(rng)!=len(vals): return None
+        for j,v in enumerate(rng):
+            if mask[j] and not pred(v): mask[j]=False
+    return [v for v,m in zip(vals,mask) if m]
+
+def f_sumifs(X,args,ctx):
+    v=X.pv("SUM",args)
+    if v is not _MISS: return v
+    sel=_ifs(X,args,ctx)
+    if sel is None: return E_VALUE
+    s=0.0
+    for v in sel:
+        if iserr(v): return v
+        if isinstance(v,(int,float)) and not isinstance(v,bool): s+=v
+    return s
+def f_averageifs(X,args,ctx):
+    v=X.pv("AVG",args)
+    if v is not _MISS: return v
+    sel=_ifs(X,args,ctx)
+    if sel is None: return E_VALUE
+    nums=[]
+    for v in sel:
+        if iserr(v): return v
+        if isinstance(v,(int,float)) and not isinstance(v,bool): nums.append(v)
+    return sum(nums)/len(nums) if nums else E_DIV0
+
+def f_if(X,args,ctx):
+    c=X.sv(args[0],ctx)
+    if iserr(c): return c
+    if isinstance(c,str): return E_VALUE
+    if num(c): return X.ev(args[1],ctx) if len(args)>1 else True
+    return X.ev(args[2],ctx) if len(args)>2 else False
+def f_iferror(X,args,ctx):
+    v=X.ev(args[0],ctx); s=X._opnd(v) if isinstance(v,Rng) else v
+    if is_arr(s): s=s[0][0]
+    return X.ev(args[1],ctx) if iserr(s) else v
+
+def f_index(X,args,ctx):
+    v=X.pv("LAST",args)
+    if v is not _MISS: return v
+    src=X.ev(args[0],ctx)
+    r=num(X.sv(args[1],ctx)) if len(args)>1 and args[1][0]!="blank" else 0.0
+    c=num(X.sv(args[2],ctx)) if len(args)>2 and args[2][0]!="blank" else None
+    if iserr(src): return src
+    for z in (r,c):
+        if iserr(z): return z
+    shape=src.shape if isinstance(src,Rng) else (len(src),len(src[0])) if is_arr(src) else (1,1)
+    r=int(r)
+    if c is None:
+        if shape[0]==1: r,c=1,r       # plage ligne : un seul indice = position
+        else: c=1 if shape[1]==1 else 0
+    c=int(c)
+    if r<0 or c<0 or r>shape[0] or c>shape[1]: return E_REF
+    if isinstance(src,Rng):
+        if r==0: return Rng(src.sheet,src.r1,src.c1+c-1,src.r2,src.c1+c-1)
+        if c==0: return Rng(src.sheet,src.r1+r-1,src.c1,src.r1+r-1,src.c2)
+        return Rng(src.sheet,src.r1+r-1,src.c1+c-1,src.r1+r-1,src.c1+c-1)
+    if not is_arr(src): return src
+    if r==0: return [[row[c-1]] for row in src]
+    if c==0: return [src[r-1]]
+    return src[r-1][c-1]
+
+def f_match(X,args,ctx):
+    v=X.sv(args[0],ctx)
+    if iserr(v): return v
+    lst=list(flat(X.arr(X.ev(args[1],ctx))))
+    mt=num(X.sv(args[2],ctx)) if len(args)>2 else 1.0
+    if mt==0:
+        for i,x in enumerate(lst):
+            if x is None or iserr(x) or _rank(x)!=_rank(v): continue
+            if compare("=",x,v): return float(i+1)
+        return E_NA
+    best=None
+    for i,x in enumerate(lst):
+        if x is None or iserr(x) or _rank(x)!=_rank(v): continue
+        if (mt>0 and compare("<=",x,v)) or (mt<0 and compare(">=",x,v)): best=i+1
+        else: break
+    return float(best) if best else E_NA
+
+def f_sumproduct(X,args,ctx):
+    arrs=[X.arr(X.ev(a,ctx)) for a in args]
+    arrs=[a if is_arr(a) else [[a]] for a in arrs]
+    n=len(list(flat(arrs[0])))
+    cols=[list(flat(a)) for a in arrs]
+    if any(len(c)!=n for c in cols): return E_VALUE
+    s=0.0
+    for j in range(n):
+        p=1.0
+        for col in cols:
+            v=col[j]
+            if iserr(v): return v
+            p*=float(v) if isinstance(v,(int,float)) else 0.0
+        s+=p
+    return s
+
+def _nums(X,args,ctx):
+    for a in args:
+        v=X.ev(a,ctx)
+        if isinstance(v,Rng) or is_arr(v):
+            for x in flat(X.arr(v)):
+                if iserr(x): yield x
+                elif isinstance(x,(int,float)) and not isinstance(x,bool): yield float(x)
+        else:
+            x=num(v); yield x
+def _agg(f):
+    def g(X,args,ctx):
+        xs=list(_nums(X,args,ctx))
+        for x in xs:
+            if iserr(x): return x
+        return f(xs)
+    return g
+def _kth(big):
+    """LARGE / SMALL : k-ième plus grande / petite valeur numérique de la plage."""
+    def g(X,args,ctx):
+        xs=list(_nums(X,args[:1],ctx)); k=num(X.sv(args[1],ctx))
+        for x in xs+[k]:
+            if iserr(x): return x
+        xs.sort(reverse=big); k=int(k)
+        return xs[k-1] if 1<=k<=len(xs) else E_NUM
+    return g
+def f_count(X,args,ctx):
+    n=0
+    for a in args:
+        v=X.ev(a,ctx)
+        for x in flat(X.arr(v)):
+            if isinstance(x,(int,float)) and not isinstance(x,bool): n+=1
+    return float(n)
+
+def _scal(f,n=1):
+    def g(X,args,ctx):
+        vs=[X.sv(a,ctx) for a in args[:n]]
+        for v in vs:
+            if iserr(v): return v
+        return f(*vs)
+    return g
+def _date(y,m,d):
+    y,m,d=(num(v) for v in (y,m,d))
+    for v in (y,m,d):
+        if iserr(v): return v
+    y,m=int(y)+(int(m)-1)//12,(int(m)-1)%12+1
+    return to_serial(datetime.date(y,m,1))+int(d)-1
+def _edate(s,n):
+    s,n=num(s),num(n)
+    if iserr(s) or iserr(n): return E_VALUE
+    d=to_date(s); t=d.year*12+d.month-1+int(n); y,m=divmod(t,12)
+    return to_serial(datetime.date(y,m+1,min(d.day,calendar.monthrange(y,m+1)[1])))
+def _roundup(x,d=0.0):
+    x,d=num(x),num(d)
+    if iserr(x) or iserr(d): return E_VALUE
+    k=10**int(d); return math.copysign(math.ceil(abs(x)*k-1e-12)/k,x)
+def _n(v):
+    if isinstance(v,bool): return 1.0 if v else 0.0
+    return float(v) if isinstance(v,(int,float)) else 0.0
+def _mod(a,b):
+    a,b=num(a),num(b)
+    if iserr(a) or iserr(b): return E_VALUE
+    return E_DIV0 if b==0 else a-b*math.floor(a/b)
+
+def f_rows(X,args,ctx):
+    v=X.ev(args[0],ctx)
+    return float(v.shape[0]) if isinstance(v,Rng) else float(len(v)) if is_arr(v) else 1.0
+def f_row(X,args,ctx):
+    if args:
+        v=X.ev(args[0],ctx); return float(v.r1) if isinstance(v,Rng) else E_VALUE
+    return float(ctx[1]) if ctx[1] else E_VALUE
+def f_isblank(X,args,ctx): return X.sv(args[0],ctx) is None
+def _is(t):
+    """ISNUMBER / ISTEXT : élément par élément sur une plage (SUMPRODUCT), scalaire sinon."""
+    def g(X,args,ctx):
+        v=X.arr(X.ev(args[0],ctx))
+        return [[t(x) for x in row] for row in v] if is_arr(v) else t(v)
+    return g
+def f_and(X,args,ctx):
+    vs=[X.sv(a,ctx) for a in args]
+    for v in vs:
+        if iserr(v): return v
+    return all(num(v) for v in vs)
+def f_or(X,args,ctx):
+    vs=[X.sv(a,ctx) for a in args]
+    for v in vs:
+        if iserr(v): return v
+    return any(num(v) for v in vs)
+
+FUNCS={
+ "IF":f_if,"IFERROR":f_iferror,"INDEX":f_index,"MATCH":f_match,
+ "SUMIFS":f_sumifs,"AVERAGEIFS":f_averageifs,"SUMPRODUCT":f_sumproduct,
+ "SUM":_agg(sum),"MAX":_agg(lambda xs: max(xs) if xs else 0.0),"MIN":_agg(lambda xs: min(xs) if xs else 0.0),
+ "LARGE":_kth(True),"SMALL":_kth(False),
+ "COUNT":f_count,"ROWS":f_rows,"ROW":f_row,"ISBLANK":f_isblank,"AND":f_and,"OR":f_or,
+ "ISNUMBER":_is(lambda x: isinstance(x,(int,float)) and not isinstance(x,bool)),"ISTEXT":_is(lambda x: isinstance(x,str)),
+ "DATE":_scal(_date,3),"EDATE":_scal(_edate,2),"ROUNDUP":_scal(_roundup,2),
+ "MONTH":_scal(lambda s: E_VALUE if iserr(num(s)) else float(to_date(num(s)).month)),
+ "YEAR":_scal(lambda s: E_VALUE if iserr(num(s)) else float(to_date(num(s)).year)),
+ "ABS":_scal(lambda x: x if iserr(num(x)) else abs(num(x))),
+ "N":_scal(_n),"MOD":_scal(_mod,2),
+ "TEXT":_scal(fmt_text,2),
+ "SUBSTITUTE":_scal(lambda t,o,n: text(t).replace(text(o),text(n)),3),
+ "NA":lambda X,args,ctx: E_NA,
+ "TODAY":lambda X,args,ctx: X.today,
+}
+
+def evaluate(wb,**kw):
+    """Raccourci : valeurs de toutes les cellules formule du classeur."""
+    return Calc(wb,**kw).evaluate_all()
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""Sauvegarde xlsx Cosmos : écrit chaque formule avec sa valeur en cache (<v>) quand elle est fournie.
+Le classeur s'affiche alors sans recalcul complet à l'ouverture (Excel / LibreOffice) ;
+seule une modification de sélecteur déclenche le recalcul des dépendances.
+Les XML de feuilles sont sérialisés en parallèle (processus fils, fork) puis versés dans le zip dans l'ordre ;
+styles, noms, dessins et graphiques restent assemblés à la fin par le processus principal."""
+import copy, datetime, multiprocessing, os
+from concurrent.futures import ProcessPoolExecutor
+from zipfile import ZipFile, ZIP_DEFLATED
+from openpyxl.cell._writer import write_cell, _set_attributes
+from openpyxl.comments.comment_sheet import CommentRecord
+from openpyxl.compat import safe_string
+from openpyxl.drawing.spreadsheet_drawing import SpreadsheetDrawing
+from openpyxl.styles.differential import DifferentialStyle
+from openpyxl.worksheet._writer import WorksheetWriter
+from openpyxl.writer.excel import ExcelWriter
+from openpyxl.xml.functions import Element, SubElement
+from xlcalc import XLErr
+
+CALC_ID=191029   # moteur Excel 2019/365 : pas de recalcul complet forcé à l'ouverture
+
+def vtag(v):
+    """Valeur Python -> (attribut t, texte <v>) au format SpreadsheetML."""
+    if v is None: return None,"0"
+    if isinstance(v,bool): return "b","1" if v else "0"
+    if isinstance(v,XLErr): return "e",v.code
+    if isinstance(v,str): return "str",v
+    return None,safe_string(v)
+
+def write_cached(xf,cell,v):
+    value,attrs=_set_attributes(cell,cell.has_style)
+    t,txt=vtag(v)
+    if t: attrs["t"]=t
+    el=Element("c",attrs); SubElement(el,"f").text=value[1:]; SubElement(el,"v").text=txt
+    xf.write(el)
+
+class CachedSheetWriter(WorksheetWriter):
+    def __init__(self,ws,values,out=None):
+        self.values=values; super().__init__(ws,out)
+
+    def write_row(self,xf,row,row_idx):
+        attrs={"r":f"{row_idx}"}; attrs.update(self.ws.row_dimensions.get(row_idx,{}))
+        vals=self.values
+        with xf.element("row",attrs):
+            for cell in row:
+                if cell._comment is not None: self.ws._comments.append(CommentRecord.from_cell(cell))
+                if cell._value is None and not cell.has_style and not cell._comment: continue
+                k=(cell.row,cell.column)
+                if cell.data_type=="f" and isinstance(cell._value,str) and k in vals: write_cached(xf,cell,vals[k])
+                else: write_cell(xf,self.ws,cell,cell.has_style)
+
+_JOB={}   # {clé: (classeur, valeurs)} hérités par les processus fils au fork : rien n'est picklé vers eux
+
+def prime(wb):
+    """Enregistre styles de cellule/ligne/colonne et dxf de MFC avant le fork : mêmes indices dans tous les processus."""
+    cs=wb._cell_styles; df=DifferentialStyle()
+    for ws in wb.worksheets:
+        for cell in ws._cells.values():
+            if cell.has_style: cs.add(cell._style)
+        for dims in (ws.row_dimensions,ws.column_dimensions):
+            for d in dims.values():
+                if d.has_style: cs.add(d._style)
+        for cf in ws.conditional_formatting:
+            for rule in cf.rules:
+                if rule.dxf and rule.dxf!=df: wb._differential_styles.add(rule.dxf)
+
+def _write_part(job,i):
+    """Processus fils : XML de la i-ème feuille dans un fichier temporaire -> (chemin, rels, commentaires)."""
+    wb,values=_JOB[job]; ws=wb.worksheets[i]
+    writer=CachedSheetWriter(ws,values.get(ws.title,{})); writer.write()
+    return writer.out,writer._rels,ws._comments
+
+class CachedExcelWriter(ExcelWriter):
+    def __init__(self,workbook,archive,values,frozen=None,jobs=1):
+        super().__init__(workbook,archive); self.values=values
+        self.frozen=frozen if frozen is not None else {}
+        self.jobs=jobs; self.parts={}
+
+    def write_data(self):
+        wb=self.workbook
+        todo=[i for i,ws in enumerate(wb.worksheets)
+              if self.frozen.get(ws.title) is None and not (ws._tables or ws._pivots)]   # tables/TCD : effets de bord, en série
+        if self.jobs<2 or len(todo)<2 or "fork" not in multiprocessing.get_all_start_methods():
+            return super().write_data()
+        prime(wb); job=id(self); _JOB[job]=(wb,self.values)   # une entrée par sauvegarde : builds concurrents (threads)
+        todo.sort(key=lambda i:-len(wb.worksheets[i]._cells))   # plus grosses feuilles d'abord
+        try:
+            with ProcessPoolExecutor(min(self.jobs,len(todo)),mp_context=multiprocessing.get_context("fork")) as ex:
+                self.parts={wb.worksheets[i].title:ex.submit(_write_part,job,i) for i in todo}
+                super().write_data()
+        finally:
+            _JOB.pop(job,None)
+            for fut in self.parts.values():   # fichiers temporaires non versés (erreur en cours de route)
+                out=fut.result()[0] if fut.done() and fut.exception() is None else None
+                if out and os.path.exists(out): os.remove(out)
+
+    def write_worksheet(self,ws):
+        ws._drawing=SpreadsheetDrawing(); ws._drawing.charts=ws._charts; ws._drawing.images=ws._images
+        fz=self.frozen.get(ws.title)
+        if fz is not None:   # XML déjà sérialisé lors d'une sauvegarde précédente (feuille inchangée)
+            xml,rels=fz; ws._rels=copy.deepcopy(rels)
+            self._archive.writestr(ws.path[1:],xml); self.manifest.append(ws)
+            return
+        fut=self.parts.get(ws.title)
+        if fut is not None:   # sérialisée par un processus fils
+            out,ws._rels,ws._comments=fut.result()
+            if ws.title in self.frozen:
+                with open(out,"rb") as f: self.frozen[ws.title]=(f.read(),copy.deepcopy(ws._rels))
+            self._archive.write(out,ws.path[1:]); self.manifest.append(ws)
+            os.remove(out)
+            return
+        writer=CachedSheetWriter(ws,self.values.get(ws.title,{})); writer.write()
+        ws._rels=writer._rels
+        if ws.title in self.frozen: self.frozen[ws.title]=(writer.read(),copy.deepcopy(writer._rels))
+        self._archive.write(writer.out,ws.path[1:]); self.manifest.append(ws)
+        writer.cleanup()
+
+def save(wb,fn,values=None,frozen=None,jobs=None):
+    """wb.save(fn) + valeurs en cache ({titre: {(r,c): valeur}}, cf. xlcalc.evaluate).
+    frozen : {titre: None} rempli au 1er appel puis réutilisé tel quel (feuilles identiques d'une sortie à l'autre).
+    jobs : processus de sérialisation des feuilles (défaut : nombre de cœurs ; 1 = en série)."""
+    if values:
+        wb.calculation.fullCalcOnLoad=False; wb.calculation.calcId=CALC_ID
+    wb.properties.modified=datetime.datetime.now(tz=datetime.timezone.utc).replace(tzinfo=None)
+    with ZipFile(fn,"w",ZIP_DEFLATED,allowZip64=True) as archive:
+        CachedExcelWriter(wb,archive,values or {},frozen,jobs or os.cpu_count() or 1).write_data()